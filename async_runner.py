@@ -0,0 +1,234 @@
+"""
+异步并发执行引擎 (可选模式)
+
+linker 裂变出的场景按资源组彼此独立，而渲染出的 pytest 脚本只能串行阻塞执行。
+本模块把每个场景包装成一个协程并发调度：
+- 场景内部 Step 严格按顺序执行，vars_pool 链式传递不变
+- 批次场景: setup 执行一次后，各用例在 fork 出的上下文中并发执行，最后统一 teardown
+- 跨资源依赖: 按 DAG 层级逐层调度，上游 provider 先于依赖它的场景生产，全部结束后逆序删除；
+  同一层内的 provider 与场景彼此独立，全部并发
+- 全局并发上限 + 单 host 并发上限，两者同时约束在途请求数
+- 阻塞的 requests 调用交给线程池执行，复用 runtime 的共享连接池
+
+用法:
+    python async_runner.py --scenarios scenarios.json --concurrency 32 --per-host 8
+    python async_runner.py --history --history-order --history-skip 24   # 失败优先、跳过近期通过且未改动的场景
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import run_history
+import runtime
+
+
+class ConcurrencyLimiter:
+    """全局 + 单 host 双层信号量"""
+
+    def __init__(self, concurrency, per_host):
+        self.global_sem = asyncio.Semaphore(concurrency)
+        self.per_host = per_host
+        self.host_sems = {}
+
+    def for_host(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.host_sems:
+            self.host_sems[host] = asyncio.Semaphore(self.per_host)
+        return self.host_sems[host]
+
+
+async def run_steps_async(steps, ctx, limiter, executor):
+    """逐个 Step 排队获取并发配额后下发到线程池"""
+    loop = asyncio.get_running_loop()
+    for step in steps:
+        async with limiter.global_sem, limiter.for_host(step["url"]):
+            await loop.run_in_executor(executor, runtime.run_step, step, ctx)
+
+
+async def run_batch_async(scenario, ctx, limiter, executor):
+    await run_steps_async(scenario.get("setup", []), ctx, limiter, executor)
+    try:
+        cases = scenario["cases"]
+        results = await asyncio.gather(
+            *(run_steps_async(c["steps"], ctx.fork(c["case_name"], c.get("description", ""), c.get("scenario_type")),
+                              limiter, executor)
+              for c in cases),
+            return_exceptions=True)
+    finally:
+        await run_steps_async(scenario.get("teardown", []), ctx, limiter, executor)
+    failed = [f"{c['case_name']}: {r!r}" for c, r in zip(cases, results) if isinstance(r, BaseException)]
+    if failed:
+        raise AssertionError(f"{len(failed)} 个用例失败: " + "; ".join(failed))
+
+
+async def run_scenario_async(scenario, limiter, executor, providers=None):
+    """以协程方式执行单个场景 (批次场景按 setup -> 并发用例 -> teardown 执行)"""
+    ctx = runtime.ScenarioContext.from_scenario(scenario)
+    started = time.perf_counter()
+    try:
+        ctx.vars_pool.update(seed_from(scenario, providers or {}))
+        if runtime.is_batch(scenario):
+            await run_batch_async(scenario, ctx, limiter, executor)
+        else:
+            await run_steps_async(scenario["steps"], ctx, limiter, executor)
+    except Exception as e:
+        return {"scenario_name": ctx.scenario_name, "ok": False, "error": repr(e),
+                "duration": time.perf_counter() - started}
+    return {"scenario_name": ctx.scenario_name, "ok": True, "error": None,
+            "duration": time.perf_counter() - started}
+
+
+def seed_from(scenario, providers):
+    """从已生产的上游 provider 上下文中取出场景所需的变量；上游失败时直接判定失败"""
+    seed = {}
+    for name in dict.fromkeys((scenario.get("requires") or {}).values()):
+        ctx = providers.get(name)
+        if ctx is None:
+            raise RuntimeError(f"上游 {name} 生产失败或不存在")
+        seed.update(ctx.vars_pool)
+    return seed
+
+
+def schedule_levels(scenarios):
+    """
+    按 requires 分层: provider 的层级 = 其上游 provider 的最大层级 + 1 (无上游为 0)，
+    场景的层级 = 所需 provider 的最大层级 + 1 (无依赖为 0，与第一层 provider 同时起跑)
+    """
+    providers = {s["scenario_name"]: s for s in scenarios if runtime.is_provider(s)}
+    levels = {}
+
+    def level_of(name, visiting=()):
+        if name not in levels:
+            provider = providers.get(name)
+            ups = [] if provider is None or name in visiting else \
+                [level_of(up, visiting + (name,)) for up in (provider.get("requires") or {}).values()]
+            levels[name] = max(ups, default=-1) + 1
+        return levels[name]
+
+    layered = {}
+    for index, s in enumerate(scenarios):
+        if runtime.is_provider(s):
+            level = level_of(s["scenario_name"])
+        else:
+            level = max((level_of(up) + 1 for up in (s.get("requires") or {}).values()), default=0)
+        layered.setdefault(level, []).append(index)
+    return [layered[level] for level in sorted(layered)]
+
+
+async def produce_async(provider, limiter, executor, providers):
+    """执行 provider 的 setup；返回结果与保留下来的上下文 (失败时为 None)"""
+    ctx = runtime.ScenarioContext.from_scenario(provider)
+    started = time.perf_counter()
+    try:
+        ctx.vars_pool.update(seed_from(provider, providers))
+        await run_steps_async(provider.get("setup", []), ctx, limiter, executor)
+    except Exception as e:
+        return {"scenario_name": ctx.scenario_name, "ok": False, "error": repr(e),
+                "duration": time.perf_counter() - started}, None
+    return {"scenario_name": ctx.scenario_name, "ok": True, "error": None,
+            "duration": time.perf_counter() - started}, ctx
+
+
+async def run_all(scenarios, concurrency=32, per_host=8):
+    limiter = ConcurrencyLimiter(concurrency, per_host)
+    results = [None] * len(scenarios)
+    providers, produced = {}, []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            for level in schedule_levels(scenarios):
+                tasks = []
+                for index in level:
+                    s = scenarios[index]
+                    if runtime.is_provider(s):
+                        tasks.append(produce_async(s, limiter, executor, providers))
+                    else:
+                        tasks.append(run_scenario_async(s, limiter, executor, providers))
+                for index, outcome in zip(level, await asyncio.gather(*tasks)):
+                    if runtime.is_provider(scenarios[index]):
+                        outcome, ctx = outcome
+                        if ctx is not None:
+                            providers[outcome["scenario_name"]] = ctx
+                            produced.append(scenarios[index])
+                    results[index] = outcome
+        finally:
+            # 先删下游再删上游
+            for provider in reversed(produced):
+                try:
+                    await run_steps_async(provider.get("teardown", []), providers[provider["scenario_name"]],
+                                          limiter, executor)
+                except Exception as e:
+                    print(f"⚠️ [Async] 上游 {provider['scenario_name']} 清理失败: {e!r}")
+    return results
+
+
+def run_scenarios(scenarios, concurrency=32, per_host=8, latency_log=None, base_url=None, seed=None):
+    """同步入口：并发执行全部场景，按输入顺序返回每个场景的结果"""
+    runtime.configure_base_url(base_url)
+    runtime.configure_data_seed(seed)
+    # 单 host 连接池至少要容纳 per_host 个在途连接，否则会退化成排队建连
+    runtime.configure_http(pool_maxsize=max(per_host, runtime.DEFAULT_HTTP_CONFIG["pool_maxsize"]))
+    runtime.configure_latency(latency_log)
+    try:
+        return asyncio.run(run_all(scenarios, concurrency, per_host))
+    finally:
+        runtime.close_session()
+        runtime.close_latency()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="并发执行 scenarios.json 中的测试场景")
+    parser.add_argument("--scenarios", default="scenarios.json", help="linker 产出的场景文件")
+    parser.add_argument("--concurrency", type=int, default=32, help="全局在途请求上限")
+    parser.add_argument("--per-host", type=int, default=8, help="单个 host 的在途请求上限")
+    parser.add_argument("--verbose", action="store_true", help="打印每个 Step 的执行日志")
+    parser.add_argument("--latency-log", help="把每次请求的延迟追加写入该 JSON Lines 文件 (latency_report.py 汇总)")
+    parser.add_argument("--base-url", help="把请求的 host 改写为该地址 (如 mock_server.py 的本地地址)")
+    parser.add_argument("--seed", type=int, help="测试数据种子 (默认随机并打印；环境变量 SAAP_SEED 优先)")
+    parser.add_argument("--history", nargs="?", const=run_history.DEFAULT_DB, metavar="DB",
+                        help=f"记录运行历史到 SQLite (默认 {run_history.DEFAULT_DB})")
+    parser.add_argument("--history-order", action="store_true", help="最近失败 / 新增改动 / 慢场景优先执行 (需 --history)")
+    parser.add_argument("--history-skip", type=float, metavar="HOURS",
+                        help="跳过定义未变化且最近 HOURS 小时内通过过的场景 (需 --history)")
+    args = parser.parse_args(argv)
+
+    with open(args.scenarios, 'r', encoding='utf-8') as f:
+        scenarios = json.load(f)
+
+    runtime.VERBOSE = args.verbose
+    history = None
+    if args.history:
+        history = run_history.RunHistory(args.history)
+        runtime.configure_response_log(True)
+        scenarios, skipped = run_history.plan_scenarios(
+            history, scenarios, args.history_order, args.history_skip and args.history_skip * 3600)
+        if skipped:
+            print(f"⏭️ [History] {len(skipped)} 个场景定义未变化且 {args.history_skip:g} 小时内通过过，已跳过")
+    elif args.history_order or args.history_skip:
+        parser.error("--history-order / --history-skip 需要同时指定 --history")
+
+    print(f"⚡ [Async] 并发执行 {len(scenarios)} 个场景 (全局 {args.concurrency} / 单host {args.per_host})...")
+    seed = runtime.configure_data_seed(args.seed)
+    print(runtime.seed_banner())
+    started = time.perf_counter()
+    results = run_scenarios(scenarios, args.concurrency, args.per_host, args.latency_log, args.base_url, seed)
+    elapsed = time.perf_counter() - started
+    if history is not None:
+        changed = run_history.record_results(history, scenarios, results)
+        history.close()
+        if changed:
+            print(f"⚠️ [History] {len(changed)} 个场景的响应结构与上次通过时不同 (接口可能变更): {', '.join(changed[:10])}")
+
+    failed = [r for r in results if not r["ok"]]
+    for r in results:
+        mark = "✅" if r["ok"] else "❌"
+        print(f"  {mark} {r['scenario_name']} ({r['duration']:.2f}s){'' if r['ok'] else ' - ' + r['error']}")
+    print(f"🏁 [Async] 完成: {len(results) - len(failed)} 通过 / {len(failed)} 失败，总耗时 {elapsed:.2f}s")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
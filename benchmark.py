@@ -0,0 +1,275 @@
+"""
+生成链路基准测试：按参数合成与 data.json 同结构的接口定义，逐阶段测量耗时与内存峰值。
+
+阶段: load (流式读取) -> cluster (路由聚类) -> fission (场景裂变) -> dump (scenarios.json 序列化)
+      -> render (模板渲染，只产出不落盘) -> write (流式渲染写盘)
+
+- 耗时: 关闭 tracemalloc 跑 --repeat 次，每个阶段取最小值，避免内存追踪拖慢计时
+- 内存: 额外跑一次并开启 tracemalloc，记录每个阶段的峰值
+- 结果可保存为 JSON 基线 (--save)，之后用 --compare 对比，超出容差即以非零码退出
+
+用法:
+    python benchmark.py --resources 10,100,500 --endpoints 8 --fields 6 --depth 2 --save bench_baseline.json
+    python benchmark.py --resources 10,100,500 --endpoints 8 --fields 6 --depth 2 --compare bench_baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import generator
+import metrics
+from build_cache import dump_json_if_changed
+from linker import cluster_resources, fission_groups
+from spec_loader import iter_spec
+
+STAGES = ("load", "cluster", "fission", "dump", "render", "write")
+BASE_URL = "https://bench.example.com/open-apis/bench/v1"
+FIELD_VALUES = (
+    lambda rnd, i: f"value_{i}_{rnd.randint(0, 9999)}",
+    lambda rnd, i: rnd.randint(1, 1000),
+    lambda rnd, i: rnd.random() < 0.5,
+    lambda rnd, i: f"ou_{rnd.getrandbits(32):08x}",
+)
+# 时间差低于该值 (秒) 时视为噪声，不判定为退化
+MIN_TIME_DELTA = 0.05
+MIN_MEMORY_DELTA_KB = 256
+
+
+# ========== 合成接口定义 ==========
+
+def _body(rnd, fields, depth, prefix=""):
+    """K 个字段的请求体；depth > 0 时再挂一层嵌套对象"""
+    body = {}
+    for i in range(fields):
+        body[f"{prefix}field_{i}"] = FIELD_VALUES[i % len(FIELD_VALUES)](rnd, i)
+    if depth > 0:
+        body[f"{prefix}nested"] = _body(rnd, max(1, fields // 2), depth - 1, prefix)
+    return body
+
+
+def _api(case_name, method, url, body=None, params=None):
+    return {
+        "case_name": case_name,
+        "description": f"[基准] {case_name}",
+        "url": url,
+        "method": method,
+        "headers": {"Authorization": "Bearer t-bench", "Content-Type": "application/json"},
+        "params": params or {},
+        "body": body or {},
+    }
+
+
+def synthesize_spec(resources, endpoints, fields, depth, seed=0):
+    """
+    每个资源组: 生产者 POST + 列表 GET + 详情 GET/PUT/DELETE，
+    endpoints 超过 5 的部分补成 /:id/action_n 形式的消费者动作接口。
+    """
+    rnd = random.Random(seed)
+    spec = []
+    for r in range(resources):
+        res = f"res{r}s"
+        collection = f"{BASE_URL}/{res}"
+        item = f"{collection}/:{res[:-1]}_id"
+        apis = [
+            _api(f"{res}_create", "POST", collection, _body(rnd, fields, depth), {"id_type": "user_id"}),
+            _api(f"{res}_list", "GET", collection, params={"page_size": 20, "page_token": ""}),
+            _api(f"{res}_get", "GET", item),
+            _api(f"{res}_update", "PUT", item, _body(rnd, fields, depth)),
+            _api(f"{res}_delete", "DELETE", item),
+        ]
+        for a in range(max(0, endpoints - len(apis))):
+            apis.append(_api(f"{res}_action_{a}", "POST", f"{item}/action_{a}", _body(rnd, fields, depth)))
+        spec.extend(apis[:max(1, endpoints)])
+    return spec
+
+
+# ========== 分阶段执行 ==========
+
+def run_pipeline(spec_path, workdir, template, jobs, measure):
+    """按阶段执行生成链路；measure(name, fn) 负责计时/测内存并返回 fn() 的结果"""
+    metrics.METRICS.reset()
+    counts = {}
+    raw = measure("load", lambda: list(iter_spec(spec_path)))
+    groups = measure("cluster", lambda: cluster_resources(raw))
+    by_resource = measure("fission", lambda: fission_groups(groups, jobs))
+    scenarios = [s for res_name in groups for s in by_resource[res_name]]
+
+    def dump():
+        # 与 linker 一致：流式写出 scenarios.json
+        output_file = os.path.join(workdir, "scenarios.json")
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        return dump_json_if_changed(output_file, scenarios, indent=4)
+
+    scenarios_bytes = measure("dump", dump)
+
+    context = dict(scenarios=scenarios, **generator.render_args('scenarios.json'))
+
+    def render():
+        return sum(len(chunk) for chunk in template.generate(**context))
+
+    def write():
+        output_file = os.path.join(workdir, "test_final_suite.py")
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        generator.render_to_file(template, output_file, **context)
+        return os.path.getsize(output_file)
+
+    rendered_chars = measure("render", render)
+    written_bytes = measure("write", write)
+    counts.update(apis=len(raw), resources=len(groups), scenarios=len(scenarios),
+                  steps=sum(metrics.step_count(s) for s in scenarios), scenarios_json_bytes=scenarios_bytes,
+                  rendered_chars=rendered_chars, written_bytes=written_bytes)
+    return counts
+
+
+def time_pipeline(spec_path, workdir, template, jobs):
+    timings = {}
+
+    def measure(name, fn):
+        started = time.perf_counter()
+        result = fn()
+        timings[name] = time.perf_counter() - started
+        return result
+
+    counts = run_pipeline(spec_path, workdir, template, jobs, measure)
+    return timings, counts
+
+
+def memory_pipeline(spec_path, workdir, template, jobs):
+    """开启 tracemalloc 跑一遍，记录各阶段内存峰值 (KB)；进程池模式下只统计主进程"""
+    peaks = {}
+
+    def measure(name, fn):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn()
+        peaks[name] = round((tracemalloc.get_traced_memory()[1] - before) / 1024, 1)
+        return result
+
+    tracemalloc.start()
+    try:
+        run_pipeline(spec_path, workdir, template, jobs, measure)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def bench_case(resources, endpoints, fields, depth, repeat=3, jobs=1, mode="render", memory=True, seed=0):
+    template = generator.get_environment().get_template(generator.TEMPLATES[mode])
+    with tempfile.TemporaryDirectory(prefix="saap_bench_") as workdir:
+        spec_path = os.path.join(workdir, "spec.json")
+        with open(spec_path, 'w', encoding='utf-8') as f:
+            json.dump(synthesize_spec(resources, endpoints, fields, depth, seed), f, ensure_ascii=False)
+
+        best, counts = {}, {}
+        # 屏蔽链路内部的进度打印，只保留基准测试自身输出
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(max(1, repeat)):
+                timings, counts = time_pipeline(spec_path, workdir, template, jobs)
+                for name, seconds in timings.items():
+                    best[name] = min(seconds, best.get(name, seconds))
+            peaks = memory_pipeline(spec_path, workdir, template, jobs) if memory else {}
+
+    stages = {name: {"seconds": round(best[name], 4), **({"peak_kb": peaks[name]} if memory else {})}
+              for name in STAGES}
+    return {"params": {"resources": resources, "endpoints": endpoints, "fields": fields, "depth": depth,
+                       "jobs": jobs, "mode": mode},
+            "stages": stages, "total_seconds": round(sum(best.values()), 4), "counts": counts}
+
+
+def case_label(params):
+    return f"N{params['resources']}_M{params['endpoints']}_K{params['fields']}_D{params['depth']}" \
+           f"_J{params['jobs']}_{params['mode']}"
+
+
+# ========== 基线对比 ==========
+
+def compare(results, baseline, tolerance):
+    """返回退化描述列表；耗时与内存峰值均按相对容差 + 绝对噪声下限判定"""
+    regressions = []
+    for label, current in results["cases"].items():
+        base = baseline.get("cases", {}).get(label)
+        if base is None:
+            print(f"⚠️ [Bench] 基线中没有 {label}，跳过对比")
+            continue
+        for stage, now in current["stages"].items():
+            old = base["stages"].get(stage)
+            if not old:
+                continue
+            if now["seconds"] > old["seconds"] * (1 + tolerance) and now["seconds"] - old["seconds"] > MIN_TIME_DELTA:
+                regressions.append(f"{label} {stage}: 耗时 {old['seconds']:.3f}s -> {now['seconds']:.3f}s")
+            if "peak_kb" in now and "peak_kb" in old and now["peak_kb"] > old["peak_kb"] * (1 + tolerance) \
+                    and now["peak_kb"] - old["peak_kb"] > MIN_MEMORY_DELTA_KB:
+                regressions.append(f"{label} {stage}: 内存峰值 {old['peak_kb']:.0f}KB -> {now['peak_kb']:.0f}KB")
+    return regressions
+
+
+def print_case(label, result):
+    counts = result["counts"]
+    print(f"📊 [Bench] {label}: {counts['apis']} 接口 / {counts['resources']} 资源组 / "
+          f"{counts['scenarios']} 场景 / {counts['steps']} 步骤，合计 {result['total_seconds']:.3f}s")
+    for stage, m in result["stages"].items():
+        peak = f"  峰值 {m['peak_kb']:>10.1f} KB" if "peak_kb" in m else ""
+        print(f"    {stage:<8} {m['seconds']:>8.4f}s{peak}")
+
+
+def _int_list(text):
+    return [int(x) for x in text.split(',') if x.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="合成接口定义，对 linker / generator 链路逐阶段做基准测试")
+    parser.add_argument("--resources", "-n", type=_int_list, default=[10, 100], help="资源组数量，逗号分隔可扫描多组")
+    parser.add_argument("--endpoints", "-m", type=_int_list, default=[8], help="每个资源组的接口数")
+    parser.add_argument("--fields", "-k", type=_int_list, default=[6], help="请求体字段数")
+    parser.add_argument("--depth", "-d", type=_int_list, default=[1], help="请求体嵌套层数")
+    parser.add_argument("--mode", choices=sorted(generator.TEMPLATES), default="render", help="渲染模板")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="裂变阶段的并行进程数")
+    parser.add_argument("--repeat", type=int, default=3, help="计时重复次数 (取最小值)")
+    parser.add_argument("--no-memory", action="store_true", help="跳过 tracemalloc 内存峰值测量")
+    parser.add_argument("--seed", type=int, default=0, help="合成数据的随机种子")
+    parser.add_argument("--save", help="把结果保存为 JSON 基线")
+    parser.add_argument("--compare", help="与已有 JSON 基线对比，出现退化时返回非零")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的相对退化比例 (默认 0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = {"python": platform.python_version(), "platform": platform.platform(), "cases": {}}
+    for n in args.resources:
+        for m in args.endpoints:
+            for k in args.fields:
+                for d in args.depth:
+                    result = bench_case(n, m, k, d, repeat=args.repeat, jobs=args.jobs, mode=args.mode,
+                                        memory=not args.no_memory, seed=args.seed)
+                    label = case_label(result["params"])
+                    results["cases"][label] = result
+                    print_case(label, result)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"💾 [Bench] 基线已保存: {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ [Bench] 检测到 {len(regressions)} 项退化 (容差 {args.tolerance:.0%}):")
+            for r in regressions:
+                print(f"    - {r}")
+            return 1
+        print(f"✅ [Bench] 与基线 {args.compare} 对比无退化 (容差 {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+增量构建缓存：按资源组记录输入内容哈希，只重建/重渲染发生变化的资源组。
+
+- 裂变键 = 该资源组内每条接口定义的内容哈希 + 裂变相关源码 (LINKER_SOURCES) 哈希 + 场景编排选项 + 跨资源依赖
+- 渲染键 = 该资源组场景内容哈希 + 模板文件哈希 + 渲染参数
+- 产出按资源拆分: scenarios/<资源>.json 与 test_suite_<资源>.py，未变化的文件不会被重写
+"""
+import filecmp
+import hashlib
+import json
+import os
+import re
+from collections.abc import Mapping
+
+CACHE_DIR = ".saap_cache"
+SCENARIO_DIR = "scenarios"
+MANIFEST_VERSION = 1
+# 改动其中任一文件都会让全部资源组的裂变结果失效
+LINKER_SOURCES = ("linker.py", "routes.py", "dag.py", "fingerprint.py")
+
+
+def json_default(obj):
+    """序列化 linker.Step 等只读映射视图：仅在落盘/求哈希时才合成为 dict"""
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def content_hash(*parts):
+    """对任意 JSON 可序列化对象求稳定哈希 (键排序，与字典插入顺序无关)"""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(json.dumps(part, sort_keys=True, ensure_ascii=False, default=json_default).encode('utf-8'))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def safe_name(res_name):
+    return re.sub(r'\W', '_', res_name)
+
+
+def write_if_changed(path, text):
+    """内容不变时不落盘，保持 mtime 不变 (pytest 缓存因此保持热)"""
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == text:
+                return False
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return True
+
+
+def dump_json_if_changed(path, obj, **kwargs):
+    """
+    流式 json.dump 到临时文件，不在内存中拼出整个 JSON 字符串 (与 generator.render_to_file 一致)。
+    内容与已有文件一致时丢弃临时文件 (保持 mtime)，否则原子替换；返回写入的字节数，未落盘时为 0
+    """
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    tmp_file = path + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, ensure_ascii=False, default=json_default, **kwargs)
+    if os.path.exists(path) and filecmp.cmp(tmp_file, path, shallow=False):
+        os.remove(tmp_file)
+        return 0
+    os.replace(tmp_file, path)
+    return os.path.getsize(path)
+
+
+class BuildCache:
+    def __init__(self, cache_dir=CACHE_DIR, scenario_dir=SCENARIO_DIR):
+        self.cache_dir = cache_dir
+        self.scenario_dir = scenario_dir
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+        self.manifest = {"version": MANIFEST_VERSION, "resources": {}}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                if manifest.get("version") == MANIFEST_VERSION:
+                    self.manifest = manifest
+            except (OSError, ValueError) as e:
+                print(f"⚠️ [Cache] 缓存清单损坏，将全量重建: {e}")
+        here = os.path.dirname(os.path.abspath(__file__))
+        self.linker_hash = content_hash(*(file_hash(os.path.join(here, name)) for name in LINKER_SOURCES))
+
+    def entry(self, res_name):
+        return self.manifest["resources"].setdefault(res_name, {})
+
+    def scenarios_path(self, res_name):
+        return os.path.join(self.scenario_dir, f"{safe_name(res_name)}.json")
+
+    # --- 裂变阶段 ---
+    def fission_key(self, api_group, plan=None, deps=None):
+        return content_hash([content_hash(api) for api in api_group], self.linker_hash, plan or {}, deps or {})
+
+    def cached_scenarios(self, res_name, key):
+        entry = self.manifest["resources"].get(res_name, {})
+        path = self.scenarios_path(res_name)
+        if entry.get("fission_key") != key or not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def store_scenarios(self, res_name, key, scenarios):
+        dump_json_if_changed(self.scenarios_path(res_name), scenarios, indent=4)
+        self.entry(res_name)["fission_key"] = key
+
+    # --- 渲染阶段 ---
+    def render_key(self, res_name, scenarios, template_path, **render_args):
+        return content_hash(scenarios, file_hash(template_path), render_args)
+
+    def needs_render(self, res_name, key, output_file):
+        entry = self.manifest["resources"].get(res_name, {})
+        return entry.get("render_key") != key or entry.get("output_file") != output_file \
+            or not os.path.exists(output_file)
+
+    def mark_rendered(self, res_name, key, output_file):
+        entry = self.entry(res_name)
+        entry["render_key"] = key
+        entry["output_file"] = output_file
+
+    # --- 收尾 ---
+    def prune(self, live_resources):
+        """删除已不存在的资源组的产出文件，返回被清理的资源名"""
+        removed = []
+        for res_name in list(self.manifest["resources"]):
+            if res_name in live_resources:
+                continue
+            entry = self.manifest["resources"].pop(res_name)
+            for path in (self.scenarios_path(res_name), entry.get("output_file")):
+                if path and os.path.exists(path):
+                    os.remove(path)
+            removed.append(res_name)
+        return removed
+
+    def save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        write_if_changed(self.manifest_path, json.dumps(self.manifest, indent=2, ensure_ascii=False))
@@ -0,0 +1,184 @@
+"""
+跨资源依赖图：资源组之间的 生产者 -> 提取变量 -> 消费者 关系。
+
+依赖来源:
+- 路径参数: /chats/:chat_id/members 中集合之前的 :chat_id 依赖 chats 的生产者
+- 请求体字段: chat_id / parent_chat_id / target_chat_id 等 ID 字段 (extract_dependencies 识别) 指向其它资源组
+
+结果:
+- 被依赖的资源组额外产出一个 provider 场景 (只生产一次、全部下游共用、最后删除一次)
+- 下游场景的对应字段绑定为 $auto_<上游单数>_id，并声明 requires
+- 拓扑分层: 同一层的资源组互不依赖，可以并行执行
+- 环依赖 / 找不到上游 / 上游没有生产者 的字段输出诊断信息，保留原值
+"""
+from routes import classify_group, group_collection_index, parse_route, singular
+
+ID_SUFFIXES = ("_ids", "_id", "id")
+REF_PREFIXES = ("parent_", "target_", "source_", "root_")
+SELF_REFS = ("parent", "target", "source", "root", "")
+
+
+# --- 辅助函数：深度查找 Body/Params 中所有潜在的 ID 依赖 ---
+def extract_dependencies(data):
+    """递归查找 Body 或 Params 中所有可能代表 ID 的字段名。"""
+    dependencies = set()
+    if isinstance(data, dict):
+        for k, v in data.items():
+            key_lower = k.lower()
+            if key_lower.endswith('_id') or 'parent' in key_lower or 'target' in key_lower or 'uuid' in key_lower:
+                if not isinstance(v, str) or (
+                        "GENERATE_" not in v and "reuse_" not in v and "oc_" not in v and "raw_data" not in v):
+                    dependencies.add(k)
+            if isinstance(v, (dict, list)):
+                dependencies.update(extract_dependencies(v))
+    elif isinstance(data, list):
+        for item in data:
+            dependencies.update(extract_dependencies(item))
+    return dependencies
+
+
+def id_var(res_name):
+    """与 linker 中生产者提取的变量名一致"""
+    return f"auto_{singular(res_name)}_id"
+
+
+def provider_name(res_name):
+    return f"provider_{res_name}"
+
+
+def field_base(field):
+    """parent_chat_id -> chat；uuid 等非资源字段返回 None"""
+    base = field.lower()
+    if 'uuid' in base:
+        return None
+    for suffix in ID_SUFFIXES:
+        if base.endswith(suffix):
+            base = base[:-len(suffix)].rstrip('_')
+            break
+    for prefix in REF_PREFIXES:
+        if base.startswith(prefix):
+            base = base[len(prefix):]
+            break
+    return base
+
+
+class DependencyGraph:
+    def __init__(self, resource_groups):
+        self.order = list(resource_groups)
+        self.lookup = {}
+        for res_name in self.order:
+            for alias in (res_name, singular(res_name)):
+                self.lookup.setdefault(alias, res_name)
+        self.has_producer = {
+            res_name: any(role == "producer" for _, role in classify_group(group))
+            for res_name, group in resource_groups.items()
+        }
+        self.upstream = {res_name: {} for res_name in self.order}   # 下游 -> {上游: [原因]}
+        self.bindings = {res_name: {} for res_name in self.order}   # 下游 -> {请求体字段: 变量名}
+        self.diagnostics = []
+        self.cycles = []
+        self.levels = []
+        for res_name, group in resource_groups.items():
+            self._scan(res_name, group)
+        self._layer()
+
+    # --- 建图 ---
+    def _resolve(self, base):
+        return self.lookup.get(base) or self.lookup.get(base + 's') or self.lookup.get(base + 'es')
+
+    def _link(self, res_name, upstream, reason):
+        if not self.has_producer[upstream]:
+            self._diagnose("unresolved", f"{res_name}: {reason} 指向 {upstream}，但 {upstream} 没有生产者接口")
+            return False
+        self.upstream[res_name].setdefault(upstream, []).append(reason)
+        return True
+
+    def _scan(self, res_name, group):
+        c = group_collection_index(group)
+        for api in group:
+            route = parse_route(api['url'])
+            for i in route.param_positions:
+                if i > c:
+                    continue
+                parent = self._resolve(route.name_at(i - 1))
+                if parent is None:
+                    self._diagnose("unresolved", f"{res_name}: 路径参数 {route.segments[i]} 找不到对应的资源组")
+                elif parent != res_name:
+                    self._link(res_name, parent, f"路径参数 {route.segments[i]}")
+
+            for field in sorted(extract_dependencies(api.get('body') or {})):
+                base = field_base(field)
+                if base is None or base in SELF_REFS:
+                    continue
+                upstream = self._resolve(base)
+                if upstream is None:
+                    self._diagnose("unresolved", f"{res_name}: 字段 {field} 找不到对应的资源组，保留原值")
+                elif upstream != res_name and self._link(res_name, upstream, f"字段 {field}"):
+                    # 只绑定顶层字段；嵌套字段只参与排序
+                    if field in (api.get('body') or {}):
+                        self.bindings[res_name][field] = id_var(upstream)
+
+    def _diagnose(self, kind, message):
+        entry = {"kind": kind, "message": message}
+        if entry not in self.diagnostics:
+            self.diagnostics.append(entry)
+
+    # --- 分层 ---
+    def _layer(self):
+        """Kahn 拓扑分层 (层内保持资源首次出现的顺序)；剩余的环依赖断开后放到最后一层"""
+        pending = {res: set(ups) for res, ups in self.upstream.items()}
+        while pending:
+            ready = [res for res in self.order if res in pending and not pending[res]]
+            if not ready:
+                cycle = self._find_cycle(pending)
+                self.cycles.append(cycle)
+                self._diagnose("cycle", "环依赖: " + " -> ".join(cycle) + "，已断开，相关字段保留原值")
+                for res in cycle[:-1]:
+                    for up in [u for u in pending[res] if u in cycle]:
+                        pending[res].discard(up)
+                        self.upstream[res].pop(up, None)
+                        self.bindings[res] = {f: v for f, v in self.bindings[res].items() if v != id_var(up)}
+                continue
+            self.levels.append(ready)
+            for res in ready:
+                del pending[res]
+            for ups in pending.values():
+                ups.difference_update(ready)
+
+    def _find_cycle(self, pending):
+        start = next(res for res in self.order if res in pending)
+        path, seen = [start], {start: 0}
+        while True:
+            nxt = next(up for up in self.order if up in pending[path[-1]])
+            if nxt in seen:
+                return path[seen[nxt]:] + [nxt]
+            seen[nxt] = len(path)
+            path.append(nxt)
+
+    # --- 查询 ---
+    @property
+    def providers(self):
+        """被至少一个下游依赖的资源组"""
+        return {up for ups in self.upstream.values() for up in ups}
+
+    def level_of(self, res_name):
+        return next(i for i, level in enumerate(self.levels) if res_name in level)
+
+    def deps_for(self, res_name):
+        """传给 linker.build_final_suite 的依赖信息 (同时参与增量缓存键)"""
+        return {
+            "requires": {id_var(up): provider_name(up) for up in self.upstream[res_name]},
+            "bindings": dict(self.bindings[res_name]),
+            "provide": res_name in self.providers,
+        }
+
+    def report(self):
+        layers = "，".join(f"L{i} {level}" for i, level in enumerate(self.levels))
+        lines = [f"🕸️ [DAG] {len(self.order)} 个资源组，{len(self.levels)} 层: {layers}"]
+        for res_name in self.order:
+            for up, reasons in self.upstream[res_name].items():
+                lines.append(f"    {up} -> {res_name} ({'、'.join(dict.fromkeys(reasons))})")
+        for d in self.diagnostics:
+            mark = "🔁" if d["kind"] == "cycle" else "⚠️"
+            lines.append(f"    {mark} {d['message']}")
+        return "\n".join(lines)
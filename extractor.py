@@ -0,0 +1,122 @@
+"""
+响应提取引擎：extract 路径编译为访问对象 (按路径字符串缓存，每个进程只编译一次)，
+响应体只解码一次 (可选 orjson 加速)。
+
+路径语法:
+- data.message_id                     逐层取字典键
+- data.items[0].id / data.items.0.id  列表下标 (支持负数)
+- data.items[*].id / data.items.*.id  通配: 对列表元素 (或字典的值) 逐个继续取，结果为列表
+- data.page_token|""                  取不到时的默认值 (JSON 字面量，非法 JSON 按原样字符串处理)
+取不到且没有默认值时返回 MISSING。
+"""
+import functools
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # 可选依赖：没有时使用标准库
+    orjson = None
+
+MISSING = object()
+
+_KEY = r"[^.\[\]|]+"
+_BRACKET = r"\[(?:-?\d+|\*)\]"
+_PATH = re.compile(rf"(?:{_KEY}|{_BRACKET})(?:\.{_KEY}|\.?{_BRACKET})*")
+_TOKEN = re.compile(r"\[(-?\d+|\*)\]|([^.\[\]|]+)")
+
+
+def loads(data):
+    """bytes / str -> Python 对象；非法 JSON 抛 ValueError"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _literal(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _index(value):
+    return int(value) if value.lstrip('-').isdigit() else None
+
+
+class ExtractPath:
+    """编译后的提取路径：path(payload) -> 值 / 列表 (含通配) / 默认值 / MISSING"""
+
+    def __init__(self, path):
+        text, sep, default = path.partition('|')
+        text = text.strip()
+        if not _PATH.fullmatch(text):
+            raise ValueError(f"非法的提取路径: {path!r}")
+        self.path = path
+        self.segments = []
+        for bracket, key in _TOKEN.findall(text):
+            token = bracket or key
+            if token == '*':
+                self.segments.append(("*", None))
+            elif bracket:
+                self.segments.append(("index", int(bracket)))
+            else:
+                self.segments.append(("key", key))
+        self.has_default = bool(sep)
+        self.default = _literal(default.strip()) if sep else MISSING
+        self.many = any(kind == "*" for kind, _ in self.segments)
+
+    def __repr__(self):
+        return f"ExtractPath({self.path!r})"
+
+    def __call__(self, payload):
+        values = [payload]
+        for kind, arg in self.segments:
+            found = []
+            for value in values:
+                if kind == "*":
+                    if isinstance(value, dict):
+                        found.extend(value.values())
+                    elif isinstance(value, list):
+                        found.extend(value)
+                    continue
+                value = self._step(value, kind, arg)
+                if value is not MISSING:
+                    found.append(value)
+            values = found
+        if self.many:
+            return values if values or not self.has_default else self.default
+        return values[0] if values else self.default
+
+    @staticmethod
+    def _step(value, kind, arg):
+        if kind == "key":
+            if isinstance(value, dict):
+                return value.get(arg, MISSING)
+            arg = _index(arg)
+            if arg is None or not isinstance(value, list):
+                return MISSING
+        elif isinstance(value, dict):
+            return value.get(str(arg), MISSING)
+        if isinstance(value, list) and -len(value) <= arg < len(value):
+            return value[arg]
+        return MISSING
+
+
+@functools.lru_cache(maxsize=None)
+def compile_path(path):
+    return ExtractPath(path)
+
+
+def validate_extracts(scenarios):
+    """生成阶段预编译全部 extract 路径，非法路径在生成时报错而不是运行时静默取空"""
+    for s in scenarios:
+        steps = list(s.get("steps", [])) + list(s.get("setup", [])) + list(s.get("teardown", []))
+        for case in s.get("cases", []):
+            steps.extend(case["steps"])
+        for step in steps:
+            for var, path in (step.get("extract") or {}).items():
+                try:
+                    compile_path(path)
+                except ValueError as e:
+                    raise ValueError(f"{s['scenario_name']} 的变量 ${var}: {e}") from None
@@ -0,0 +1,104 @@
+"""
+场景规范化指纹：把场景实际发出的请求序列归一后求哈希，用于去重与生成无冲突的测试名。
+
+规范化内容 (与运行时行为一一对应):
+- 每个 Step: method、URL 模板 ($var 绑定后的路径)、headers、params、body、extract、预期结果 (正向 / 逆向)
+- 运行时才生成的占位符 (raw_data:xxx / Auto_xxx) 按字段名生成，归一为 <generated>
+- 描述文字只影响日志，不参与指纹；逆向标记 (❌ / iso) 通过预期结果体现
+- 批次场景: 共享前置 / 后置 + 逐个用例的 Step 序列；provider 按前置 / 后置计算
+
+去重规则: 同一资源组内指纹相同的场景只保留第一个；批次内指纹相同的用例只保留第一个。
+命名规则: 去重后仍然重名的场景 (如多个孤立接口的 isolated_robust) / 批次用例统一追加 _<指纹前 8 位>。
+"""
+from build_cache import content_hash
+
+GENERATED = "<generated>"
+HASH_LEN = 8
+
+
+def canonical_value(value):
+    if isinstance(value, str):
+        return GENERATED if ("raw_data" in value or "Auto_" in value) else value
+    if isinstance(value, dict):
+        return {k: canonical_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [canonical_value(v) for v in value]
+    return value
+
+
+def expected_fail(step, description, scenario_name):
+    """与 runtime.is_expected_fail 的判定一致"""
+    return "❌" in step.get("description", "") or "❌" in description or "iso" in scenario_name
+
+
+def canonical_step(step, description="", scenario_name=""):
+    return {
+        "method": step["method"],
+        "url": step["url"],
+        "headers": dict(step.get("headers") or {}),
+        "params": canonical_value(dict(step.get("params") or {})),
+        "body": canonical_value(dict(step.get("body") or {})),
+        "extract": dict(step.get("extract") or {}),
+        "expect": "fail" if expected_fail(step, description, scenario_name) else "ok",
+    }
+
+
+def steps_fingerprint(steps, description="", scenario_name=""):
+    return content_hash([canonical_step(s, description, scenario_name) for s in steps])
+
+
+def case_fingerprint(case):
+    return steps_fingerprint(case["steps"], case.get("description", ""), case["case_name"])
+
+
+def scenario_fingerprint(scenario):
+    """场景的规范化指纹；批次场景包含前置 / 后置与全部用例"""
+    description, name = scenario.get("description", ""), scenario["scenario_name"]
+    if "steps" in scenario:
+        return steps_fingerprint(scenario["steps"], description, name)
+    return content_hash(
+        steps_fingerprint(scenario.get("setup", []), description, name),
+        [case_fingerprint(c) for c in scenario.get("cases", [])],
+        steps_fingerprint(scenario.get("teardown", []), description, name),
+        scenario.get("provides"),
+    )
+
+
+def _unique_names(items, name_key):
+    """items 为 [(指纹, 字典)]；重名的全部追加指纹后缀，不重名的保持原名"""
+    counts = {}
+    for _, item in items:
+        counts[item[name_key]] = counts.get(item[name_key], 0) + 1
+    return [dict(item, **{name_key: f"{item[name_key]}_{fp[:HASH_LEN]}"}) if counts[item[name_key]] > 1 else item
+            for fp, item in items]
+
+
+def dedupe(scenarios):
+    """
+    去掉指纹重复的场景 / 批次用例，并给仍然重名的场景追加指纹后缀。
+    返回 (新的场景列表, 去掉的场景 + 用例数)；输入的场景字典不会被修改。
+    """
+    seen = set()
+    unique = []
+    removed = 0
+    for s in scenarios:
+        if "cases" in s:
+            cases, case_seen = [], set()
+            for c in s["cases"]:
+                fp = case_fingerprint(c)
+                if fp in case_seen:
+                    removed += 1
+                    continue
+                case_seen.add(fp)
+                cases.append((fp, c))
+            cases = _unique_names(cases, "case_name")
+            if len(cases) != len(s["cases"]) or any(a is not b for a, b in zip(cases, s["cases"])):
+                s = dict(s, cases=cases)
+        fp = scenario_fingerprint(s)
+        if fp in seen:
+            removed += 1
+            continue
+        seen.add(fp)
+        unique.append((fp, s))
+
+    return _unique_names(unique, "scenario_name"), removed
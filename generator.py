@@ -1,15 +1,47 @@
+import argparse
+import filecmp
+import functools
 import json
-from jinja2 import Template
+import os
+import metrics
+import shard
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from build_cache import CACHE_DIR, BuildCache, safe_name, write_if_changed
+from extractor import validate_extracts
 from linker import auto_link_process
 
+# --- 生成脚本的 HTTP 连接池配置 (透传给 runtime.configure_http) ---
+HTTP_CONFIG = {
+    "pool_connections": 10,
+    "pool_maxsize": 20,
+    "pool_block": False,
+    "max_retries": 2,
+    "backoff_factor": 0.3,
+    "status_forcelist": [502, 503, 504],
+}
+
+# --- 按资源的节流策略 (透传给 runtime.configure_throttle)，未列出的资源使用 default ---
+RATE_LIMIT_CONFIG = {
+    "default": {"rate": 50.0, "burst": 10, "max_attempts": 5, "base_delay": 0.2, "max_delay": 8.0, "deadline": 30.0},
+    # "messages": {"rate": 5.0, "burst": 5},
+}
+
+# --- 生成脚本的请求延迟采集 (JSON Lines，交给 latency_report.py 汇总)；置空则关闭，运行时可用 SAAP_LATENCY_LOG 覆盖 ---
+LATENCY_LOG = "latency.jsonl"
+
 
 def analyze_and_report(scenarios):
     print("\n" + "=" * 60)
     print("📊 [智能自动化平台 - 深度智能版评估报告]")
     print("=" * 60)
 
-    count = len(scenarios)
-    scenario_names = [s['scenario_name'] for s in scenarios]
+    # 批次场景按其中的用例逐个计数；provider 只是上游共享资源，不计为测试场景
+    scenario_names = []
+    for s in scenarios:
+        if s.get('scenario_type') == 'provider':
+            continue
+        scenario_names.extend([c['case_name'] for c in s['cases']] if 'cases' in s else [s['scenario_name']])
+    count = len(scenario_names)
     print(f"检测到已裂变出 {count} 个通用测试场景。")
 
     score = 0
@@ -34,24 +66,186 @@ def analyze_and_report(scenarios):
     print("=" * 60 + "\n")
 
 
-def run_platform():
-    generated_data = auto_link_process()
+# --- 输出模式: render=逐场景渲染代码; runtime=参数化解释 scenarios.json ---
+TEMPLATES = {
+    "render": "template_scenario.j2",
+    "runtime": "template_runtime.j2",
+}
+PROVIDERS_TEMPLATE = "template_providers.j2"
+PROVIDERS_MODULE = "suite_providers"    # 增量模式下全部上游 provider 所在的 pytest 插件模块
+TEMPLATE_DIR = os.path.dirname(os.path.abspath(__file__))
+JINJA_CACHE_DIR = os.path.join(CACHE_DIR, "jinja")
+RENDER_BUFFER_SIZE = 64   # stream 每攒够多少个输出块写一次文件
+
+
+@functools.lru_cache(maxsize=None)
+def get_environment(cache_dir=JINJA_CACHE_DIR):
+    """进程内只构建一次 Environment；编译后的模板字节码落盘缓存，重复运行跳过模板编译"""
+    os.makedirs(cache_dir, exist_ok=True)
+    return Environment(loader=FileSystemLoader(TEMPLATE_DIR),
+                       bytecode_cache=FileSystemBytecodeCache(cache_dir), auto_reload=False)
+
+
+def render_to_file(template, output_file, **context):
+    """
+    流式渲染：模板按块产出并逐块写入临时文件，内存峰值与生成脚本总大小无关。
+    内容与已有文件一致时丢弃临时文件 (保持 mtime)，否则原子替换，返回是否落盘。
+    """
+    tmp_file = output_file + '.tmp'
+    writer = metrics.Stopwatch()
+    with metrics.span("render", file=output_file):
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            stream = template.stream(**context)
+            stream.enable_buffering(RENDER_BUFFER_SIZE)
+            for chunk in stream:
+                with writer:
+                    f.write(chunk)
+        metrics.add_span("write", writer.seconds, file=output_file)
+    if os.path.exists(output_file) and filecmp.cmp(tmp_file, output_file, shallow=False):
+        os.remove(tmp_file)
+        return False
+    os.replace(tmp_file, output_file)
+    metrics.incr("bytes_written", os.path.getsize(output_file))
+    return True
+
+
+def render_args(scenarios_file, providers_module=None):
+    """除场景列表外的全部模板参数 (同时参与增量模式的渲染键)"""
+    return dict(http_config=HTTP_CONFIG, rate_limits=RATE_LIMIT_CONFIG, latency_log=LATENCY_LOG,
+                scenarios_file=scenarios_file, providers_module=providers_module)
+
+
+def render_providers(providers, mode, cache):
+    """
+    全部上游 provider 渲染为一个 pytest 插件模块，各 test_suite_<资源>.py 通过 pytest_plugins 加载：
+    插件只注册一次，一次会话中每个上游只生产 / 删除一次。没有 provider 时删除旧模块，返回模块名或 None
+    """
+    output_file = f"{PROVIDERS_MODULE}.py"
+    if not providers:
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        return None
+    provider_files = dict.fromkeys(cache.scenarios_path(p['resource']).replace(os.sep, '/') for p in providers)
+    render_to_file(get_environment().get_template(PROVIDERS_TEMPLATE), output_file,
+                   mode=mode, scenarios=providers, provider_files=list(provider_files))
+    return PROVIDERS_MODULE
+
+
+def render_single(template, generated_data, mode):
+    output_file = 'test_final_suite.py'
+    render_to_file(template, output_file, scenarios=generated_data, **render_args('scenarios.json'))
+
+    print(f"✅ 测试脚本已生成: {output_file} (模式: {mode})")
+
+
+def render_incremental(template, generated_data, mode, cache):
+    """按资源组拆分产出 test_suite_<资源>.py，只重渲染渲染键发生变化的资源组；上游 provider 集中在插件模块中"""
+    groups = {}
+    for s in generated_data:
+        groups.setdefault(s['resource'], []).append(s)
+    providers_module = render_providers(
+        [s for s in generated_data if s.get('scenario_type') == 'provider'], mode, cache)
+
+    rendered, skipped = [], []
+    for res_name, scenarios in groups.items():
+        output_file = f"test_suite_{safe_name(res_name)}.py"
+        args = render_args(cache.scenarios_path(res_name).replace(os.sep, '/'), providers_module)
+        if mode == "render":
+            # provider fixture 只在插件模块中定义，本文件的测试按名称引用
+            scenarios = [s for s in scenarios if s.get('scenario_type') != 'provider']
+        key = cache.render_key(res_name, scenarios, os.path.join(TEMPLATE_DIR, TEMPLATES[mode]), mode=mode, **args)
+        if not cache.needs_render(res_name, key, output_file):
+            skipped.append(output_file)
+            metrics.incr("render_skipped")
+            continue
+        render_to_file(template, output_file, scenarios=scenarios, **args)
+        cache.mark_rendered(res_name, key, output_file)
+        rendered.append(output_file)
+    cache.save()
+
+    print(f"✅ 测试脚本已增量生成 (模式: {mode}): 重新渲染 {rendered or '无'}，未变化 {len(skipped)} 个")
+
+
+def write_shards(generated_data, mode, incremental, sharding):
+    """按历史耗时与资源组亲和关系把测试分到 sharding["workers"] 个分片，写出 shards.json"""
+    if incremental:
+        def test_file_for(res_name):
+            return f"test_suite_{safe_name(res_name)}.py"
+    else:
+        def test_file_for(res_name):
+            return 'test_final_suite.py'
+    history = shard.load_history([sharding.get("history") or LATENCY_LOG])
+    shard_plan = shard.build_plan(generated_data, sharding["workers"], mode, test_file_for, history,
+                                  sharding.get("affinity") or "resource")
+    write_if_changed(shard.SHARDS_FILE, json.dumps(shard_plan, indent=2, ensure_ascii=False))
+    print(shard.describe(shard_plan))
+    print(f"✅ 分片信息已写入: {shard.SHARDS_FILE} (python shard.py --shard i/N 取出第 i 个分片)")
+
+
+def run_platform(mode="render", incremental=False, jobs=1, spec_path='data.json',
+                 metrics_path=None, profile=None, profile_output=None, plan=None, sharding=None):
+    metrics.METRICS.reset()
+    with metrics.profiled(profile, profile_output):
+        with metrics.span("total", mode=mode, incremental=incremental, jobs=jobs):
+            generate(mode, incremental, jobs, spec_path, plan, sharding)
+    if metrics_path:
+        metrics.METRICS.dump(metrics_path)
+        print(f"📈 生成链路指标已写入: {metrics_path}")
+
+
+def generate(mode, incremental, jobs, spec_path, plan=None, sharding=None):
+    cache = BuildCache() if incremental else None
+    generated_data = auto_link_process(cache=cache, jobs=jobs, spec_path=spec_path, plan=plan)
     if not generated_data: return
     analyze_and_report(generated_data)
     try:
-        with open('template_scenario.j2', 'r', encoding='utf-8') as f:
-            template_content = f.read()
-        template = Template(template_content)
-        generated_code = template.render(scenarios=generated_data)
-
-        output_file = 'test_final_suite.py'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(generated_code)
-
-        print(f"✅ 测试脚本已生成: {output_file}")
+        # extract 路径在生成阶段预编译，语法错误在这里报出
+        validate_extracts(generated_data)
+        template = get_environment().get_template(TEMPLATES[mode])
+        if incremental:
+            render_incremental(template, generated_data, mode, cache)
+        else:
+            render_single(template, generated_data, mode)
     except Exception as e:
         print(f"❌ 生成代码失败: {e}")
+        return
+    if sharding and sharding.get("workers"):
+        with metrics.span("shard", workers=sharding["workers"]):
+            write_shards(generated_data, mode, incremental, sharding)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="智能接口自动化测试平台 - 生成测试脚本")
+    parser.add_argument("--spec", default="data.json",
+                        help="接口定义文件: JSON 数组 / JSON Lines (.jsonl) / OpenAPI 3 / Swagger 2 (JSON)")
+    parser.add_argument("--mode", choices=sorted(TEMPLATES), default="render",
+                        help="render: 逐场景渲染成独立函数; runtime: 单一执行器参数化解释 scenarios.json")
+    parser.add_argument("--incremental", action="store_true",
+                        help="增量模式: 按资源组拆分产出，只重建/重渲染输入发生变化的资源组")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="场景裂变的并行进程数 (按资源组分发，产出与串行一致)")
+    parser.add_argument("--batch-mutations", action="store_true",
+                        help="同一消费者接口的字段变异共享一次前置生产 / 后置删除 (每个变异仍单独上报)")
+    parser.add_argument("--shared-fixture", action="store_true",
+                        help="每个资源组只生产一次共享资源，各只读接口的读取用例及其变异 (及 --batch-mutations 可批量的变异) 共用该资源")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="把各阶段耗时 (load/cluster/fission/dump/render/write) 与计数器导出为 JSON")
+    parser.add_argument("--profile", choices=metrics.PROFILERS,
+                        help="开启 profiler: cprofile 统计函数耗时 / tracemalloc 统计内存分配")
+    parser.add_argument("--profile-output", metavar="PATH",
+                        help="profiler 原始数据另存路径 (cProfile .prof / tracemalloc 快照)")
+    parser.add_argument("--shards", type=int, metavar="N",
+                        help="按预期耗时把测试分到 N 个分片，写出 shards.json (配合 shard.py --shard i/N)")
+    parser.add_argument("--history", metavar="PATH",
+                        help=f"用于估计耗时的历史延迟日志 (默认 {LATENCY_LOG}，不存在时按 Step 数估计)")
+    parser.add_argument("--affinity", choices=shard.AFFINITIES, default="resource",
+                        help="分片亲和: resource 同一资源组的场景在同一分片 / scenario 按场景拆分")
+    args = parser.parse_args(argv)
+    run_platform(mode=args.mode, incremental=args.incremental, jobs=args.jobs, spec_path=args.spec,
+                 metrics_path=args.metrics, profile=args.profile, profile_output=args.profile_output,
+                 plan={"batch_mutations": args.batch_mutations, "shared_fixture": args.shared_fixture},
+                 sharding={"workers": args.shards, "history": args.history, "affinity": args.affinity})
 
 
 if __name__ == '__main__':
-    run_platform()
\ No newline at end of file
+    main()
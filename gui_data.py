@@ -1,48 +1,13 @@
 import re
 import json
 from typing import List, Dict, Any
-import tkinter as tk
-from tkinter import scrolledtext, filedialog, messagebox
+from routes import parse_route
 
+# GUI 依赖在 launch_gui() 中懒加载：解析 / 构造函数可在无图形环境下使用 (md_import.py、mock_server.py)
+tk = scrolledtext = filedialog = messagebox = None
 
-# ========== Markdown 解析相关函数 ==========
-
-def extract_title_and_desc(md: str):
-    """从 Markdown 顶部提取标题和简介（# 标题 + 段落）"""
-    lines = md.splitlines()
-    title = ""
-    desc_lines = []
-    in_desc = False
-    for i, line in enumerate(lines):
-        if line.startswith("# "):
-            title = line[2:].strip()
-            in_desc = True
-            continue
-        if in_desc:
-            if line.startswith("## "):
-                break
-            if line.strip() == "":
-                continue
-            desc_lines.append(line.strip())
-    desc = " ".join(desc_lines)
-    return title, desc
-
-
-def extract_basic_info(md: str):
-    """提取 HTTP URL 和 HTTP Method 两项基础信息"""
-    url = None
-    method = None
-
-    url_match = re.search(r"HTTP URL\s*\|\s*(.+)", md)
-    method_match = re.search(r"HTTP Method\s*\|\s*(.+)", md)
-
-    if url_match:
-        url = url_match.group(1).strip()
-    if method_match:
-        method = method_match.group(1).strip().upper()
-
-    return url, method
 
+# ========== Markdown 解析相关函数 ==========
 
 def parse_table_block(lines: List[str], start_idx: int) -> (List[Dict[str, Any]], int):
     """从 Markdown 某一行开始，解析一个表格块为 rows 列表"""
@@ -80,32 +45,6 @@ def parse_table_block(lines: List[str], start_idx: int) -> (List[Dict[str, Any]]
     return rows, i
 
 
-def extract_section_table(md: str, section_title: str) -> List[Dict[str, Any]]:
-    """根据标题（### 请求头 / 查询参数 / 请求体）提取对应表格"""
-    lines = md.splitlines()
-    rows: List[Dict[str, Any]] = []
-    for idx, line in enumerate(lines):
-        if line.strip().startswith(f"### {section_title}"):
-            j = idx + 1
-            # 找到第一行带 | 的表头
-            while j < len(lines) and "|" not in lines[j]:
-                j += 1
-            if j >= len(lines):
-                break
-            rows, _ = parse_table_block(lines, j)
-            break
-    return rows
-
-
-def extract_code_block_after(md: str, marker: str, lang: str = "json") -> str:
-    """提取某个 marker（例如 ### 请求体示例）后第一段 ```json``` 代码块"""
-    pattern = rf"{marker}[\s\S]*?```{lang}\s*([\s\S]*?)```"
-    m = re.search(pattern, md)
-    if not m:
-        return ""
-    return m.group(1).strip()
-
-
 def safe_parse_json(text: str):
     if not text:
         return None
@@ -115,33 +54,133 @@ def safe_parse_json(text: str):
         return None
 
 
-def build_api_meta_from_md(md: str) -> Dict[str, Any]:
-    """综合解析 Markdown，形成统一的 api_meta 结构"""
-    title, desc = extract_title_and_desc(md)
-    url, method = extract_basic_info(md)
+# 单遍扫描识别的参数表 / 示例代码块: 结果键 -> 章节标题
+SECTION_TABLES = (("headers_table", "请求头"), ("query_params_table", "查询参数"), ("body_params_table", "请求体"))
+CODE_BLOCKS = (("request_body_example_raw", "### 请求体示例"), ("response_example_raw", "### 响应体示例"))
+_SCAN_KEYS = 3 + len(SECTION_TABLES) + len(CODE_BLOCKS)
+_BASIC_LINES = (("url", re.compile(r"HTTP URL\s*\|\s*(.*)")), ("method", re.compile(r"HTTP Method\s*\|\s*(.*)")))
+
+
+def scan_markdown(md: str, lang: str = "json") -> Dict[str, Any]:
+    """
+    单遍扫描：逐行识别标题 / 简介、HTTP URL / Method、三张参数表与两段示例代码块。
+    每一项都只取第一处；示例代码块取 marker 之后的第一段 ```json```，代码块内出现的 marker 不计。
+    """
+    lines = md.splitlines()
+    fence = f"```{lang}"
+    result: Dict[str, Any] = {"name": "", "url": None, "method": None}
+    desc_lines: List[str] = []
+    desc_state = "before"               # before -> in -> done (遇到第一个 # 标题后的 ## 结束)
+    basic_waiting: List[str] = []       # "HTTP URL |" 之后为空，取下一个非空行
+    table_waiting: List[str] = []       # 已遇到章节标题、等待表头行的结果键
+    block_waiting: List[str] = []       # 已遇到 marker、等待 ```json 的结果键
+    capture = None                      # (结果键列表, 已收集的代码行)
+
+    for idx, line in enumerate(lines):
+        # 代码块内的普通行只需收集 (其它状态都不在等待时)
+        if capture is not None and desc_state == "done" and not basic_waiting and not table_waiting \
+                and "`" not in line and "#" not in line and "HTTP " not in line:
+            capture[1].append(line)
+            continue
+        stripped = line.strip()
+
+        # --- 标题与简介 ---
+        if desc_state != "done":
+            if line.startswith("# "):
+                result["name"] = line[2:].strip()
+                desc_state = "in"
+            elif desc_state == "in":
+                if line.startswith("## "):
+                    desc_state = "done"
+                elif stripped:
+                    desc_lines.append(stripped)
+
+        # --- HTTP URL / Method (各取第一处) ---
+        if basic_waiting and stripped:
+            for key in basic_waiting:
+                result[key] = stripped
+            basic_waiting = []
+        if "HTTP " in line:
+            for key, pattern in _BASIC_LINES:
+                if result[key] is not None or key in basic_waiting:
+                    continue
+                m = pattern.search(line)
+                if m:
+                    value = m.group(1).strip()
+                    if value:
+                        result[key] = value
+                    else:
+                        basic_waiting.append(key)
+
+        # --- 参数表: 章节标题之后的第一行带 | 的内容作为表头 ---
+        if table_waiting and "|" in line:
+            rows, _ = parse_table_block(lines, idx)
+            for key in table_waiting:
+                result[key] = rows
+            table_waiting = []
+        if stripped.startswith("### "):
+            for key, title in SECTION_TABLES:
+                if key not in result and key not in table_waiting and stripped.startswith(title, 4):
+                    table_waiting.append(key)
+
+        # --- 示例代码块: marker 之后的第一段 ```json ``` ---
+        rest = line
+        in_block = capture is not None
+        if in_block:
+            if "```" in line:
+                keys, parts = capture
+                parts.append(line[:line.index("```")])
+                for key in keys:
+                    result[key] = "\n".join(parts).strip()
+                capture = None
+            else:
+                capture[1].append(line)
+            rest = ""
+        # 代码块内 (含其结束行) 的 marker 只是示例内容，不重新等待；已取到的键也不再等待
+        if "### " in line and not in_block:
+            for key, marker in CODE_BLOCKS:
+                if key not in result and key not in block_waiting and marker in line:
+                    block_waiting.append(key)
+                    rest = line[line.index(marker) + len(marker):]
+        if block_waiting and fence in rest:
+            body = rest[rest.index(fence) + len(fence):]
+            if "```" in body:
+                for key in block_waiting:
+                    result[key] = body[:body.index("```")].strip()
+            else:
+                capture = (block_waiting, [body])
+            block_waiting = []
 
-    headers_table = extract_section_table(md, "请求头")
-    query_table = extract_section_table(md, "查询参数")
-    body_table = extract_section_table(md, "请求体")
+        # 各项都只取第一处：全部找到后剩余内容 (错误码表等) 不再扫描
+        if desc_state == "done" and capture is None and len(result) == _SCAN_KEYS and \
+                result["url"] is not None and result["method"] is not None:
+            break
 
-    req_body_example_text = extract_code_block_after(md, r"### 请求体示例", "json")
-    resp_example_text = extract_code_block_after(md, r"### 响应体示例", "json")
+    if result["method"]:
+        result["method"] = result["method"].upper()
+    result["description"] = " ".join(desc_lines)
+    for key, _ in SECTION_TABLES:
+        result.setdefault(key, [])
+    for key, _ in CODE_BLOCKS:
+        result.setdefault(key, "")
+    return result
 
-    req_body_example = safe_parse_json(req_body_example_text)
-    resp_example = safe_parse_json(resp_example_text)
 
+def build_api_meta_from_md(md: str) -> Dict[str, Any]:
+    """综合解析 Markdown (单遍扫描)，形成统一的 api_meta 结构"""
+    scanned = scan_markdown(md)
     api_meta = {
-        "name": title,
-        "description": desc,
-        "method": method,
-        "url": url,
-        "headers_table": headers_table,
-        "query_params_table": query_table,
-        "body_params_table": body_table,
-        "request_body_example_raw": req_body_example_text,
-        "request_body_example_json": req_body_example,
-        "response_example_raw": resp_example_text,
-        "response_example_json": resp_example,
+        "name": scanned["name"],
+        "description": scanned["description"],
+        "method": scanned["method"],
+        "url": scanned["url"],
+        "headers_table": scanned["headers_table"],
+        "query_params_table": scanned["query_params_table"],
+        "body_params_table": scanned["body_params_table"],
+        "request_body_example_raw": scanned["request_body_example_raw"],
+        "request_body_example_json": safe_parse_json(scanned["request_body_example_raw"]),
+        "response_example_raw": scanned["response_example_raw"],
+        "response_example_json": safe_parse_json(scanned["response_example_raw"]),
     }
     return api_meta
 
@@ -155,14 +194,8 @@ def guess_resource_name(url: str) -> str:
     """
     if not url:
         return "api"
-    clean = url.replace("https://", "").replace("http://", "")
-    parts = clean.split("/")
-    # 查找 v1 / v2 后面的那一段
-    for i, p in enumerate(parts):
-        if re.match(r"v\d+", p):
-            if i + 1 < len(parts):
-                return parts[i + 1] or "api"
-    return parts[-1] or "api"
+    # 与 linker 共用同一份路由解析结果：查找 v1 / v2 后面的那一段
+    return parse_route(url).resource_hint or "api"
 
 
 def build_headers_from_meta(api_meta: Dict[str, Any], cfg: Dict[str, Any]) -> Dict[str, str]:
@@ -537,7 +570,15 @@ class MdGuiApp:
         messagebox.showinfo("成功", f"已保存到：{file_path}")
 
 
-if __name__ == "__main__":
+def launch_gui():
+    global tk, scrolledtext, filedialog, messagebox
+    import tkinter as tk
+    from tkinter import scrolledtext, filedialog, messagebox
+
     root = tk.Tk()
-    app = MdGuiApp(root)
+    MdGuiApp(root)
     root.mainloop()
+
+
+if __name__ == "__main__":
+    launch_gui()
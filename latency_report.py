@@ -0,0 +1,148 @@
+"""
+请求延迟汇总：读取 runtime 写出的 latency.jsonl，按接口模板 / 场景类型统计延迟分位数与吞吐。
+
+- 指标: 请求数、p50 / p95 / p99 / 平均 / 最大延迟 (ms)、吞吐 (req/s)、5xx 数、429 数、响应字节数
+- 分组: 接口模板 (METHOD + :id 归一后的 URL) 与场景类型 (lifecycle / mutation / pagination_matrix / res_not_found ...)
+- 对比: --compare 接收上一次 --save 的报告 (或直接给上一次的 .jsonl)，分位数超出容差即以非零码退出
+
+用法:
+    python latency_report.py latency.jsonl --save latency_baseline.json
+    python latency_report.py latency.jsonl --compare latency_baseline.json --tolerance 0.2
+"""
+import argparse
+import json
+import math
+import sys
+
+PERCENTILES = (50, 95, 99)
+GROUPS = ("endpoints", "scenario_types")
+# 分位数增长低于该值 (ms) 时视为抖动，不判定为退化
+MIN_DELTA_MS = 5.0
+
+
+def load_records(path):
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                # 进程被中断时最后一行可能不完整，跳过即可
+                print(f"⚠️ [Latency] {path}:{lineno} 无法解析，已跳过: {e.msg}")
+    return records
+
+
+def percentile(sorted_values, p):
+    """线性插值分位数 (与 numpy 默认算法一致)"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * p / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(records):
+    latencies = sorted(r["latency_ms"] for r in records)
+    started = min(r["ts"] for r in records)
+    finished = max(r["ts"] + r["latency_ms"] / 1000 for r in records)
+    wall = finished - started
+    summary = {"count": len(records)}
+    for p in PERCENTILES:
+        summary[f"p{p}"] = round(percentile(latencies, p), 3)
+    summary.update(
+        mean=round(sum(latencies) / len(latencies), 3),
+        max=round(latencies[-1], 3),
+        throughput_rps=round(len(records) / wall, 3) if wall > 0 else None,
+        errors_5xx=sum(1 for r in records if r.get("status", 0) >= 500),
+        throttled_429=sum(1 for r in records if r.get("status") == 429),
+        bytes=sum(r.get("bytes", 0) for r in records),
+    )
+    return summary
+
+
+def build_report(records):
+    by_endpoint, by_type = {}, {}
+    for r in records:
+        by_endpoint.setdefault(r.get("endpoint") or "?", []).append(r)
+        by_type.setdefault(r.get("scenario_type") or "unknown", []).append(r)
+    return {
+        "total": summarize(records) if records else {"count": 0},
+        "endpoints": {k: summarize(v) for k, v in sorted(by_endpoint.items())},
+        "scenario_types": {k: summarize(v) for k, v in sorted(by_type.items())},
+    }
+
+
+def load_baseline(path):
+    """基线可以是 --save 产出的报告，也可以是上一次运行的原始 .jsonl"""
+    if path.endswith((".jsonl", ".ndjson")):
+        return build_report(load_records(path))
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(report, baseline, tolerance, min_delta_ms=MIN_DELTA_MS):
+    regressions = []
+    for group in GROUPS:
+        for key, now in report[group].items():
+            old = baseline.get(group, {}).get(key)
+            if not old:
+                continue
+            for p in PERCENTILES:
+                name = f"p{p}"
+                if now[name] > old[name] * (1 + tolerance) and now[name] - old[name] > min_delta_ms:
+                    regressions.append(f"{key} {name}: {old[name]:.1f}ms -> {now[name]:.1f}ms")
+    return regressions
+
+
+def print_group(title, rows, top=None):
+    print(f"\n📊 {title}")
+    print(f"    {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>8} {'5xx':>5} {'429':>5}  名称")
+    items = sorted(rows.items(), key=lambda kv: kv[1]["p95"], reverse=True)
+    for key, s in items[:top] if top else items:
+        rps = f"{s['throughput_rps']:.1f}" if s["throughput_rps"] is not None else "-"
+        print(f"    {s['count']:>6} {s['p50']:>9.1f} {s['p95']:>9.1f} {s['p99']:>9.1f} {rps:>8} "
+              f"{s['errors_5xx']:>5} {s['throttled_429']:>5}  {key}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="汇总生成脚本采集的请求延迟 (latency.jsonl)")
+    parser.add_argument("log", nargs="?", default="latency.jsonl", help="runtime 写出的 JSON Lines 延迟日志")
+    parser.add_argument("--save", help="把汇总报告保存为 JSON，作为下次对比的基线")
+    parser.add_argument("--compare", help="与上一次的报告 (.json) 或原始日志 (.jsonl) 对比")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的分位数增长比例 (默认 0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=MIN_DELTA_MS, help="低于该增量 (ms) 的变化视为抖动")
+    parser.add_argument("--top", type=int, help="接口列表只显示 p95 最慢的前 N 个")
+    args = parser.parse_args(argv)
+
+    records = load_records(args.log)
+    if not records:
+        print(f"❌ [Latency] {args.log} 中没有任何请求记录")
+        return 1
+
+    report = build_report(records)
+    total = report["total"]
+    print(f"⏱️ [Latency] 共 {total['count']} 次请求: p50 {total['p50']:.1f}ms / p95 {total['p95']:.1f}ms / "
+          f"p99 {total['p99']:.1f}ms，吞吐 {total['throughput_rps'] or 0:.1f} req/s")
+    print_group("按接口", report["endpoints"], args.top)
+    print_group("按场景类型", report["scenario_types"])
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 [Latency] 报告已保存: {args.save}")
+
+    if args.compare:
+        regressions = compare(report, load_baseline(args.compare), args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n❌ [Latency] 检测到 {len(regressions)} 项延迟退化 (容差 {args.tolerance:.0%}):")
+            for r in regressions:
+                print(f"    - {r}")
+            return 1
+        print(f"\n✅ [Latency] 与基线 {args.compare} 对比无延迟退化 (容差 {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,99 +1,237 @@
-import json
-import copy
-import re
 import itertools
+import time
 from collections import deque, defaultdict
-
-
-# --- 辅助函数：深度查找 Body/Params 中所有潜在的 ID 依赖 ---
-def extract_dependencies(data):
-    """递归查找 Body 或 Params 中所有可能代表 ID 的字段名。"""
-    dependencies = set()
-    if isinstance(data, dict):
-        for k, v in data.items():
-            key_lower = k.lower()
-            if key_lower.endswith('_id') or 'parent' in key_lower or 'target' in key_lower or 'uuid' in key_lower:
-                if not isinstance(v, str) or (
-                        "GENERATE_" not in v and "reuse_" not in v and "oc_" not in v and "raw_data" not in v):
-                    dependencies.add(k)
-            if isinstance(v, (dict, list)):
-                dependencies.update(extract_dependencies(v))
-    elif isinstance(data, list):
-        for item in data:
-            dependencies.update(extract_dependencies(item))
-    return dependencies
-
-
-def auto_link_process():
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+
+import metrics
+from build_cache import dump_json_if_changed
+# extract_dependencies 已移至 dag.py，保留从 linker 导入的旧用法
+from dag import DependencyGraph, extract_dependencies  # noqa: F401
+from fingerprint import dedupe
+from routes import (RouteIndex, bind_path_params, classify_group, fill_path_params, group_collection_index,
+                    is_read_only, is_state_neutral)
+from spec_loader import SpecLoadError, iter_spec
+
+
+class Step(Mapping):
+    """
+    结构共享的只读 Step：base 为原始接口定义 (多个场景共享、从不修改)，
+    overrides 只记录本场景改动的顶层字段。只在序列化时才按 base + overrides 合成。
+    迭代顺序与 deepcopy 后逐字段赋值一致：先 base 的字段，再按插入顺序追加新增字段。
+    """
+    __slots__ = ("base", "overrides")
+
+    def __init__(self, base, overrides=None):
+        self.base = base
+        self.overrides = overrides or {}
+
+    def __getitem__(self, key):
+        if key in self.overrides:
+            return self.overrides[key]
+        return self.base[key]
+
+    def __iter__(self):
+        yield from self.base
+        for key in self.overrides:
+            if key not in self.base:
+                yield key
+
+    def __len__(self):
+        return len(self.base) + sum(1 for key in self.overrides if key not in self.base)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def evolve(self, **changes):
+        """返回一个新的 Step，仅替换给定的顶层字段"""
+        return Step(self.base, {**self.overrides, **changes})
+
+
+def cluster_resources(raw_list, index=None):
+    """按路由前缀树把接口聚类为资源组 (保持首次出现的顺序，嵌套资源独立成组)；raw_list 可以是任意可迭代对象"""
+    index = index or RouteIndex()
+    for api in raw_list:
+        index.add(api)
+    return index.resource_groups()
+
+
+# --- 场景编排选项 (均为可选，默认与逐场景独立执行的产出一致) ---
+# batch_mutations: 同一消费者接口的字段变异共享一次前置生产 / 后置删除，每个变异仍作为独立用例上报；
+#                  只对不改变资源状态的接口 (只读 / reply、forward 等派生动作) 生效
+# shared_fixture:  每个资源组只生产一次共享资源，各只读消费者 (GET) 作为独立用例读取该资源，其字段变异也挂在
+#                  该资源上；与 batch_mutations 同时开启时，可批量的消费者变异也挂在同一个共享资源上。
+#                  业务闭环中的读后校验步骤保持不变
+DEFAULT_PLAN = {"batch_mutations": False, "shared_fixture": False}
+
+
+def resolve_plan(plan=None):
+    resolved = dict(DEFAULT_PLAN)
+    resolved.update(plan or {})
+    return resolved
+
+
+def _timed_build(res_name, api_group, plan=None, deps=None):
+    """裂变单个资源组并回传耗时 (进程池 worker 内的 span 无法直接记到主进程)"""
+    started = time.perf_counter()
+    scenarios = build_final_suite(res_name, api_group, plan, deps)
+    return scenarios, time.perf_counter() - started
+
+
+def fission_groups(resource_groups, jobs=1, plan=None, deps=None):
+    """
+    对多个资源组执行场景裂变，按输入顺序返回 {资源名: 场景列表}。
+    jobs > 1 时分发到进程池并行执行；executor.map 保证结果顺序与输入一致，产出与串行逐字节相同。
+    deps 为 {资源名: DependencyGraph.deps_for(资源名)}，缺省时各资源组按无跨资源依赖处理。
+    """
+    names = list(resource_groups)
+    groups = [resource_groups[n] for n in names]
+    plans = [plan] * len(names)
+    group_deps = [(deps or {}).get(n) for n in names]
+    parallel = jobs > 1 and len(names) > 1
+    if not parallel:
+        results = [_timed_build(n, g, plan, d) for n, g, d in zip(names, groups, group_deps)]
+    else:
+        chunksize = max(1, len(names) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_timed_build, names, groups, plans, group_deps, chunksize=chunksize))
+    by_resource = {}
+    for res_name, (scenarios, seconds) in zip(names, results):
+        metrics.add_span("fission_resource", seconds, resource=res_name, worker=parallel)
+        # 按规范化指纹去掉重复请求序列，重名场景追加指纹后缀
+        by_resource[res_name], removed = dedupe(scenarios)
+        if removed:
+            metrics.incr("deduplicated", removed, resource=res_name)
+    return by_resource
+
+
+def auto_link_process(cache=None, jobs=1, spec_path='data.json', plan=None):
+    """
+    读取接口定义 (data.json / JSON Lines / OpenAPI) -> 资源聚类 -> 场景裂变 -> 写出 scenarios.json。
+    传入 build_cache.BuildCache 时开启增量模式：输入未变化的资源组直接复用上次的裂变结果。
+    jobs > 1 时需要裂变的资源组分发到进程池并行执行。
+    plan 为场景编排选项，见 DEFAULT_PLAN。
+    """
+    plan = resolve_plan(plan)
     print("🧠 [Linker] 启动【DAG调度·全接口深度泛用版】智能引擎...")
     try:
-        with open('data.json', 'r', encoding='utf-8') as f:
-            raw_list = json.load(f)
-    except:
+        # 流式读取：接口逐条进入路由索引，不再整体持有原始列表；load 只统计读取耗时
+        with metrics.span("cluster"):
+            resource_groups = cluster_resources(metrics.timed_iter("load", iter_spec(spec_path)))
+    except SpecLoadError as e:
+        print(f"❌ [Linker] 接口定义读取失败: {e}")
+        return []
+    except OSError as e:
+        print(f"❌ [Linker] 无法打开接口定义文件: {e}")
         return []
 
-    resource_groups = {}
-    for api in raw_list:
-        clean_url = api['url'].replace("https://", "").replace("http://", "")
-        base_path = re.sub(r'/:.*', '', clean_url)
-        parts = base_path.split('/')
-        resource_name = parts[-1] if not re.match(r'v\d+', parts[-1]) else parts[-2]
-        if resource_name not in resource_groups: resource_groups[resource_name] = []
-        resource_groups[resource_name].append(api)
-
-    final_scenarios = []
+    # 跨资源依赖图：决定 provider / 字段绑定，以及场景的拓扑顺序
+    graph = DependencyGraph(resource_groups)
+    if len(resource_groups) > 1 or graph.diagnostics:
+        print(graph.report())
+    deps = {res_name: graph.deps_for(res_name) for res_name in resource_groups}
+    metrics.incr("dag_levels", len(graph.levels))
+    metrics.incr("dag_diagnostics", len(graph.diagnostics))
+
+    by_resource = {}
+    pending = {}
+    keys = {}
     for res_name, api_group in resource_groups.items():
-        final_scenarios.extend(build_final_suite(res_name, api_group))
-
-    with open('scenarios.json', 'w', encoding='utf-8') as f:
-        json.dump(final_scenarios, f, indent=4, ensure_ascii=False)
+        if cache is not None:
+            keys[res_name] = cache.fission_key(api_group, plan, deps[res_name])
+            by_resource[res_name] = cache.cached_scenarios(res_name, keys[res_name])
+            if by_resource[res_name] is not None:
+                metrics.incr("cache_hits")
+                continue
+        pending[res_name] = api_group
+
+    with metrics.span("fission", resources=len(pending), jobs=jobs):
+        for res_name, scenarios in fission_groups(pending, jobs, plan, deps).items():
+            by_resource[res_name] = scenarios
+            if cache is not None:
+                cache.store_scenarios(res_name, keys[res_name], scenarios)
+
+    # 按拓扑层输出：上游资源组的场景 (含 provider) 排在下游之前
+    final_scenarios = []
+    for level in graph.levels:
+        for res_name in level:
+            final_scenarios.extend(by_resource[res_name])
+            metrics.count_scenarios(res_name, by_resource[res_name])
+
+    if cache is not None:
+        removed = cache.prune(set(resource_groups))
+        cache.save()
+        print(f"♻️ [Linker] 增量模式: 重建 {list(pending) or '无'}，复用 {len(resource_groups) - len(pending)} 个资源组"
+              + (f"，清理 {removed}" if removed else ""))
+
+    # 序列化与写盘合为一步流式完成，内存峰值与 scenarios.json 的大小无关
+    with metrics.span("dump", file='scenarios.json'):
+        written = dump_json_if_changed('scenarios.json', final_scenarios, indent=4)
+    if written:
+        metrics.incr("bytes_written", written)
 
     print(f"✅ [Linker] 生成完成！覆盖资源: {list(resource_groups.keys())}，共裂变出 {len(final_scenarios)} 个测试场景。")
     return final_scenarios
 
 
-def build_final_suite(res_name, api_group):
+def build_final_suite(res_name, api_group, plan=None, deps=None):
+    plan = resolve_plan(plan)
+    deps = deps or {}
+    bindings = deps.get("bindings") or {}
+    requires = deps.get("requires") or {}
     single_res_name = res_name[:-1] if res_name.endswith('s') else res_name
     VAR_ID = f"auto_{single_res_name}_id"
 
     producer = None
     consumers = []
     list_api = None
+    collection_index = group_collection_index(api_group)
 
-    for api in api_group:
-        clean_url = api['url'].replace("https://", "").replace("http://", "")
-        if api['method'] == 'GET' and ":" not in clean_url:
+    for api, role in classify_group(api_group):
+        if role == "list":
             list_api = api
-        elif api[
-            'method'] == 'POST' and ":" not in clean_url and "search" not in clean_url and "merge" not in clean_url:
+        elif role == "producer":
             if not producer: producer = api
-        elif ":" in clean_url:
+        elif role == "consumer":
             consumers.append(api)
 
+    def bind_fields(body):
+        """指向上游资源的字段替换为 provider 提取的变量 (返回新的顶层字段表)"""
+        return {k: (f"${bindings[k]}" if k in bindings else v) for k, v in body.items()}
+
     def process(step, extract_var=None, inject_map=None, invalid_id=None, override_body=None):
-        s = copy.deepcopy(step)
-        if 'body' not in s: s['body'] = {}
-        if 'params' not in s: s['params'] = {}
-        if override_body: s['body'].update(override_body)
+        s = Step(step)
+        if 'body' not in step: s = s.evolve(body={})
+        if 'params' not in step: s = s.evolve(params={})
+        if override_body: s = s.evolve(body={**s['body'], **override_body})
+        if bindings and any(k in bindings for k in s['body']):
+            s = s.evolve(body=bind_fields(s['body']))
 
         if extract_var:
             guessed_id = f"{single_res_name}_id"
-            s['extract'] = {extract_var: f"data.{guessed_id}"}
+            s = s.evolve(extract={extract_var: f"data.{guessed_id}"})
+
+        # 父资源参数总是绑定为 $auto_<父>_id；本资源的 :id 只在需要注入时绑定
+        item_var = next(iter(inject_map.values())) if inject_map else None
+        url = bind_path_params(s['url'], collection_index, item_var)
+        if url != s['url']: s = s.evolve(url=url)
 
         if inject_map:
-            for id_key, id_val in inject_map.items():
-                s['url'] = re.sub(r':\w+', f"${id_val}", s['url'])
+            body = s['body']
             for k, v in s['body'].items():
                 if isinstance(v, list) and len(v) > 0 and isinstance(v[0], str) and "DEPENDENCY" in v[0]:
-                    s['body'][k] = [f"${val}" for val in inject_map.values()]
+                    if body is s['body']: body = dict(body)
+                    body[k] = [f"${val}" for val in inject_map.values()]
+            s = s.evolve(body=body)
 
         if invalid_id:
-            s['url'] = re.sub(r':\w+', invalid_id, s['url'])
-            keys_to_rm = [k for k in s['params'] if k in step['url']]
-            for k in keys_to_rm: del s['params'][k]
+            params = {k: v for k, v in s['params'].items() if k not in step['url']}
+            s = s.evolve(url=fill_path_params(step['url'], invalid_id), params=params)
         return s
 
     consumers.sort(key=lambda x: {"GET": 1, "PUT": 2, "PATCH": 2, "POST": 3, "DELETE": 100}.get(x['method'], 50))
+    # 先给消费者分类：只有不改变目标资源状态的接口 (只读 / 派生) 的字段变异才能共用一次前置生产
+    neutral_consumers = [c for c in consumers if is_state_neutral(c)]
     scenarios = []
     del_api = next((c for c in consumers if c['method'] == 'DELETE'), None)
 
@@ -106,6 +244,7 @@ def build_final_suite(res_name, api_group):
 
         scenarios.append({
             "scenario_name": f"test_{res_name}_00_lifecycle",
+            "scenario_type": "lifecycle",
             "description": f"✅ [{res_name}] 业务闭环 (CRUD)",
             "steps": steps_full
         })
@@ -113,6 +252,7 @@ def build_final_suite(res_name, api_group):
         # 2. Idempotency
         scenarios.append({
             "scenario_name": f"test_{res_name}_02_idempotency",
+            "scenario_type": "idempotency",
             "description": f"🛡️ [{res_name}] 幂等性测试",
             "steps": [
                 process(producer, extract_var=f"{VAR_ID}_idem_1", override_body={'uuid': 'GENERATE_UUID'}),
@@ -127,10 +267,56 @@ def build_final_suite(res_name, api_group):
         if c.get('body') and c['method'] != 'DELETE':
             mutation_targets.append({"api": c, "role": "consumer"})
 
+    # 前置生产 / 后置删除步骤在所有变异场景间共享同一个只读 Step
+    setup_step = process(producer, extract_var=VAR_ID) if producer else None
+    teardown_step = process(del_api, inject_map={"id": VAR_ID}) if del_api else None
+
+    # 资源组级共享资源：生产一次，只读接口 (及批量模式下可批量接口) 的变异用例共用提取出的 ID，最后删除一次
+    shared = None
+    if plan["shared_fixture"] and producer:
+        shared = {
+            "scenario_name": f"test_{res_name}_01_shared",
+            "scenario_type": "shared",
+            "description": f"🔗 [{res_name}] 共享资源用例组",
+            "setup": [setup_step],
+            "cases": [],
+            "teardown": [teardown_step] if teardown_step else [],
+        }
+        # 每个只读消费者读一次同一个已生产的资源，各自单独上报
+        for c in consumers:
+            if is_read_only(c) and "batch" not in c['url'] and "merge" not in c['url']:
+                api_id = c.get('case_name', f"{c['method']}_{c['url'][-10:]}")
+                shared["cases"].append({
+                    "case_name": f"test_{res_name}_01_read_{api_id}",
+                    "scenario_type": "read_only",
+                    "description": f"🔍 [{res_name}] 只读: {c.get('description', api_id)}",
+                    "steps": [process(c, inject_map={"id": VAR_ID})]
+                })
+
     for target_info in mutation_targets:
         target_api = target_info["api"]
         role = target_info["role"]
         api_id = target_api.get('case_name', f"{target_api['method']}_{target_api['url'][-10:]}")
+        if role == "consumer" and not producer:
+            continue
+        base_step = process(target_api) if role == "producer" else process(target_api, inject_map={"id": VAR_ID})
+
+        # 批量模式: 不改变资源状态的消费者接口，其全部变异挂在一次生产 / 删除之间；
+        # PUT / PATCH、recall 等会改变状态的接口，某个变异意外成功就会污染后续用例，仍逐个独立生产
+        batch = None
+        batchable = plan["batch_mutations"] and role == "consumer" and target_api in neutral_consumers
+        if shared is not None and role == "consumer" and (batchable or is_read_only(target_api)):
+            batch = shared
+        elif batchable:
+            batch = {
+                "scenario_name": f"test_{res_name}_mut_{api_id}_batch",
+                "scenario_type": "mutation",
+                # ❌ 只标在各个用例上：批次自身的前置生产 / 后置删除是正向步骤，要提取 ID、按失败断言
+                "description": f"🧪 [{res_name}] {api_id} 字段变异 (共享前置资源)",
+                "setup": [setup_step],
+                "cases": [],
+                "teardown": [teardown_step] if teardown_step else [],
+            }
 
         for key, value in target_api['body'].items():
             mutations = [
@@ -140,56 +326,82 @@ def build_final_suite(res_name, api_group):
             ]
 
             for mut_code, mut_desc, mut_action in mutations:
-                mutated_body = copy.deepcopy(target_api['body'])
+                # 只复制顶层字段表，未改动的子结构与原接口定义共享
+                mutated_body = bind_fields(target_api['body'])
                 if mut_action(key, mutated_body) is False: continue
 
                 steps = []
                 if role == "producer":
-                    s_mut = process(target_api)
-                    s_mut['body'] = mutated_body
-                    s_mut['description'] += " ❌"
-                    steps.append(s_mut)
-                elif role == "consumer" and producer:
-                    steps.append(process(producer, extract_var=VAR_ID))
-                    s_mut = process(target_api, inject_map={"id": VAR_ID})
-                    s_mut['body'] = mutated_body
-                    s_mut['description'] += f" (针对 {key} 字段) ❌"
-                    steps.append(s_mut)
-                    if del_api: steps.append(process(del_api, inject_map={"id": VAR_ID}))
+                    steps.append(base_step.evolve(body=mutated_body, description=base_step['description'] + " ❌"))
+                elif batch is not None:
+                    batch["cases"].append({
+                        "case_name": f"test_{res_name}_mut_{api_id}_{mut_code}_{key}",
+                        "scenario_type": "mutation",
+                        "description": f"❌ [{res_name}] {api_id} {mut_desc}: {key}",
+                        "steps": [base_step.evolve(body=mutated_body,
+                                                   description=base_step['description'] + f" (针对 {key} 字段) ❌")]
+                    })
                 else:
-                    continue
+                    steps.append(setup_step)
+                    steps.append(base_step.evolve(body=mutated_body,
+                                                  description=base_step['description'] + f" (针对 {key} 字段) ❌"))
+                    if teardown_step: steps.append(teardown_step)
 
                 if steps:
                     scenarios.append({
                         "scenario_name": f"test_{res_name}_mut_{api_id}_{mut_code}_{key}",
+                        "scenario_type": "mutation",
                         "description": f"❌ [{res_name}] {api_id} {mut_desc}: {key}",
                         "steps": steps
                     })
 
+        if batch and batch is not shared and batch["cases"]:
+            scenarios.append(batch)
+
+    if shared and shared["cases"]:
+        # 放在业务闭环之后 (名称 _01_ 与之相邻)，保持与其它场景的相对顺序稳定
+        scenarios.insert(1 if scenarios and scenarios[0]["scenario_type"] == "lifecycle" else 0, shared)
+
     # 4. Pagination & Exception
     if list_api:
         list_steps = []
+        list_step = process(list_api)
         for size in [10, 50]:
-            s = process(list_api)
-            s['params']['page_size'] = size
-            s['description'] = f"列表查询 (Size={size})"
-            list_steps.append(s)
-        scenarios.append({"scenario_name": f"test_{res_name}_pagination_matrix",
+            list_steps.append(list_step.evolve(params={**list_step['params'], 'page_size': size},
+                                               description=f"列表查询 (Size={size})"))
+        scenarios.append({"scenario_name": f"test_{res_name}_pagination_matrix", "scenario_type": "pagination_matrix",
                           "description": f"🔍 [{res_name}] 列表查询参数矩阵测试", "steps": list_steps})
 
     if del_api:
         s_not_found = process(del_api, invalid_id="invalid_id_999")
-        s_not_found['description'] += " ❌"
+        s_not_found = s_not_found.evolve(description=s_not_found['description'] + " ❌")
         scenarios.append(
-            {"scenario_name": f"test_{res_name}_res_not_found", "description": f"❌ [{res_name}] 资源不存在测试",
+            {"scenario_name": f"test_{res_name}_res_not_found", "scenario_type": "res_not_found",
+             "description": f"❌ [{res_name}] 资源不存在测试",
              "steps": [s_not_found]})
 
     if not producer:
         for c in consumers:
-            scenarios.append({"scenario_name": f"test_{res_name}_isolated_robust",
+            scenarios.append({"scenario_name": f"test_{res_name}_isolated_robust", "scenario_type": "isolated_robust",
                               "description": f"⚠️ [{res_name}] 孤立接口鲁棒性盲测",
                               "steps": [process(c, invalid_id="mock_id_999")]})
 
+    # 被下游依赖时额外产出 provider：整个执行期间只生产一次，全部下游共用，最后删除
+    if deps.get("provide") and producer:
+        scenarios.insert(0, {
+            "scenario_name": f"provider_{res_name}",
+            "scenario_type": "provider",
+            "description": f"🔗 [{res_name}] 上游共享资源",
+            "provides": VAR_ID,
+            "setup": [setup_step],
+            "teardown": [teardown_step] if teardown_step else [],
+        })
+
+    # 标记所属资源组，运行时据此选择节流策略；依赖上游资源的场景声明所需的 provider
+    for s in scenarios:
+        s["resource"] = res_name
+        if requires:
+            s["requires"] = requires
     return scenarios
 
 
@@ -0,0 +1,290 @@
+"""
+压测模式：把 scenarios.json 中的业务闭环 (lifecycle) 场景作为虚拟用户循环回放。
+
+- 闭环模型: --users 个虚拟用户各自循环执行场景，在 --ramp-up 秒内依次启动
+- 开环限速: 给出 --rps 时所有请求共用一个全局节拍器，速率在 --ramp-up 内从 0 线性升到目标值
+- 场景权重: --weight PATTERN=W 按场景名或场景类型 (fnmatch) 调整被选中的概率，W=0 表示排除
+- 每个 Step 复用 runtime.run_step (注入 / 变量提取 / 断言与功能测试完全一致)；
+  跨资源依赖的上游 provider 只生产一次，全部虚拟用户共用，结束后删除
+- 报告: 稳态 (ramp-up 之后) 吞吐与延迟分位数、按接口统计、状态码与异常分布；可保存为 JSON
+
+用法:
+    python load_runner.py --scenarios scenarios.json --users 20 --duration 60 --ramp-up 10
+    python load_runner.py --rps 200 --users 50 --duration 30 --weight '*lifecycle=3' --weight 'test_chats_*=0'
+"""
+import argparse
+import fnmatch
+import json
+import random
+import sys
+import threading
+import time
+
+import runtime
+from latency_report import PERCENTILES, build_report, print_group, summarize
+
+DEFAULT_TYPES = ("lifecycle",)
+
+
+class MemorySink:
+    """收集 runtime.send 记录的每次请求 (含重试)，可同时追加写入 JSON Lines"""
+
+    def __init__(self, path=None):
+        self.records = []
+        self.lock = threading.Lock()
+        self.file_sink = runtime.LatencySink(path) if path else None
+
+    def write(self, record):
+        with self.lock:
+            self.records.append(record)
+        if self.file_sink is not None:
+            self.file_sink.write(record)
+
+    def close(self):
+        if self.file_sink is not None:
+            self.file_sink.close()
+
+
+class Pacer:
+    """全局请求节拍器：按当前目标速率给每个请求分配发送时刻；rps 为空时不限速"""
+
+    def __init__(self, rps, ramp_up, started):
+        self.rps = rps
+        self.ramp_up = ramp_up
+        self.started = started
+        self.next_slot = started
+        self.lock = threading.Lock()
+
+    def rate_at(self, now):
+        if not self.ramp_up:
+            return self.rps
+        # 起步速率不低于目标的 5%，避免第一个请求等待过久
+        return self.rps * min(1.0, max(0.05, (now - self.started) / self.ramp_up))
+
+    def wait(self):
+        if not self.rps:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + 1.0 / self.rate_at(slot)
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def parse_weights(items):
+    weights = []
+    for item in items or []:
+        pattern, sep, value = item.rpartition('=')
+        if not sep or not pattern:
+            raise argparse.ArgumentTypeError(f"权重格式应为 PATTERN=W: {item}")
+        weights.append((pattern, float(value)))
+    return weights
+
+
+def select_scenarios(scenarios, types, weights):
+    """返回 [(场景, 权重)]；provider 不参与回放，后出现的权重规则覆盖先出现的"""
+    selected = []
+    for s in scenarios:
+        if runtime.is_provider(s) or (types and s.get("scenario_type") not in types):
+            continue
+        weight = 1.0
+        for pattern, w in weights:
+            if fnmatch.fnmatchcase(s["scenario_name"], pattern) or fnmatch.fnmatchcase(s.get("scenario_type") or "",
+                                                                                     pattern):
+                weight = w
+        if weight > 0:
+            selected.append((s, weight))
+    return selected
+
+
+def run_iteration(scenario, seed, pacer):
+    """执行一次场景；与 runtime.run_scenario 相同，只是每个请求前先经过节拍器"""
+    def run_steps(steps, ctx):
+        for step in steps:
+            pacer.wait()
+            runtime.run_step(step, ctx)
+
+    ctx = runtime.ScenarioContext.from_scenario(scenario)
+    ctx.vars_pool.update(seed)
+    if not runtime.is_batch(scenario):
+        run_steps(scenario["steps"], ctx)
+        return
+    run_steps(scenario.get("setup", []), ctx)
+    try:
+        for case in scenario["cases"]:
+            run_steps(case["steps"], ctx.fork(case["case_name"], case.get("description", ""),
+                                              case.get("scenario_type")))
+    finally:
+        run_steps(scenario.get("teardown", []), ctx)
+
+
+class LoadTest:
+    def __init__(self, selected, providers, users, duration, ramp_up=0.0, rps=None, think=0.0, seed=0):
+        self.scenarios = [s for s, _ in selected]
+        self.weights = [w for _, w in selected]
+        self.providers = providers
+        self.users = users
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self.rps = rps
+        self.think = think
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.iterations = {}    # 场景名 -> {"ok": n, "failed": n}
+        self.errors = {}        # 异常摘要 -> 次数
+
+    def record(self, name, error=None):
+        with self.lock:
+            counts = self.iterations.setdefault(name, {"ok": 0, "failed": 0})
+            if error is None:
+                counts["ok"] += 1
+                return
+            counts["failed"] += 1
+            lines = str(error).strip().splitlines()
+            key = f"{type(error).__name__}: {lines[0][:120] if lines else ''}"
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def user(self, index, started, deadline, pacer):
+        rng = random.Random(self.seed * 100003 + index)
+        # 虚拟用户在 ramp-up 内均匀错开启动
+        start_at = started + (self.ramp_up * index / self.users if self.users > 1 else 0.0)
+        time.sleep(max(0.0, start_at - time.monotonic()))
+        while time.monotonic() < deadline:
+            scenario = rng.choices(self.scenarios, self.weights)[0]
+            try:
+                run_iteration(scenario, self.providers.seed_for(scenario), pacer)
+            except Exception as e:
+                self.record(scenario["scenario_name"], e)
+            else:
+                self.record(scenario["scenario_name"])
+            if self.think:
+                time.sleep(self.think)
+
+    def run(self):
+        started = time.monotonic()
+        deadline = started + self.duration
+        pacer = Pacer(self.rps, self.ramp_up, started)
+        threads = [threading.Thread(target=self.user, args=(i, started, deadline, pacer), daemon=True)
+                   for i in range(self.users)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.monotonic() - started
+
+
+def build_load_report(test, records, wall_started, ramp_up):
+    """稳态窗口 = 墙钟起点 + ramp-up 之后发出的请求；ramp-up 内没有请求时退化为全部请求"""
+    steady = [r for r in records if r["ts"] >= wall_started + ramp_up] or records
+    report = build_report(steady) if steady else {"total": {"count": 0}, "endpoints": {}, "scenario_types": {}}
+    report["all_requests"] = summarize(records) if records else {"count": 0}
+    statuses = {}
+    for r in records:
+        statuses[str(r.get("status"))] = statuses.get(str(r.get("status")), 0) + 1
+    report["status_codes"] = dict(sorted(statuses.items()))
+    report["iterations"] = test.iterations
+    report["errors"] = dict(sorted(test.errors.items(), key=lambda kv: kv[1], reverse=True))
+    report["config"] = {"users": test.users, "duration": test.duration, "ramp_up": ramp_up, "rps": test.rps,
+                        "think": test.think, "seed": test.seed,
+                        "weights": {s["scenario_name"]: w for s, w in zip(test.scenarios, test.weights)}}
+    return report
+
+
+def run_load(scenarios, users=10, duration=30.0, ramp_up=0.0, rps=None, think=0.0, types=DEFAULT_TYPES,
+             weights=None, seed=0, latency_log=None, base_url=None):
+    selected = select_scenarios(scenarios, types, weights or [])
+    if not selected:
+        raise ValueError(f"没有可回放的场景 (类型 {list(types or [])})")
+
+    runtime.VERBOSE = False
+    # 压测由节拍器 / 虚拟用户数控制速率，关闭按接口的令牌桶 (仍然遵循服务端 429)
+    runtime.configure_throttle({"default": {"rate": None}})
+    runtime.configure_http(pool_maxsize=max(users, runtime.DEFAULT_HTTP_CONFIG["pool_maxsize"]))
+    runtime.configure_base_url(base_url)
+    runtime.configure_data_seed(seed)
+    sink = MemorySink(latency_log)
+    runtime.configure_latency(sink=sink)
+    providers = runtime.ProviderPool(scenarios)
+    test = LoadTest(selected, providers, users, duration, ramp_up, rps, think, seed)
+    wall_started = time.time()
+    try:
+        elapsed = test.run()
+    finally:
+        providers.close()
+        runtime.close_session()
+        runtime.close_latency()
+    report = build_load_report(test, sink.records, wall_started, ramp_up)
+    report["elapsed"] = round(elapsed, 3)
+    return report
+
+
+def print_report(report, top=None):
+    total = report["total"]
+    iterations = report["iterations"]
+    ok = sum(c["ok"] for c in iterations.values())
+    failed = sum(c["failed"] for c in iterations.values())
+    print(f"🏁 [Load] {report['elapsed']:.1f}s 内完成 {ok + failed} 次场景迭代 ({failed} 次失败)，"
+          f"共 {report['all_requests']['count']} 次请求")
+    if total["count"]:
+        pcts = " / ".join(f"p{p} {total[f'p{p}']:.1f}ms" for p in PERCENTILES)
+        print(f"⏱️ [Load] 稳态 {total['count']} 次请求: 吞吐 {total['throughput_rps'] or 0:.1f} req/s，{pcts}")
+    print(f"📶 [Load] 状态码分布: {report['status_codes']}")
+    print_group("稳态 - 按接口", report["endpoints"], top)
+    print("\n🎯 按场景")
+    for name, c in sorted(iterations.items()):
+        print(f"    {c['ok']:>6} 通过 {c['failed']:>6} 失败  {name}")
+    if report["errors"]:
+        print("\n❌ 异常分布")
+        for key, count in report["errors"].items():
+            print(f"    {count:>6}  {key}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="把 scenarios.json 中的业务闭环场景作为虚拟用户压测回放")
+    parser.add_argument("--scenarios", default="scenarios.json", help="linker 产出的场景文件")
+    parser.add_argument("--users", "-u", type=int, default=10, help="虚拟用户数 (并发度)")
+    parser.add_argument("--duration", "-t", type=float, default=30.0, help="压测时长 (秒，含 ramp-up)")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="虚拟用户与目标速率的爬坡时间 (秒)")
+    parser.add_argument("--rps", type=float, help="目标请求速率 (req/s)；不给时由虚拟用户数决定")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="每次迭代后的思考时间 (ms)")
+    parser.add_argument("--types", default=",".join(DEFAULT_TYPES),
+                        help="参与回放的场景类型，逗号分隔；空字符串表示全部 (provider 除外)")
+    parser.add_argument("--weight", action="append", metavar="PATTERN=W",
+                        help="按场景名或场景类型调整权重，可重复；W=0 表示排除")
+    parser.add_argument("--seed", type=int, default=0, help="场景选择与测试数据的随机种子 (环境变量 SAAP_SEED 优先于测试数据种子)")
+    parser.add_argument("--base-url", help="把请求的 host 改写为该地址 (如 mock_server.py 的本地地址)")
+    parser.add_argument("--latency-log", help="同时把每次请求追加写入该 JSON Lines 文件 (latency_report.py 可读)")
+    parser.add_argument("--save", help="把压测报告保存为 JSON")
+    parser.add_argument("--top", type=int, help="接口列表只显示 p95 最慢的前 N 个")
+    args = parser.parse_args(argv)
+
+    with open(args.scenarios, 'r', encoding='utf-8') as f:
+        scenarios = json.load(f)
+    types = tuple(t for t in args.types.split(',') if t.strip())
+    try:
+        weights = parse_weights(args.weight)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    rate = f"目标 {args.rps:g} req/s" if args.rps else "不限速"
+    print(f"🔥 [Load] {args.users} 个虚拟用户，时长 {args.duration:g}s (ramp-up {args.ramp_up:g}s)，{rate}，"
+          f"种子 {args.seed}...")
+    try:
+        report = run_load(scenarios, args.users, args.duration, args.ramp_up, args.rps, args.think_ms / 1000,
+                          types, weights, args.seed, args.latency_log, args.base_url)
+    except ValueError as e:
+        print(f"❌ [Load] {e}")
+        return 1
+    print_report(report, args.top)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 [Load] 报告已保存: {args.save}")
+    failed = sum(c["failed"] for c in report["iterations"].values())
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+无界面的 Markdown 接口文档批量导入：把飞书导出的一整个目录的 .md 文档转换为 data.json / JSON Lines。
+
+- 每篇文档单遍扫描 (gui_data.scan_markdown)，字段推断沿用 build_case_from_api_meta / apply_global_defaults_to_case，
+  产出与 GUI 逐篇添加完全一致
+- --jobs N 时分发到进程池并行解析；文档按路径排序编号，结果与串行逐字节相同
+- 没有识别到 HTTP URL 的文档 (目录页、说明页) 跳过并提示
+- 输出扩展名为 .jsonl / .ndjson 时写 JSON Lines，否则写 JSON 数组；内容不变时不落盘
+
+用法:
+    python md_import.py docs/ --output data.json --chat-id oc_xxx --user-id ou_xxx --jobs 8
+    python md_import.py docs/im docs/contact --output data.jsonl --map receive_id_type=chat_id
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from build_cache import write_if_changed
+from gui_data import apply_global_defaults_to_case, build_api_meta_from_md, build_case_from_api_meta
+
+JSON_LINES_EXTS = (".jsonl", ".ndjson")
+
+
+def collect_docs(inputs):
+    """展开目录 (递归查找 *.md) 与单个文件，去重后按路径排序"""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.update(glob.glob(os.path.join(item, "**", "*.md"), recursive=True))
+        else:
+            paths.add(item)
+    return sorted(paths)
+
+
+def convert_doc(path):
+    """读取并解析一篇文档，返回 (路径, api_meta 或 None, 错误信息)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            meta = build_api_meta_from_md(f.read())
+    except (OSError, UnicodeDecodeError) as e:
+        return path, None, str(e)
+    if not meta.get("url"):
+        return path, None, "未识别到 HTTP URL"
+    return path, meta, None
+
+
+def convert_docs(paths, cfg, jobs=1, start_seq=1):
+    """返回 (用例列表, [(路径, 跳过原因)])；编号按文档顺序连续分配，与并行与否无关"""
+    if jobs > 1 and len(paths) > 1:
+        chunksize = max(1, len(paths) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(convert_doc, paths, chunksize=chunksize))
+    else:
+        results = [convert_doc(p) for p in paths]
+
+    cases, skipped = [], []
+    for path, meta, error in results:
+        if meta is None:
+            skipped.append((path, error))
+            continue
+        case = build_case_from_api_meta(meta, cfg, start_seq + len(cases))
+        cases.append(apply_global_defaults_to_case(case, cfg.get("default_chat_id"), cfg.get("default_user_id")))
+    return cases, skipped
+
+
+def dump_cases(cases, output):
+    if os.path.splitext(output)[1].lower() in JSON_LINES_EXTS:
+        text = "".join(json.dumps(c, ensure_ascii=False) + "\n" for c in cases)
+    else:
+        text = json.dumps(cases, ensure_ascii=False, indent=2)
+    return write_if_changed(output, text)
+
+
+def parse_mapping(items):
+    """key=value 列表 -> 高级映射 (与 GUI 的高级映射文本框规则一致)"""
+    mapping = {}
+    for item in items or []:
+        if "=" not in item:
+            raise argparse.ArgumentTypeError(f"高级映射格式应为 key=value: {item}")
+        k, v = item.split("=", 1)
+        mapping[k.strip()] = v.strip()
+    return mapping
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量把飞书 Markdown 接口文档转换为 data.json / JSON Lines")
+    parser.add_argument("inputs", nargs="+", help="文档目录 (递归查找 *.md) 或单个 .md 文件")
+    parser.add_argument("--output", "-o", default="data.json", help="输出文件，.jsonl / .ndjson 时写 JSON Lines")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="并行解析的进程数")
+    parser.add_argument("--authorization", default="", help="Authorization (自动补 Bearer)")
+    parser.add_argument("--chat-id", default="", help="Default Chat ID")
+    parser.add_argument("--user-id", default="", help="Default User ID")
+    parser.add_argument("--map", action="append", metavar="KEY=VALUE", help="高级映射，可重复指定")
+    parser.add_argument("--start-seq", type=int, default=1, help="用例编号起始值")
+    args = parser.parse_args(argv)
+
+    try:
+        advanced_map = parse_mapping(args.map)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    cfg = {
+        "authorization": args.authorization.strip(),
+        "default_chat_id": args.chat_id.strip(),
+        "default_user_id": args.user_id.strip(),
+        "advanced_map": advanced_map,
+    }
+
+    paths = collect_docs(args.inputs)
+    if not paths:
+        print(f"❌ [Import] 没有找到 Markdown 文档: {' '.join(args.inputs)}", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    cases, skipped = convert_docs(paths, cfg, args.jobs, args.start_seq)
+    for path, reason in skipped:
+        print(f"  ⚠️ 跳过 {path}: {reason}")
+    if not cases:
+        print("❌ [Import] 没有可导入的接口", file=sys.stderr)
+        return 1
+
+    written = dump_cases(cases, args.output)
+    print(f"✅ [Import] {len(paths)} 篇文档 -> {len(cases)} 个接口 ({len(skipped)} 篇跳过)，"
+          f"耗时 {time.perf_counter() - started:.2f}s，{'已写入' if written else '内容未变化'}: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+生成链路的结构化埋点：计时区间 (span) + 计数器，统一导出为 JSON。
+
+- span 可嵌套，记录父区间 (parent_id 指向具体的那一条)；导出时同时给出自身耗时 (self_seconds = 总耗时 - 自己的子区间耗时)
+- 流式阶段 (边读边聚类、边渲染边写盘) 用 timed_iter / Stopwatch 把分散的耗时累加进同一个 span
+- 进程池裂变时 worker 内的耗时由调用方回传后用 add_span 补记
+- 可选 profiler: cprofile (函数级累计耗时) / tracemalloc (按代码行统计内存分配)
+
+模块级 METRICS 为进程内唯一实例，linker / generator 直接调用 span() / incr() 即可。
+"""
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+
+PROFILERS = ("cprofile", "tracemalloc")
+
+
+class Stopwatch:
+    """可重复进入的累加计时器: with sw: ... 多次后 sw.seconds 为总耗时"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._started = None
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds += time.perf_counter() - self._started
+
+
+class Metrics:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.spans = []
+        self.counters = {}
+        self.resources = {}
+        self._stack = []
+
+    # --- 计时 ---
+    @contextlib.contextmanager
+    def span(self, name, **attrs):
+        record = self._open(name, attrs)
+        started = time.perf_counter()
+        self._stack.append(record)
+        try:
+            yield record
+        finally:
+            self._stack.pop()
+            record["seconds"] = time.perf_counter() - started
+
+    def add_span(self, name, seconds, **attrs):
+        """补记一个已测得耗时的区间 (如进程池 worker 回传的耗时)，挂在当前区间之下"""
+        record = self._open(name, attrs)
+        record["seconds"] = seconds
+        return record
+
+    def timed_iter(self, name, iterable, **attrs):
+        """只统计从 iterable 取值所花的时间，迭代结束后记为一个 span"""
+        sw = Stopwatch()
+        it = iter(iterable)
+        try:
+            while True:
+                with sw:
+                    try:
+                        item = next(it)
+                    except StopIteration:
+                        return
+                yield item
+        finally:
+            self.add_span(name, sw.seconds, **attrs)
+
+    def _open(self, name, attrs):
+        parent = self._stack[-1] if self._stack else None
+        # id 为记录在 spans 中的序号；parent_id 指向打开时所在的那一条区间 (同名区间各算各的子区间)
+        record = {"id": len(self.spans), "name": name, "parent": parent["name"] if parent else None,
+                  "parent_id": parent["id"] if parent else None, "seconds": 0.0}
+        if attrs:
+            record["attrs"] = attrs
+        self.spans.append(record)
+        return record
+
+    # --- 计数 ---
+    def incr(self, name, value=1, resource=None):
+        """全局计数；给出 resource 时同时累加到该资源组的计数"""
+        self.counters[name] = self.counters.get(name, 0) + value
+        if resource is not None:
+            counters = self.resources.setdefault(resource, {})
+            counters[name] = counters.get(name, 0) + value
+
+    # --- 导出 ---
+    def to_dict(self):
+        children = {}
+        for s in self.spans:
+            if s["parent_id"] is not None:
+                children[s["parent_id"]] = children.get(s["parent_id"], 0.0) + s["seconds"]
+        spans = []
+        for s in self.spans:
+            record = dict(s, seconds=round(s["seconds"], 6))
+            if s["id"] in children:
+                record["self_seconds"] = round(max(0.0, s["seconds"] - children[s["id"]]), 6)
+            spans.append(record)
+        return {"spans": spans, "counters": dict(self.counters), "resources": self.resources}
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+
+METRICS = Metrics()
+span = METRICS.span
+add_span = METRICS.add_span
+timed_iter = METRICS.timed_iter
+incr = METRICS.incr
+
+
+def step_count(scenario):
+    """场景实际发出的 Step 数；批次场景 = setup + 全部 case + teardown，provider 只有 setup + teardown"""
+    if "cases" in scenario or "steps" not in scenario:
+        return len(scenario.get("setup", [])) + len(scenario.get("teardown", [])) \
+            + sum(len(c["steps"]) for c in scenario.get("cases", []))
+    return len(scenario["steps"])
+
+
+def case_types(scenario):
+    """逐个用例的场景类型；批次内用例未声明时沿用批次的类型，provider 不算用例"""
+    if scenario.get("scenario_type") == "provider":
+        return []
+    if "cases" in scenario:
+        return [c.get("scenario_type") or scenario.get("scenario_type") for c in scenario["cases"]]
+    return [scenario.get("scenario_type")]
+
+
+def count_scenarios(res_name, scenarios):
+    """按资源组统计场景数 (批次按用例计) / 步骤数 / 变异场景数"""
+    types = [t for s in scenarios for t in case_types(s)]
+    incr("scenarios", len(types), resource=res_name)
+    incr("steps", sum(step_count(s) for s in scenarios), resource=res_name)
+    incr("mutations", types.count("mutation"), resource=res_name)
+
+
+@contextlib.contextmanager
+def profiled(kind, output=None, top=25):
+    """
+    kind = "cprofile":    输出累计耗时前 top 的函数；output 给出时另存 .prof 供 snakeviz 等工具查看
+    kind = "tracemalloc": 输出分配内存最多的前 top 行代码及峰值
+    kind 为 None 时不做任何事
+    """
+    if not kind:
+        yield
+        return
+    if kind not in PROFILERS:
+        raise ValueError(f"未知的 profiler: {kind} (可选 {', '.join(PROFILERS)})")
+
+    if kind == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if output:
+                profiler.dump_stats(output)
+            buf = io.StringIO()
+            pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(top)
+            print(f"🔬 [Profile] cProfile 累计耗时 Top {top}:\n{buf.getvalue()}")
+        return
+
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        lines = [f"    {stat}" for stat in snapshot.statistics("lineno")[:top]]
+        print(f"🔬 [Profile] tracemalloc 峰值 {peak / 1024 / 1024:.1f} MB，分配 Top {top}:\n" + "\n".join(lines))
+        if output:
+            snapshot.dump(output)
@@ -0,0 +1,335 @@
+"""
+本地 Mock 服务：按 data.json (与 linker 相同的路由聚类结果) 模拟接口，供离线跑通测试脚本与压测吞吐。
+
+- 路由: 每条接口编译为 (方法, 路径模板)，路径参数匹配任意一段；同时匹配多条时字面量段多的优先
+- 生产者 (集合级 POST) 分配 ID 并写入内存存储，响应中带 data.<单数资源>_id，linker 的 extract 路径即可解析；
+  相同 uuid 的重复创建返回同一个 ID (幂等)
+- 消费者 (带 :id 的路由) 按 ID 读取 / 更新 / 删除，ID 不存在时返回 404；没有生产者的资源组不校验 ID
+- 列表 (集合级 GET) 返回已创建的资源，遵循 page_size
+- 请求体校验 (可关闭): 缺少接口定义中的顶层字段、类型与定义不一致、字符串超长时返回 400
+- 响应体优先使用接口文档的 response_example_json (接口定义中的同名字段，或 --docs 目录下 Markdown 文档的响应体示例)
+- 可配置固定延迟 + 抖动、随机 5xx、随机 429 (带 Retry-After)；随机数由 --seed 固定
+- GET /__mock__/stats 返回按状态码 / 路由统计的请求数
+
+用法:
+    python mock_server.py --spec data.json --port 18080 --latency-ms 20 --rate-429 0.05
+    SAAP_BASE_URL=http://127.0.0.1:18080 python -m pytest test_final_suite.py
+    python mock_server.py --spec data.json --port 18080 --rewrite data_mock.json   # 另存一份改写了 host 的接口定义
+"""
+import argparse
+import copy
+import glob
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from gui_data import build_api_meta_from_md
+from linker import cluster_resources
+from routes import classify_group, group_collection_index, is_param, parse_route, singular
+from spec_loader import iter_spec
+
+STATS_PATH = "/__mock__/stats"
+MAX_STRING_LENGTH = 1024
+PLACEHOLDER_MARKERS = ("raw_data", "Auto_", "GENERATE_", "reuse_", "$")
+JSON_TYPES = ((bool, "boolean"), ((int, float), "number"), (str, "string"), (list, "array"), (dict, "object"))
+
+
+def json_type(value):
+    for types, name in JSON_TYPES:
+        if isinstance(value, types):
+            return name
+    return "null"
+
+
+def is_placeholder(value):
+    """运行时才会被替换的占位符，值的类型以替换结果为准，不参与类型校验"""
+    return isinstance(value, str) and any(m in value for m in PLACEHOLDER_MARKERS)
+
+
+def route_key(method, url):
+    """(方法, 参数统一为 : 的路径模板)，用于把文档示例对应到接口"""
+    return method.upper(), tuple(':' if is_param(s) else s for s in parse_route(url).segments)
+
+
+def load_doc_examples(docs_dir):
+    """从飞书导出的 Markdown 文档中解析响应体示例: {route_key: response_example_json}"""
+    examples = {}
+    for path in sorted(glob.glob(os.path.join(docs_dir, "**", "*.md"), recursive=True)):
+        with open(path, 'r', encoding='utf-8') as f:
+            meta = build_api_meta_from_md(f.read())
+        if meta.get("url") and meta.get("response_example_json") is not None:
+            examples[route_key(meta["method"] or "GET", meta["url"])] = meta["response_example_json"]
+    return examples
+
+
+class MockRoute:
+    __slots__ = ("method", "segments", "resource", "role", "id_field", "id_index", "body", "example", "name")
+
+    def __init__(self, api, resource, role, collection_index, example=None):
+        route = parse_route(api['url'])
+        self.method = api['method'].upper()
+        self.segments = route.segments
+        self.resource = resource
+        self.role = role
+        self.id_field = f"{singular(resource)}_id"
+        # 本资源的 :id 位于集合段之后；集合级路由没有
+        self.id_index = collection_index + 1 if collection_index + 1 in route.param_positions else None
+        self.body = api.get('body') or {}
+        self.example = example if example is not None else api.get('response_example_json')
+        self.name = f"{self.method} {route.template}"
+
+    @property
+    def literal_count(self):
+        return sum(1 for s in self.segments if not is_param(s))
+
+    def match(self, segments):
+        if len(segments) != len(self.segments):
+            return False
+        return all(is_param(t) or t == s for t, s in zip(self.segments, segments))
+
+
+class MockApp:
+    """与 HTTP 无关的 Mock 逻辑：路由 + 内存存储 + 故障注入，handle() 返回 (状态码, 响应头, 响应体)"""
+
+    def __init__(self, resource_groups, examples=None, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 error_status=500, rate_429=0.0, retry_after=0, validate=True, seed=0):
+        examples = examples or {}
+        self.routes = {}
+        self.producers = set()
+        for res_name, group in resource_groups.items():
+            c = group_collection_index(group)
+            for api, role in classify_group(group):
+                route = MockRoute(api, res_name, role, c, examples.get(route_key(api['method'], api['url'])))
+                self.routes.setdefault((route.method, len(route.segments)), []).append(route)
+                if role == "producer":
+                    self.producers.add(res_name)
+        for candidates in self.routes.values():
+            candidates.sort(key=lambda r: r.literal_count, reverse=True)
+
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.validate = validate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.store = {}          # 资源名 -> {id: 记录}
+        self.idempotency = {}    # (资源名, uuid) -> id
+        self.next_id = 0
+        self.stats = {"total": 0, "status": {}, "routes": {}}
+
+    # --- 路由 ---
+    def resolve(self, method, path):
+        segments = tuple(s for s in path.split('/') if s)
+        for route in self.routes.get((method, len(segments)), ()):
+            if route.match(segments):
+                return route, segments
+        return None, segments
+
+    # --- 入口 ---
+    def handle(self, method, path, query, body):
+        if method == "GET" and path == STATS_PATH:
+            with self.lock:
+                return 200, {}, copy.deepcopy(self.stats)
+
+        route, segments = self.resolve(method, path)
+        with self.lock:
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            roll = self.rng.random()
+        if delay:
+            time.sleep(delay)
+
+        if route is None:
+            status, headers, payload = 404, {}, {"code": 404, "msg": f"mock: 未定义的接口 {method} {path}"}
+        elif roll < self.rate_429:
+            status, headers, payload = 429, {"Retry-After": str(self.retry_after)}, \
+                {"code": 99991400, "msg": "mock: request trigger frequency limit"}
+        elif roll < self.rate_429 + self.error_rate:
+            status, headers, payload = self.error_status, {}, {"code": 500, "msg": "mock: injected error"}
+        else:
+            status, payload = self.dispatch(route, segments, query, body)
+            headers = {}
+        self.record(route.name if route else "unmatched", status)
+        return status, headers, payload
+
+    def record(self, name, status):
+        with self.lock:
+            self.stats["total"] += 1
+            self.stats["status"][str(status)] = self.stats["status"].get(str(status), 0) + 1
+            self.stats["routes"][name] = self.stats["routes"].get(name, 0) + 1
+
+    # --- 业务模拟 ---
+    def dispatch(self, route, segments, query, body):
+        if self.validate and route.method in ("POST", "PUT", "PATCH"):
+            problem = self.check_body(route.body, body)
+            if problem:
+                return 400, {"code": 99992402, "msg": f"mock: field validation failed: {problem}"}
+
+        with self.lock:
+            records = self.store.setdefault(route.resource, {})
+            if route.role == "producer":
+                key = (route.resource, body.get("uuid")) if isinstance(body.get("uuid"), str) else None
+                new_id = self.idempotency.get(key) if key else None
+                if new_id is None:
+                    self.next_id += 1
+                    new_id = f"mock_{singular(route.resource)}_{self.next_id}"
+                    records[new_id] = dict(body)
+                    if key:
+                        self.idempotency[key] = new_id
+                return 200, self.respond(route, {**body, route.id_field: new_id})
+
+            if route.role == "list":
+                page_size = int((query.get("page_size") or [20])[0])
+                items = [{route.id_field: k, **v} for k, v in records.items()][:page_size]
+                return 200, self.respond(route, {"items": items, "has_more": len(records) > page_size,
+                                                 "page_token": ""})
+
+            if route.id_index is None:
+                return 200, self.respond(route, dict(body))
+
+            item_id = segments[route.id_index]
+            if route.resource in self.producers and item_id not in records:
+                return 404, {"code": 230001, "msg": f"mock: {route.resource} {item_id} not found"}
+            record = records.get(item_id, {})
+            if route.method == "DELETE":
+                records.pop(item_id, None)
+                return 200, self.respond(route, {})
+            if route.method in ("PUT", "PATCH") and route.segments[-1] == route.segments[route.id_index]:
+                record.update(body)
+            return 200, self.respond(route, {route.id_field: item_id, **record, **body})
+
+    def respond(self, route, data):
+        """以文档的响应体示例为底，覆盖本次请求相关的字段"""
+        example = copy.deepcopy(route.example) if isinstance(route.example, dict) else {}
+        base = example.get("data") if isinstance(example.get("data"), dict) else {}
+        example.update(code=0, msg=example.get("msg", "success"), data={**base, **data})
+        return example
+
+    @staticmethod
+    def check_body(spec_body, body):
+        for key, expected in spec_body.items():
+            if key not in body:
+                return f"缺少字段 {key}"
+            value = body[key]
+            if not is_placeholder(expected) and json_type(value) != json_type(expected):
+                return f"{key} 类型应为 {json_type(expected)}"
+            if isinstance(value, str) and len(value) > MAX_STRING_LENGTH:
+                return f"{key} 超过最大长度 {MAX_STRING_LENGTH}"
+        return None
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive，与 runtime 的连接池配合
+    # 响应头与响应体分两次写出，keep-alive 下 Nagle 会让每个响应多等约 40ms (延迟确认)
+    disable_nagle_algorithm = True
+    app = None
+
+    def _serve(self):
+        parts = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            status, headers, payload = 400, {}, {"code": 400, "msg": "mock: 请求体不是 JSON 对象"}
+        else:
+            status, headers, payload = self.app.handle(self.command, parts.path, parse_qs(parts.query), body)
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _serve
+
+    def log_message(self, format, *args):
+        pass
+
+
+def build_app(spec_path, docs_dir=None, **options):
+    resource_groups = cluster_resources(iter_spec(spec_path))
+    examples = load_doc_examples(docs_dir) if docs_dir else {}
+    return MockApp(resource_groups, examples, **options)
+
+
+def serve(app, host="127.0.0.1", port=18080):
+    """启动服务并返回 server；调用方负责 serve_forever() 或放到线程中运行"""
+    handler = type("BoundMockHandler", (MockHandler,), {"app": app})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_in_thread(app, host="127.0.0.1", port=0):
+    """在后台线程中启动 (port=0 时随机端口)，返回 (server, base_url)；用完调用 server.shutdown()"""
+    server = serve(app, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def rewrite_spec(spec_path, base_url, output):
+    """把接口定义中所有 URL 的 scheme + host 改写为 base_url，路径保持不变"""
+    apis = []
+    for api in iter_spec(spec_path):
+        parts = urlsplit(api['url'])
+        apis.append(dict(api, url=base_url.rstrip('/') + parts.path + (f"?{parts.query}" if parts.query else "")))
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(apis, f, indent=4, ensure_ascii=False)
+    return len(apis)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按接口定义启动本地 Mock 服务")
+    parser.add_argument("--spec", default="data.json", help="接口定义文件 (data.json / JSON Lines / OpenAPI)")
+    parser.add_argument("--docs", help="飞书导出的 Markdown 文档目录，用其中的响应体示例作为响应")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="每个请求的固定延迟 (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="在固定延迟上叠加 0~N ms 的均匀抖动")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回错误的比例 (0~1)")
+    parser.add_argument("--error-status", type=int, default=500, help="注入错误时的状态码")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="随机返回 429 的比例 (0~1)")
+    parser.add_argument("--retry-after", type=int, default=0, help="429 响应的 Retry-After (秒)")
+    parser.add_argument("--no-validate", action="store_true", help="不校验请求体字段")
+    parser.add_argument("--seed", type=int, default=0, help="延迟抖动 / 故障注入的随机种子")
+    parser.add_argument("--rewrite", metavar="OUTPUT", help="把接口定义的 host 改写为本服务地址后另存，然后退出")
+    args = parser.parse_args(argv)
+
+    base_url = f"http://{args.host}:{args.port}"
+    if args.rewrite:
+        count = rewrite_spec(args.spec, base_url, args.rewrite)
+        print(f"✅ [Mock] 已改写 {count} 条接口到 {base_url}: {args.rewrite}")
+        return 0
+
+    app = build_app(args.spec, args.docs, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                    error_rate=args.error_rate, error_status=args.error_status, rate_429=args.rate_429,
+                    retry_after=args.retry_after, validate=not args.no_validate, seed=args.seed)
+    server = serve(app, args.host, args.port)
+    routes = sum(len(r) for r in app.routes.values())
+    print(f"🧪 [Mock] {routes} 个接口已就绪: {base_url} (延迟 {args.latency_ms}ms±{args.jitter_ms}ms，"
+          f"5xx {args.error_rate:.0%}，429 {args.rate_429:.0%})")
+    print(f"   用法: SAAP_BASE_URL={base_url} python -m pytest test_final_suite.py；统计: {base_url}{STATS_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n📊 [Mock] 共 {app.stats['total']} 次请求，状态码分布: {app.stats['status']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+路由解析层：每个 URL 只解析一次，编译成路径模板并插入前缀树 (trie)。
+
+资源聚类、父子 (嵌套) 资源关系、生产者/消费者识别都基于同一份解析结果：
+- 路径参数 (:message_id) 只在 path 中识别，host 上的端口号不会被误判为参数
+- /chats/:chat_id/members/:member_id 这类「参数后跟的集合本身还有 :id 子路由」的路径识别为嵌套资源 members
+- /messages/:message_id/read_users 这类「参数后跟的动作路径」仍归属父资源 messages 的消费者
+"""
+import functools
+import re
+from urllib.parse import urlsplit
+
+VERSION_RE = re.compile(r'v\d+')
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+# 消费者上的 POST 动作: 以下动作只派生新资源 (回复 / 转发等)，不改变目标资源本身的状态
+DERIVING_ACTIONS = ("reply", "forward", "copy", "search", "query", "preview", "export")
+
+
+def is_param(segment):
+    return segment.startswith(':')
+
+
+def is_version(segment):
+    return VERSION_RE.match(segment) is not None
+
+
+def singular(name):
+    return name[:-1] if name.endswith('s') else name
+
+
+class Route:
+    """编译后的路由：origin + 路径段 + 参数位置"""
+    __slots__ = ("url", "origin", "path", "query", "segments", "param_positions")
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.url = url
+        self.origin = f"{parts.scheme}://{parts.netloc}" if parts.scheme else parts.netloc
+        self.path = parts.path
+        self.query = parts.query
+        self.segments = tuple(s for s in parts.path.split('/') if s)
+        self.param_positions = tuple(i for i, s in enumerate(self.segments) if is_param(s))
+
+    @property
+    def template(self):
+        return '/' + '/'.join(self.segments)
+
+    @property
+    def first_param(self):
+        return self.param_positions[0] if self.param_positions else None
+
+    @property
+    def collection_index(self):
+        """最后一个路径参数之前的集合段位置；无参数时为最后一段"""
+        if not self.param_positions:
+            return len(self.segments) - 1
+        return self.param_positions[-1] - 1
+
+    def name_at(self, index):
+        """index 处的集合名，跳过 v1/v2 版本段"""
+        if index < 0:
+            return self.origin.split('://')[-1] or "api"
+        name = self.segments[index]
+        if is_version(name):
+            return self.segments[index - 1] if index >= 1 else (self.origin.split('://')[-1] or "api")
+        return name
+
+    @property
+    def resource_hint(self):
+        """版本段之后的第一段 (如 /im/v1/messages/:id -> messages)，无版本段时取最后一段"""
+        for i, seg in enumerate(self.segments):
+            if is_version(seg) and i + 1 < len(self.segments):
+                return self.segments[i + 1]
+        return self.segments[-1] if self.segments else ""
+
+    def substitute(self, value_for):
+        """按位置替换路径参数，value_for(index, param) 返回 None 表示保持原样"""
+        segments = list(self.segments)
+        changed = False
+        for i in self.param_positions:
+            value = value_for(i, segments[i])
+            if value is not None:
+                segments[i] = value
+                changed = True
+        if not changed:
+            return self.url
+        path = '/' + '/'.join(segments) if segments else self.path
+        if self.path.endswith('/') and segments:
+            path += '/'
+        return self.origin + path + (f"?{self.query}" if self.query else "")
+
+
+@functools.lru_cache(maxsize=None)
+def parse_route(url):
+    return Route(url)
+
+
+class RouteNode:
+    __slots__ = ("children", "param", "methods")
+
+    def __init__(self):
+        self.children = {}
+        self.param = None
+        self.methods = set()
+
+    def child(self, segment, create=False):
+        if is_param(segment):
+            if self.param is None and create:
+                self.param = RouteNode()
+            return self.param
+        node = self.children.get(segment)
+        if node is None and create:
+            node = self.children[segment] = RouteNode()
+        return node
+
+
+class RouteIndex:
+    """
+    路由前缀树索引：接口逐条 add() 进来，聚类时只做树查询。
+    所有参数段共用一个通配子节点，因此 /messages/:message_id 与 /messages/:id 落在同一节点。
+    """
+
+    def __init__(self):
+        self.root = RouteNode()
+        self.entries = []
+        self.parents = {}
+
+    def add(self, api):
+        route = parse_route(api['url'])
+        node = self.root
+        for seg in route.segments:
+            node = node.child(seg, create=True)
+        node.methods.add(api['method'])
+        self.entries.append((route, api))
+        return route
+
+    def node_for(self, segments):
+        node = self.root
+        for seg in segments:
+            node = node.child(seg)
+            if node is None:
+                return None
+        return node
+
+    def is_nested_collection(self, route, index):
+        """参数之后的字面量段，且其下还挂有 :id 子路由 -> 嵌套资源集合"""
+        if index == 0 or not is_param(route.segments[index - 1]) or is_param(route.segments[index]):
+            return False
+        node = self.node_for(route.segments[:index + 1])
+        return node is not None and node.param is not None
+
+    def locate(self, route):
+        """返回 (资源名, 父资源名)"""
+        p = route.first_param
+        if p is None:
+            return route.name_at(len(route.segments) - 1), None
+        name, parent = route.name_at(p - 1), None
+        for i in range(p + 1, len(route.segments)):
+            if self.is_nested_collection(route, i):
+                name, parent = route.segments[i], name
+        return name, parent
+
+    def resource_groups(self):
+        """按接口首次出现顺序返回 {资源名: [api, ...]}，同时记录嵌套资源的父资源"""
+        groups = {}
+        located = [(self.locate(route), api) for route, api in self.entries]
+        top_level = {name for (name, parent), _ in located if parent is None}
+        for (name, parent), api in located:
+            if parent is not None:
+                if name in top_level:
+                    name = f"{parent}_{name}"
+                self.parents[name] = parent
+            groups.setdefault(name, []).append(api)
+        return groups
+
+
+def group_collection_index(api_group):
+    """组内所有路由共享同一个集合段，取各路由集合段位置的最大值即可定位 (含嵌套资源)"""
+    return max((parse_route(api['url']).collection_index for api in api_group), default=0)
+
+
+def classify_group(api_group):
+    """
+    识别资源组内接口的角色，返回 [(api, role)]，role 取值:
+    - "list":     集合级 GET (无参)
+    - "producer": 集合级 POST (排除 search / merge 等动作)
+    - "consumer": 集合之下带 :id 的路由
+    - None:       其它集合级操作，不参与编排
+    """
+    c = group_collection_index(api_group)
+    roles = []
+    for api in api_group:
+        route = parse_route(api['url'])
+        if any(i > c for i in route.param_positions):
+            role = "consumer"
+        elif api['method'] == 'GET':
+            role = "list"
+        elif api['method'] == 'POST' and "search" not in route.path and "merge" not in route.path:
+            role = "producer"
+        else:
+            role = None
+        roles.append((api, role))
+    return roles
+
+
+def is_read_only(api):
+    """只读接口不改变资源状态，可以共享同一个已生产的资源"""
+    return api['method'] in READ_ONLY_METHODS
+
+
+def consumer_effect(api):
+    """
+    消费者接口对目标资源的影响:
+    - "read":   只读 (GET / HEAD / OPTIONS)
+    - "derive": 派生新资源的 POST 动作 (如 /messages/:id/reply)，目标资源本身不变
+    - "delete": 删除
+    - "mutate": 其余 (PUT / PATCH、recall 等改变状态的 POST 动作)
+    """
+    if is_read_only(api):
+        return "read"
+    if api['method'] == 'DELETE':
+        return "delete"
+    route = parse_route(api['url'])
+    action = route.segments[-1] if route.segments and not is_param(route.segments[-1]) else None
+    if api['method'] == 'POST' and action in DERIVING_ACTIONS:
+        return "derive"
+    return "mutate"
+
+
+def is_state_neutral(api):
+    """不改变目标资源状态的接口，其变异用例可以共用同一个已生产的资源"""
+    return consumer_effect(api) in ("read", "derive")
+
+
+def bind_path_params(url, collection_index, item_var=None):
+    """
+    把路径参数替换为变量引用：
+    - 集合之后的参数 -> $item_var (未给出时保持原样)
+    - 集合之前的父资源参数 -> $auto_<父资源单数>_id
+    """
+    route = parse_route(url)
+
+    def value_for(i, param):
+        if i > collection_index:
+            return f"${item_var}" if item_var else None
+        return f"$auto_{singular(route.name_at(i - 1))}_id"
+
+    return route.substitute(value_for)
+
+
+def fill_path_params(url, value):
+    """所有路径参数替换为同一个字面值 (如不存在的资源 ID)"""
+    return parse_route(url).substitute(lambda i, param: value)
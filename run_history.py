@@ -0,0 +1,300 @@
+"""
+运行历史：SQLite 按场景规范化指纹 (fingerprint.py) 记录每次执行的结果、耗时与响应结构指纹。
+
+两种用法:
+- 失败优先 (--history-order): 最近失败过的场景最先执行，其次是新增 / 改动过的场景 (没有历史)，
+  其余按历史耗时降序 —— 慢场景先起跑，尽早拿到信号
+- 跳过未变化 (--history-skip HOURS): 定义未变化 (指纹相同) 且最近 HOURS 小时内通过过的场景不再执行
+
+场景定义 (含其依赖的上游 provider) 一旦改动，指纹随之变化，历史自然失效；
+响应结构指纹与上次通过时不同会给出提示 (接口可能变更)。
+
+作为 pytest 插件使用 (render / runtime 两种模式、增量产出均适用):
+    python -m pytest -p run_history test_final_suite.py --history-order
+    python -m pytest -p run_history test_final_suite.py --history-skip 24
+async_runner.py 通过 --history / --history-order / --history-skip 使用同一个库。
+"""
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import runtime
+from build_cache import SCENARIO_DIR, content_hash
+from fingerprint import case_fingerprint, scenario_fingerprint
+
+DEFAULT_DB = ".saap_history.sqlite"
+RECENT_RUNS = 5     # 失败优先只看最近几次执行
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL,
+    name TEXT NOT NULL,
+    ok INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    response_fp TEXT,
+    error TEXT,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_fp_ts ON runs (fingerprint, ts);
+"""
+
+
+class RunHistory:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def record(self, fingerprint, name, ok, duration, response_fp=None, error=None):
+        """写入一次执行结果；返回上一次通过时的响应指纹 (用于提示响应结构变化)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response_fp FROM runs WHERE fingerprint = ? AND ok = 1 ORDER BY ts DESC LIMIT 1",
+                (fingerprint,)).fetchone()
+            self.conn.execute(
+                "INSERT INTO runs (fingerprint, name, ok, duration, response_fp, error, ts) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (fingerprint, name, int(ok), duration, response_fp, (error or "")[:2000] or None, time.time()))
+            self.conn.commit()
+        return row[0] if row else None
+
+    def stats(self, fingerprints):
+        """{指纹: {runs, recent_failures, last_failure, last_pass, mean_duration}}；没有历史的指纹不出现"""
+        result = {}
+        with self.lock:
+            for fp in dict.fromkeys(fingerprints):
+                rows = self.conn.execute("SELECT ok, duration, ts FROM runs WHERE fingerprint = ? ORDER BY ts DESC",
+                                         (fp,)).fetchall()
+                if not rows:
+                    continue
+                result[fp] = {
+                    "runs": len(rows),
+                    "recent_failures": sum(1 for ok, _, _ in rows[:RECENT_RUNS] if not ok),
+                    "last_failure": next((ts for ok, _, ts in rows if not ok), None),
+                    "last_pass": next((ts for ok, _, ts in rows if ok), None),
+                    "mean_duration": sum(d for _, d, _ in rows[:RECENT_RUNS]) / min(len(rows), RECENT_RUNS),
+                }
+        return result
+
+    def priority(self, fingerprints):
+        """返回排序函数: 最近失败 -> 没有历史 -> 历史耗时降序"""
+        stats = self.stats(fingerprints)
+
+        def key(fp):
+            s = stats.get(fp)
+            if s is None:
+                return (1, 0.0, 0.0)
+            if s["recent_failures"]:
+                return (0, -s["recent_failures"], -(s["last_failure"] or 0.0))
+            return (2, -s["mean_duration"], 0.0)
+
+        return key
+
+    def passed_within(self, fingerprints, seconds):
+        """最近 seconds 秒内通过过、且之后没有再失败的指纹"""
+        cutoff = time.time() - seconds
+        return {fp for fp, s in self.stats(fingerprints).items()
+                if s["last_pass"] and s["last_pass"] >= cutoff and (s["last_failure"] or 0.0) < s["last_pass"]}
+
+
+# ========== 场景 -> 测试名 ==========
+
+def history_key(fingerprint, scenario, provider_keys):
+    """历史记录键：自身指纹 + 所需上游 provider 的键；不依赖上游时即为自身指纹"""
+    upstream = sorted(provider_keys.get(name, name) for name in set((scenario.get("requires") or {}).values()))
+    return content_hash(fingerprint, upstream) if upstream else fingerprint
+
+
+def provider_keys(scenarios):
+    """{provider 名: 历史记录键}，provider 自身的上游 (间接依赖) 一并计入"""
+    providers = {s["scenario_name"]: s for s in scenarios if runtime.is_provider(s)}
+    keys = {}
+
+    def visit(name):
+        if name not in keys:
+            provider = providers[name]
+            for up in (provider.get("requires") or {}).values():
+                if up in providers:
+                    visit(up)
+            keys[name] = history_key(scenario_fingerprint(provider), provider, keys)
+
+    for name in providers:
+        visit(name)
+    return keys
+
+
+def test_fingerprints(scenarios):
+    """{测试名: 历史记录键}；测试名与 pytest 中的函数名 / 批次用例方法名 / runtime 模式参数化 ID 一致"""
+    keys = provider_keys(scenarios)
+    mapping = {}
+    for s in scenarios:
+        if s.get("scenario_type") == "provider":
+            continue
+        if "cases" in s:
+            for c in s["cases"]:
+                mapping[c["case_name"]] = history_key(case_fingerprint(c), s, keys)
+        else:
+            mapping[s["scenario_name"]] = history_key(scenario_fingerprint(s), s, keys)
+    return mapping
+
+
+def load_scenarios(paths=None):
+    """默认读取 scenarios.json 与增量模式的 scenarios/<资源>.json"""
+    if not paths:
+        paths = [p for p in [os.environ.get("SAAP_SCENARIOS") or "scenarios.json"] if os.path.exists(p)]
+        paths += sorted(glob.glob(os.path.join(SCENARIO_DIR, "*.json")))
+    scenarios = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            scenarios.extend(json.load(f))
+    return scenarios
+
+
+def response_fingerprint(names):
+    """合并若干场景 / 用例在本次执行中的响应结构指纹 (runtime 开启响应收集时才有)"""
+    shapes = [runtime.pop_responses(n) for n in names]
+    return content_hash(shapes) if any(shapes) else None
+
+
+# ========== 场景级 (async_runner) ==========
+
+def plan_scenarios(history, scenarios, order=False, skip_seconds=None):
+    """
+    返回 (待执行场景, 跳过的场景名)；provider 不记录历史，只保留仍被 (直接或间接) 依赖的那些。
+    排序在 async_runner 的同一 DAG 层内生效：先起跑的场景先拿到并发名额。
+    """
+    runnable = [s for s in scenarios if not runtime.is_provider(s)]
+    keys = provider_keys(scenarios)
+    fps = {s["scenario_name"]: history_key(scenario_fingerprint(s), s, keys) for s in runnable}
+    skipped = []
+    if skip_seconds:
+        passed = history.passed_within(fps.values(), skip_seconds)
+        skipped = [s["scenario_name"] for s in runnable if fps[s["scenario_name"]] in passed]
+        runnable = [s for s in runnable if fps[s["scenario_name"]] not in passed]
+    if order:
+        key = history.priority(fps.values())
+        runnable.sort(key=lambda s: key(fps[s["scenario_name"]]))
+
+    providers = {s["scenario_name"]: s for s in scenarios if runtime.is_provider(s)}
+    needed, stack = set(), [up for s in runnable for up in (s.get("requires") or {}).values()]
+    while stack:
+        name = stack.pop()
+        if name in providers and name not in needed:
+            needed.add(name)
+            stack.extend((providers[name].get("requires") or {}).values())
+    return [s for s in scenarios if s["scenario_name"] in needed] + runnable, skipped
+
+
+def record_results(history, scenarios, results):
+    """写入 async_runner 的执行结果；返回响应结构与上次通过时不同的场景名"""
+    changed = []
+    keys = provider_keys(scenarios)
+    for s, r in zip(scenarios, results):
+        if runtime.is_provider(s):
+            runtime.pop_responses(s["scenario_name"])
+            continue
+        names = [s["scenario_name"]] + [c["case_name"] for c in s.get("cases", [])]
+        response_fp = response_fingerprint(names)
+        key = history_key(scenario_fingerprint(s), s, keys)
+        previous = history.record(key, s["scenario_name"], r["ok"], r["duration"], response_fp, r["error"])
+        if r["ok"] and previous and response_fp and previous != response_fp:
+            changed.append(s["scenario_name"])
+    return changed
+
+
+# ========== pytest 插件 ==========
+
+def pytest_addoption(parser):
+    group = parser.getgroup("run_history", "场景运行历史")
+    group.addoption("--history-db", default=DEFAULT_DB, help="运行历史 SQLite 文件")
+    group.addoption("--history-order", action="store_true", help="最近失败 / 新增改动 / 慢场景优先执行")
+    group.addoption("--history-skip", type=float, metavar="HOURS",
+                    help="跳过定义未变化且最近 HOURS 小时内通过过的场景")
+    group.addoption("--history-scenarios", action="append", metavar="PATH",
+                    help="场景文件 (默认 scenarios.json 与 scenarios/*.json)")
+
+
+def _test_name(item):
+    callspec = getattr(item, "callspec", None)
+    return callspec.id if callspec is not None else item.name
+
+
+class HistoryPlugin:
+    def __init__(self, config):
+        self.config = config
+        self.history = RunHistory(config.getoption("history_db"))
+        self.fingerprints = test_fingerprints(load_scenarios(config.getoption("history_scenarios")))
+        self.items = {}
+        self.results = {}
+        self.changed = []
+
+    def fingerprint(self, item):
+        return self.fingerprints.get(_test_name(item))
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        known = [fp for fp in map(self.fingerprint, items) if fp]
+        hours = config.getoption("history_skip")
+        if hours:
+            passed = self.history.passed_within(known, hours * 3600)
+            skipped = [item for item in items if self.fingerprint(item) in passed]
+            if skipped:
+                items[:] = [item for item in items if self.fingerprint(item) not in passed]
+                config.hook.pytest_deselected(items=skipped)
+                print(f"\n⏭️ [History] {len(skipped)} 个场景定义未变化且 {hours:g} 小时内通过过，已跳过")
+        if config.getoption("history_order"):
+            key = self.history.priority(known)
+            # 同一批次类的用例保持相邻，类的位置取其中优先级最高的用例
+            class_rank = {}
+            for item in items:
+                fp = self.fingerprint(item)
+                rank = key(fp) if fp else (1, 0.0, 0.0)
+                owner = item.cls or item
+                class_rank[owner] = min(class_rank.get(owner, rank), rank)
+            order = {id(item): i for i, item in enumerate(items)}
+            items.sort(key=lambda item: (class_rank[item.cls or item], order[id(item)]))
+
+    def pytest_collection_finish(self, session):
+        runtime.configure_response_log(True)
+        self.items = {item.nodeid: item for item in session.items}
+
+    def pytest_runtest_logreport(self, report):
+        entry = self.results.setdefault(report.nodeid, {"ok": True, "skipped": False, "duration": 0.0, "error": None})
+        entry["duration"] += report.duration
+        if report.skipped:
+            entry["skipped"] = True
+        elif report.failed:
+            entry["ok"] = False
+            lines = report.longreprtext.strip().splitlines()
+            entry["error"] = entry["error"] or (lines[-1] if lines else report.when)
+
+    def pytest_runtest_logfinish(self, nodeid, location):
+        item = self.items.get(nodeid)
+        entry = self.results.pop(nodeid, None)
+        fp = self.fingerprint(item) if item is not None else None
+        if fp is None or entry is None or entry["skipped"]:
+            return
+        name = _test_name(item)
+        response_fp = response_fingerprint([name])
+        previous = self.history.record(fp, name, entry["ok"], entry["duration"], response_fp, entry["error"])
+        if entry["ok"] and previous and response_fp and previous != response_fp:
+            self.changed.append(name)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.changed:
+            terminalreporter.write_line(f"⚠️ [History] {len(self.changed)} 个场景的响应结构与上次通过时不同 "
+                                        f"(接口可能变更): {', '.join(self.changed[:10])}")
+
+    def pytest_unconfigure(self, config):
+        self.history.close()
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(HistoryPlugin(config), "run_history_plugin")
@@ -0,0 +1,799 @@
+"""
+SAAP 运行时支撑库：由生成的测试脚本 import 使用。
+
+- 集中管理整个测试会话共享的 HTTP 连接池 (keep-alive)，避免每个 Step 都重新建立 TCP/TLS 连接
+- 所有请求经过 throttle 节流层 (令牌桶 + Retry-After + 指数退避)
+- 占位符注入 / 智能断言 / 变量提取的唯一实现，渲染脚本与解释执行共用；每个响应只解码一次 (extractor.py)
+- 提供 Step 执行器，可脱离渲染脚本直接解释 scenarios.json
+- 可选的延迟采集：每次 HTTP 请求追加一行 JSON 到 latency.jsonl，由 latency_report.py 汇总
+- 占位符取值来自按种子批量预生成的数据池 (Faker 懒加载)，种子随运行打印，SAAP_SEED 可精确复现
+"""
+import copy
+import functools
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from extractor import MISSING, compile_path, loads
+from throttle import Throttle, endpoint_key
+
+# --- 默认连接池配置 (generator.py 中的 HTTP_CONFIG 会覆盖) ---
+DEFAULT_HTTP_CONFIG = {
+    "pool_connections": 10,     # 缓存的 host 连接池数量
+    "pool_maxsize": 20,         # 单个 host 的最大连接数
+    "pool_block": False,        # 连接池满时是否阻塞等待
+    "max_retries": 2,           # 连接级重试次数 (连接失败/读超时)
+    "backoff_factor": 0.3,      # 重试退避因子
+    "status_forcelist": [502, 503, 504],  # 仅对幂等方法按状态码重试
+}
+
+_http_config = dict(DEFAULT_HTTP_CONFIG)
+_session = None
+
+
+def build_session(config=None):
+    """按配置构造一个带连接池与重试适配器的 requests.Session"""
+    cfg = dict(DEFAULT_HTTP_CONFIG)
+    cfg.update(config or {})
+
+    # 限流 (429 / Retry-After) 只交给 throttle 处理：适配器内部重试会绕过 max_attempts、deadline、
+    # 令牌桶与逐次延迟记录，因此既不按 Retry-After 重试，也不把 429 列入按状态码重试
+    retry = Retry(
+        total=cfg["max_retries"],
+        backoff_factor=cfg["backoff_factor"],
+        status_forcelist=[s for s in cfg["status_forcelist"] if s != 429],
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=cfg["pool_connections"],
+        pool_maxsize=cfg["pool_maxsize"],
+        pool_block=cfg["pool_block"],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure_http(**overrides):
+    """更新连接池配置；已存在的会话会被关闭，下次 get_session() 时按新配置重建"""
+    unknown = set(overrides) - set(DEFAULT_HTTP_CONFIG)
+    if unknown:
+        raise ValueError(f"未知的 HTTP 配置项: {sorted(unknown)}")
+    _http_config.update(overrides)
+    close_session()
+
+
+def get_session():
+    """获取进程内共享的会话 (懒加载)"""
+    global _session
+    if _session is None:
+        _session = build_session(_http_config)
+    return _session
+
+
+def close_session():
+    global _session
+    if _session is not None:
+        _session.close()
+        _session = None
+
+
+_throttle = Throttle()
+
+
+def configure_throttle(config):
+    """按资源配置节流策略，见 throttle.DEFAULT_POLICY"""
+    _throttle.configure(config)
+
+
+# --- 延迟采集: 环境变量 SAAP_LATENCY_LOG 优先于生成时配置，路径为空则关闭 ---
+LATENCY_ENV = "SAAP_LATENCY_LOG"
+
+
+class LatencySink:
+    """线程安全的 JSON Lines 追加写入；行缓冲，多进程 (xdist) 追加同一文件时每行一次 write"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fp = None
+        self.lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self.lock:
+            if self.fp is None:
+                parent = os.path.dirname(self.path)
+                if parent:
+                    os.makedirs(parent, exist_ok=True)
+                self.fp = open(self.path, 'a', encoding='utf-8', buffering=1)
+            self.fp.write(line)
+
+    def close(self):
+        with self.lock:
+            if self.fp is not None:
+                self.fp.close()
+                self.fp = None
+
+
+_latency_sink = None
+
+
+def configure_latency(path=None, sink=None):
+    """sink 可替换为任意带 write(record) / close() 的对象 (如 load_runner 的内存汇总)"""
+    global _latency_sink
+    close_latency()
+    path = os.environ.get(LATENCY_ENV, path)
+    _latency_sink = sink or (LatencySink(path) if path else None)
+
+
+def close_latency():
+    if _latency_sink is not None:
+        _latency_sink.close()
+
+
+# --- 目标地址改写: 环境变量 SAAP_BASE_URL 优先，把请求的 scheme + host 换成给定地址 (如本地 mock_server) ---
+BASE_URL_ENV = "SAAP_BASE_URL"
+_base_url = os.environ.get(BASE_URL_ENV) or None
+
+
+def configure_base_url(base_url=None):
+    global _base_url
+    _base_url = os.environ.get(BASE_URL_ENV, base_url) or None
+
+
+def rebase_url(url):
+    if not _base_url:
+        return url
+    parts = urlsplit(url)
+    return _base_url.rstrip('/') + parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+# --- 响应结构收集 (默认关闭): 按场景 / 用例名记录每个请求的 (接口, 状态码, JSON 结构)，供 run_history 比对 ---
+_responses = None
+_responses_lock = threading.Lock()
+
+
+def configure_response_log(enabled=True):
+    global _responses
+    with _responses_lock:
+        if not enabled:
+            _responses = None
+        elif _responses is None:
+            _responses = {}
+
+
+def json_shape(value):
+    """只保留结构：字典的键 (递归)、列表首元素的结构、标量的类型名"""
+    if isinstance(value, dict):
+        return {k: json_shape(v) for k, v in sorted(value.items())}
+    if isinstance(value, list):
+        return [json_shape(value[0])] if value else []
+    return type(value).__name__
+
+
+def record_response(ctx, endpoint, response):
+    if _responses is None or ctx is None:
+        return
+    try:
+        shape = json_shape(response_json(response))
+    except ValueError:
+        shape = None
+    with _responses_lock:
+        _responses.setdefault(ctx.scenario_name, []).append([endpoint, response.status_code, shape])
+
+
+def pop_responses(scenario_name):
+    if _responses is None:
+        return []
+    with _responses_lock:
+        return _responses.pop(scenario_name, [])
+
+
+# --- 测试数据: 环境变量 SAAP_SEED 优先；未指定时每次运行随机选取 (xdist 各 worker 共用同一个) 并打印 ---
+SEED_ENV = "SAAP_SEED"
+POOL_SIZE = 512     # 每个类别一次预生成的数量
+
+# 类别 -> 生成函数 (参数为按 种子 + 类别 播种后的 Faker)
+POOL_FACTORIES = {
+    "email": lambda f: f.email(),
+    "phone": lambda f: f"+8613{f.numerify('#########')}",
+    "url": lambda f: f.url(),
+    "ip": lambda f: f.ipv4(),
+    "name": lambda f: f.word(),
+    "content": lambda f: f.pystr(min_chars=8, max_chars=16),
+}
+
+_data_seed = None
+_pools = {}
+_scenario_runs = {}
+_data_lock = threading.Lock()
+
+
+def _default_seed():
+    # pytest-xdist 的各 worker 共享同一个运行 ID，由它派生种子保证整个会话一致
+    run_id = os.environ.get("PYTEST_XDIST_TESTRUNUID")
+    if run_id:
+        return int(hashlib.sha256(run_id.encode()).hexdigest()[:8], 16) % 10 ** 9
+    return random.SystemRandom().randrange(10 ** 9)
+
+
+def configure_data_seed(seed=None):
+    """设置测试数据种子并清空已生成的数据池；返回实际使用的种子"""
+    global _data_seed
+    env = os.environ.get(SEED_ENV)
+    with _data_lock:
+        _data_seed = int(env) if env else (seed if seed is not None else _default_seed())
+        _pools.clear()
+        _scenario_runs.clear()
+    return _data_seed
+
+
+def data_seed():
+    if _data_seed is None:
+        configure_data_seed()
+    return _data_seed
+
+
+def seed_banner():
+    seed = data_seed()
+    return f"🎲 测试数据种子: {seed} (复现: {SEED_ENV}={seed})"
+
+
+@functools.lru_cache(maxsize=None)
+def _faker():
+    from faker import Faker  # 懒加载：没有占位符需要生成时不付出导入与实例化的开销
+    return Faker("zh_CN")
+
+
+def _pool(category):
+    pool = _pools.get(category)
+    if pool is None:
+        seed = data_seed()
+        with _data_lock:
+            pool = _pools.get(category)
+            if pool is None:
+                faker = _faker()
+                faker.seed_instance(f"{seed}:{category}")
+                factory = POOL_FACTORIES[category]
+                pool = _pools[category] = [factory(faker) for _ in range(POOL_SIZE)]
+    return pool
+
+
+def _pick(category, ctx):
+    pool = _pool(category)
+    return pool[ctx.rng.randrange(len(pool))]
+
+
+def scenario_rng(scenario_name):
+    """同一种子下，同名场景第 n 次执行的随机流固定，单独重跑失败场景时取值与整轮运行时一致"""
+    seed = data_seed()
+    with _data_lock:
+        run = _scenario_runs.get(scenario_name, 0)
+        _scenario_runs[scenario_name] = run + 1
+    return random.Random(f"{seed}:{scenario_name}:{run}")
+
+
+# ==========================================================
+# Step 执行器：与 template_scenario.j2 中单个 Step 的逻辑一致，
+# 供非渲染模式 (如 async_runner) 直接解释 scenarios.json 使用
+# ==========================================================
+
+# --- 全局配置: 可容忍的错误码 ---
+IGNORED_ERROR_CODES = [
+    401, 403, 429, 230027, 230003, 99991663,
+    "PERMISSION_DENIED", "ACCESS_LIMIT_REACHED", 2005005
+]
+SUCCESS_CODES = (200, 201, 204)
+NO_PROXY = {"http": None, "https": None}
+
+# 并发模式下关闭逐步打印，避免多场景日志交错
+VERBOSE = True
+
+
+def log(msg):
+    if VERBOSE:
+        print(msg)
+
+
+class ScenarioContext:
+    """单个场景的执行上下文：变量池 + 幂等 UUID"""
+
+    def __init__(self, scenario_name="", description="", resource="default", scenario_type=None):
+        self.scenario_name = scenario_name
+        self.description = description
+        self.resource = resource
+        self.scenario_type = scenario_type
+        self.vars_pool = {}
+        self.temp_uuid = None
+        self._rng = None
+
+    @property
+    def rng(self):
+        """场景自己的随机流：由数据种子 + 场景名 (+ 同名第几次执行) 决定，与其它场景的执行顺序无关"""
+        if self._rng is None:
+            self._rng = scenario_rng(self.scenario_name)
+        return self._rng
+
+    @classmethod
+    def from_scenario(cls, scenario):
+        return cls(scenario["scenario_name"], scenario.get("description", ""),
+                   scenario.get("resource", "default"), scenario.get("scenario_type"))
+
+    def fork(self, scenario_name, description, scenario_type=None):
+        """批次内单个用例的上下文：继承 setup 提取的变量，用例间互不影响；用例可声明自己的场景类型"""
+        ctx = ScenarioContext(scenario_name, description, self.resource, scenario_type or self.scenario_type)
+        ctx.vars_pool = dict(self.vars_pool)
+        return ctx
+
+
+# ==========================================================
+# 占位符注入：字段名 -> 生成器 的分派表
+# 规则只在首次遇到某个字段名时匹配一次，之后按 body 形状缓存整张注入计划
+# ==========================================================
+
+# 变异标记 / 幂等标记：值 -> 处理函数
+def _mark_overflow(ctx):
+    return "A" * 2048
+
+
+def _mark_wrong_type(ctx):
+    return 123456
+
+
+def _mark_generate_uuid(ctx):
+    ctx.temp_uuid = str(uuid.uuid4())
+    log(f"     🧩 生成UUID: {ctx.temp_uuid}")
+    return ctx.temp_uuid
+
+
+def _mark_reuse_uuid(ctx):
+    log(f"     🧩 复用UUID: {ctx.temp_uuid}")
+    return ctx.temp_uuid
+
+
+MARKERS = {
+    "__OVERFLOW__": _mark_overflow,
+    "__WRONG_TYPE__": _mark_wrong_type,
+    "GENERATE_UUID": _mark_generate_uuid,
+    "reuse_uuid_from_step_1": _mark_reuse_uuid,
+}
+
+
+# raw_data / Auto_ 占位符：按字段名选择生成器，取值来自按种子预生成的数据池 + 场景自己的随机流
+def _gen_email(k, ctx):
+    return _pick("email", ctx)
+
+
+def _gen_phone(k, ctx):
+    return _pick("phone", ctx)
+
+
+def _gen_url(k, ctx):
+    return _pick("url", ctx)
+
+
+def _gen_ip(k, ctx):
+    return _pick("ip", ctx)
+
+
+def _gen_name(k, ctx):
+    return f"Auto_{_pick('name', ctx)}_{ctx.rng.randint(1, 999)}"
+
+
+def _gen_user_id(k, ctx):
+    return "ou_generic_user_id"
+
+
+def _gen_content(k, ctx):
+    return json.dumps({"text": f"Auto_Content_{_pick('content', ctx)}"})
+
+
+def _gen_priority(k, ctx):
+    return ctx.rng.randint(2, 100)
+
+
+def _gen_default(k, ctx):
+    return f"Auto_{k}_{ctx.rng.randrange(10 ** 10)}"
+
+
+# 按优先级排列，命中第一条即停止 (顺序即原 if/elif 链的顺序)
+PLACEHOLDER_RULES = (
+    (lambda key: "email" in key, _gen_email),
+    (lambda key: "phone" in key or "mobile" in key, _gen_phone),
+    (lambda key: "url" in key or "link" in key, _gen_url),
+    (lambda key: "ip" in key, _gen_ip),
+    (lambda key: "name" in key or "title" in key, _gen_name),
+    (lambda key: "id" in key and "user" in key, _gen_user_id),
+    (lambda key: "content" in key or "json" in key or "config" in key, _gen_content),
+    (lambda key: "priority" in key, _gen_priority),
+)
+
+# params 中这些可选字段如果仍是 raw_data 占位，直接不传，避免字段校验失败 (99992402)
+OPTIONAL_PARAM_KEYS = ("page_size", "page_token", "sort_type", "start_time", "end_time")
+
+
+@functools.lru_cache(maxsize=None)
+def _generator_for(key):
+    key_lower = key.lower()
+    for match, gen in PLACEHOLDER_RULES:
+        if match(key_lower):
+            return gen
+    return _gen_default
+
+
+@functools.lru_cache(maxsize=None)
+def _dispatch_table(shape, is_params):
+    """按 body 形状 (字段名元组) 编译注入计划: [(key, 生成器, 是否为可丢弃的可选参数)]"""
+    return tuple(
+        (k, _generator_for(k), is_params and any(opt in k.lower() for opt in OPTIONAL_PARAM_KEYS))
+        for k in shape
+    )
+
+
+def smart_inject(d, ctx, is_params=False):
+    """
+    对 body / params 做智能注入 (原地修改并返回):
+    - 处理 GENERATE_UUID / 变异标记
+    - 处理 raw_data:xxx / Auto_ 占位符
+    - 对 params 中的一些 raw_data 可选字段直接删除
+    """
+    if not isinstance(d, dict):
+        return d
+
+    keys_to_delete = []
+    for k, gen, optional in _dispatch_table(tuple(d), is_params):
+        v = d[k]
+        if isinstance(v, dict):
+            smart_inject(v, ctx, is_params=is_params)
+        elif isinstance(v, list):
+            for item in v:
+                if isinstance(item, dict):
+                    smart_inject(item, ctx, is_params=is_params)
+        elif not isinstance(v, str):
+            continue
+        elif v in MARKERS:
+            d[k] = MARKERS[v](ctx)
+        elif "raw_data" in v or "Auto_" in v:
+            if optional and v.startswith("raw_data:"):
+                keys_to_delete.append(k)
+            else:
+                d[k] = gen(k, ctx)
+
+    for k in keys_to_delete:
+        d.pop(k, None)
+    return d
+
+
+def substitute_vars(url, body, vars_pool):
+    """把变量池中的值替换进 URL 的 $var、body 顶层的 "$var" 字段 (跨资源依赖绑定) 以及 body 列表里的 "$var" """
+    for k, v in vars_pool.items():
+        if f"${k}" in url:
+            url = url.replace(f"${k}", str(v))
+            log(f"     🔄 替换URL: ${k} -> {v}")
+
+    for k, v in list(body.items()):
+        if isinstance(v, str) and v.startswith("$") and v[1:] in vars_pool:
+            body[k] = vars_pool[v[1:]]
+            log(f"     🔄 字段注入: {k} = {v} -> {body[k]}")
+        elif isinstance(v, list):
+            final_list = []
+            for item in v:
+                if isinstance(item, str) and item.startswith("$") and item[1:] in vars_pool:
+                    value = vars_pool[item[1:]]
+                    if isinstance(value, list):   # 通配提取出的列表变量在列表中展开
+                        final_list.extend(value)
+                    else:
+                        final_list.append(value)
+                    log(f"     🔄 列表注入: {item} -> {vars_pool[item[1:]]}")
+                else:
+                    final_list.append(item)
+            body[k] = final_list
+    return url, body
+
+
+def send(method, url, headers, body, params, resource="default", endpoint=None, ctx=None, expected_fail=False):
+    """
+    通过共享连接池发送请求，由节流层负责限速与重试：
+    - 429 遵循 Retry-After / 限流头，否则指数退避
+    - 正向用例中 GET 的 404 视为数据尚未同步，同样退避重试 (最终一致性轮询)；
+      逆向用例 (如资源不存在测试) 的 404 正是预期结果，不重试
+    - 开启延迟采集时，每次实际发出的请求 (含重试) 记录一行
+    """
+    http = get_session()
+    endpoint = endpoint or endpoint_key(method, url)
+    url = rebase_url(url)
+    retry_statuses = (429, 404) if method == "GET" and not expected_fail else (429,)
+    attempts = [0]
+
+    def request():
+        sink = _latency_sink
+        if sink is None:
+            return http.request(method, url=url, headers=headers, json=body, params=params, proxies=NO_PROXY)
+        attempts[0] += 1
+        ts = time.time()
+        started = time.perf_counter()
+        response = http.request(method, url=url, headers=headers, json=body, params=params, proxies=NO_PROXY)
+        sink.write({
+            "ts": round(ts, 6),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+            "method": method,
+            "endpoint": endpoint,
+            "resource": resource,
+            "scenario": ctx.scenario_name if ctx else None,
+            "scenario_type": ctx.scenario_type if ctx else None,
+            "status": response.status_code,
+            "bytes": len(response.content),
+            "attempt": attempts[0],
+        })
+        return response
+
+    def on_retry(response, attempt, delay):
+        if response.status_code == 404:
+            log(f"     ⏳ 数据可能尚未同步，{delay:.2f}s 后重试 (第 {attempt} 次)...")
+        else:
+            log(f"     🚦 触发限流 (429)，{delay:.2f}s 后重试 (第 {attempt} 次)...")
+
+    response = _throttle.call(request, resource, endpoint, retry_statuses, on_retry)
+    record_response(ctx, endpoint, response)
+    return response
+
+
+def response_json(response):
+    """每个响应只解码一次 (可选 orjson)，结果缓存在响应对象上供断言 / 一致性校验 / 提取共用；非 JSON 抛 ValueError"""
+    cached = response.__dict__.get("_saap_json", MISSING)
+    if cached is MISSING:
+        try:
+            cached = loads(response.content)
+        except ValueError as e:
+            cached = e
+        response._saap_json = cached
+    if isinstance(cached, ValueError):
+        raise cached
+    return cached
+
+
+def is_expected_fail(step, ctx):
+    return "❌" in step.get("description", "") or "❌" in ctx.description or "iso" in ctx.scenario_name
+
+
+def verify_response(response, expected_fail):
+    """智能断言：逆向用例只告警，正向用例对非白名单错误码断言失败"""
+    if expected_fail:
+        if response.status_code in SUCCESS_CODES:
+            log("     ⚠️ 警告: 逆向用例返回了成功 (可能校验宽松)")
+        else:
+            log(f"     ✅ 符合预期: 请求被拒绝 (Code {response.status_code})")
+        return False
+
+    if response.status_code in SUCCESS_CODES:
+        return True
+    try:
+        err_data = response_json(response)
+        err_code = err_data.get("code") or err_data.get("status") or response.status_code
+        err_msg = err_data.get("msg") or response.text
+    except Exception:
+        log(f"❌ 失败 (非JSON响应): {response.text}")
+        raise AssertionError(f"HTTP {response.status_code}: {response.text} ({SEED_ENV}={data_seed()})")
+    if err_code in IGNORED_ERROR_CODES:
+        log(f"     ⚠️ 警告: 环境/权限限制 (Code {err_code}) - {err_msg}")
+        return False
+    log(f"❌ 失败: {response.text}")
+    raise AssertionError(f"HTTP {response.status_code}: {response.text} ({SEED_ENV}={data_seed()})")
+
+
+def check_consistency(response, body):
+    """深度数据一致性校验：请求字段与响应 data 中同名字段比对 (只告警)"""
+    try:
+        resp_json = response_json(response)
+        if isinstance(resp_json, dict) and ("data" in resp_json or "body" in resp_json):
+            resp_data = resp_json.get("data") or resp_json.get("body") or resp_json
+            for k, v in body.items():
+                if k in resp_data and isinstance(v, (str, int)) and "Auto_" not in str(v) and "__" not in str(v):
+                    if str(resp_data[k]) != str(v):
+                        log(f"     ⚠️ 数据一致性风险: 请求 {k}={v}, 响应={resp_data[k]}")
+                    else:
+                        log(f"     ✅ 数据验证通过: {k}={v}")
+    except Exception:
+        pass
+
+
+def extract_vars(response, extracts, vars_pool):
+    """按编译后的路径 (下标 / 通配 / 默认值，见 extractor.py) 从响应中提取变量写入变量池"""
+    try:
+        payload = response_json(response)
+    except ValueError:
+        return
+    for var, path in extracts.items():
+        accessor = compile_path(path)
+        val = accessor(payload)
+        if isinstance(val, (str, int, float, list)) and (val or accessor.has_default):
+            vars_pool[var] = val
+            log(f"     ✅ 提取成功: ${var} = {val}")
+        else:
+            log(f"     ⚠️ 未提取到 ${var} (路径 {path})")
+
+
+def run_step(step, ctx):
+    """执行单个 Step；step 来自 scenarios.json，不会被修改"""
+    log(f"  👉 Step: {step['method']} - {step['url']}")
+    body = copy.deepcopy(step.get("body") or {})
+    params = copy.deepcopy(step.get("params") or {})
+    headers = dict(step.get("headers") or {})
+
+    body = smart_inject(body, ctx, is_params=False)
+    params = smart_inject(params, ctx, is_params=True)
+    url, body = substitute_vars(step["url"], body, ctx.vars_pool)
+
+    expected_fail = is_expected_fail(step, ctx)
+    response = send(step["method"], url, headers, body, params, resource=ctx.resource,
+                    endpoint=endpoint_key(step["method"], step["url"]), ctx=ctx, expected_fail=expected_fail)
+    log(f"     📡 状态: {response.status_code}")
+
+    if verify_response(response, expected_fail):
+        if step["method"] in ("PUT", "POST") and step.get("body"):
+            check_consistency(response, body)
+        if step.get("extract"):
+            extract_vars(response, step["extract"], ctx.vars_pool)
+    return response
+
+
+def run_scenario(scenario, seed=None):
+    """按顺序执行一个场景的全部 Step，变量池在 Step 间链式传递；seed 为上游 provider 提取的变量"""
+    if is_batch(scenario):
+        return run_batch(scenario, seed)
+    ctx = ScenarioContext.from_scenario(scenario)
+    ctx.vars_pool.update(seed or {})
+    log(f"\n🚀 执行: {ctx.description}")
+    for step in scenario["steps"]:
+        run_step(step, ctx)
+    log("✅ 通过")
+    return ctx
+
+
+# ==========================================================
+# 批次场景: setup 执行一次 -> 每个 case 独立执行并单独上报 -> teardown 执行一次
+# ==========================================================
+
+def is_batch(scenario):
+    return "cases" in scenario
+
+
+def is_provider(scenario):
+    return scenario.get("scenario_type") == "provider"
+
+
+def run_batch_setup(scenario, seed=None):
+    ctx = ScenarioContext.from_scenario(scenario)
+    ctx.vars_pool.update(seed or {})
+    log(f"\n🚀 批次前置: {ctx.description}")
+    for step in scenario.get("setup", []):
+        run_step(step, ctx)
+    return ctx
+
+
+def run_case(case, batch_ctx):
+    ctx = batch_ctx.fork(case["case_name"], case.get("description", ""), case.get("scenario_type"))
+    log(f"\n🚀 执行: {ctx.description}")
+    for step in case["steps"]:
+        run_step(step, ctx)
+    log("✅ 通过")
+    return ctx
+
+
+def run_batch_teardown(scenario, batch_ctx):
+    log(f"🧹 批次后置: {batch_ctx.description}")
+    for step in scenario.get("teardown", []):
+        run_step(step, batch_ctx)
+
+
+def run_batch(scenario, seed=None):
+    """串行执行整个批次：单个 case 失败不影响其它 case，全部结束后汇总抛出"""
+    ctx = run_batch_setup(scenario, seed)
+    failed = []
+    try:
+        for case in scenario["cases"]:
+            try:
+                run_case(case, ctx)
+            except Exception as e:
+                failed.append(f"{case['case_name']}: {e!r}")
+    finally:
+        run_batch_teardown(scenario, ctx)
+    if failed:
+        raise AssertionError(f"批次 {ctx.scenario_name} 中 {len(failed)} 个用例失败:\n" + "\n".join(failed))
+    return ctx
+
+
+class BatchPool:
+    """
+    pytest 参数化执行批次场景时使用：批次内第一个 case 触发 setup，最后一个 case 结束后 teardown。
+    被跳过 / 反选导致未跑完的批次在 close() 时统一 teardown。
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def acquire(self, scenario, seed=None):
+        name = scenario["scenario_name"]
+        entry = self.entries.get(name)
+        if entry is None:
+            entry = self.entries[name] = {"scenario": scenario, "ctx": None, "error": None,
+                                          "remaining": len(scenario["cases"])}
+            try:
+                entry["ctx"] = run_batch_setup(scenario, seed)
+            except Exception as e:
+                entry["error"] = e
+        if entry["error"] is not None:
+            raise RuntimeError(f"批次 {name} 前置步骤失败: {entry['error']!r}")
+        return entry["ctx"]
+
+    def release(self, scenario):
+        entry = self.entries[scenario["scenario_name"]]
+        entry["remaining"] -= 1
+        if entry["remaining"] == 0:
+            self._teardown(entry)
+
+    def _teardown(self, entry):
+        ctx, entry["ctx"] = entry["ctx"], None
+        if ctx is not None:
+            run_batch_teardown(entry["scenario"], ctx)
+
+    def close(self):
+        for entry in self.entries.values():
+            self._teardown(entry)
+
+
+class ProviderPool:
+    """
+    跨资源依赖的上游共享资源：首次被依赖时才生产 (provider 自身的上游先生产)，
+    之后所有下游复用同一份变量；close() 按生产的逆序删除，保证先删下游再删上游。
+    """
+
+    def __init__(self, scenarios):
+        self.providers = {s["scenario_name"]: s for s in scenarios if is_provider(s)}
+        self.entries = {}
+        self.order = []
+        self.lock = threading.RLock()
+
+    def seed_for(self, scenario):
+        """场景所需的全部上游变量"""
+        vars_pool = {}
+        for name in dict.fromkeys((scenario.get("requires") or {}).values()):
+            vars_pool.update(self.acquire(name))
+        return vars_pool
+
+    def acquire(self, name):
+        with self.lock:
+            if name not in self.entries:
+                provider = self.providers.get(name)
+                if provider is None:
+                    self.entries[name] = LookupError("场景文件中没有该 provider")
+                else:
+                    try:
+                        self.entries[name] = run_batch_setup(provider, self.seed_for(provider))
+                        self.order.append(name)
+                    except Exception as e:
+                        self.entries[name] = e
+            entry = self.entries[name]
+        if isinstance(entry, Exception):
+            raise RuntimeError(f"上游 {name} 生产失败: {entry!r}")
+        return entry.vars_pool
+
+    def close(self):
+        for name in reversed(self.order):
+            try:
+                run_batch_teardown(self.providers[name], self.entries[name])
+            except Exception as e:
+                log(f"⚠️ 上游 {name} 清理失败: {e!r}")
+        self.order = []
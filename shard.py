@@ -0,0 +1,209 @@
+"""
+按预期耗时把生成的测试分片到 N 个 worker，使墙钟时间随 worker 数线性下降。
+
+- 亲和单元: 默认同一资源组的场景 (创建 / 删除同一类资源、列表查询) 必须落在同一个 worker，互不干扰；
+  --affinity scenario 时按场景拆分 (批次场景始终是一个单元)
+- 耗时估计: 有历史延迟日志 (latency.jsonl) 时 = 场景 Step 数 × 该场景每个请求的平均耗时 (含重试)；
+  该场景没有记录时用全部请求的平均耗时，没有日志时按 DEFAULT_STEP_SECONDS 估计
+- 调度: LPT (最长处理时间优先) —— 单元按耗时降序，依次放入当前负载最小的 worker
+- generator.py --shards N 写出 shards.json (每个单元的资源组、耗时、pytest 节点 ID 与分片结果)
+
+用法:
+    python generator.py --shards 4 --history latency.jsonl
+    python -m pytest $(python shard.py --shard 2/4)           # CI 矩阵中的第 2 个分片
+    python shard.py --workers 4 --run -- -q                   # 本机并行跑全部分片
+"""
+import argparse
+import heapq
+import json
+import os
+import subprocess
+import sys
+import time
+
+import metrics
+from latency_report import load_records
+
+SHARDS_FILE = "shards.json"
+SHARDS_VERSION = 1
+AFFINITIES = ("resource", "scenario")
+DEFAULT_STEP_SECONDS = 0.2
+
+
+# ========== 耗时估计 ==========
+
+def load_history(paths):
+    """从延迟日志汇总 {场景/用例名: [总耗时 ms, 首次请求数]} 与全局的每请求平均耗时 (ms)"""
+    by_name, total_ms, total_requests = {}, 0.0, 0
+    for path in paths or []:
+        if not os.path.exists(path):
+            continue
+        for r in load_records(path):
+            entry = by_name.setdefault(r.get("scenario") or "", [0.0, 0])
+            entry[0] += r["latency_ms"]
+            total_ms += r["latency_ms"]
+            if r.get("attempt", 1) == 1:
+                entry[1] += 1
+                total_requests += 1
+    return {"scenarios": by_name, "request_ms": total_ms / total_requests if total_requests else None}
+
+
+def scenario_cost(scenario, history=None):
+    """返回 (预计秒数, 来源)；来源为 history / average / estimate"""
+    steps = metrics.step_count(scenario)
+    names = [scenario["scenario_name"]] + [c["case_name"] for c in scenario.get("cases", [])]
+    known = [history["scenarios"][n] for n in names if history and n in history["scenarios"]]
+    requests = sum(k[1] for k in known)
+    if requests:
+        return steps * sum(k[0] for k in known) / requests / 1000, "history"
+    if history and history["request_ms"]:
+        return steps * history["request_ms"] / 1000, "average"
+    return steps * DEFAULT_STEP_SECONDS, "estimate"
+
+
+def test_ids(scenario, mode, test_file):
+    """场景对应的 pytest 节点 ID；provider 是 fixture，不单独成为测试"""
+    if scenario.get("scenario_type") == "provider":
+        return []
+    if mode == "runtime":
+        names = [c["case_name"] for c in scenario["cases"]] if "cases" in scenario else [scenario["scenario_name"]]
+        return [f"{test_file}::test_scenario[{n}]" for n in names]
+    if "cases" in scenario:
+        return [f"{test_file}::Test{scenario['scenario_name'][4:]}"]
+    return [f"{test_file}::{scenario['scenario_name']}"]
+
+
+def build_units(scenarios, mode, test_file_for, history=None, affinity="resource"):
+    """按亲和关系把场景合并为调度单元；test_file_for(资源名) 返回该资源组所在的测试文件"""
+    if affinity not in AFFINITIES:
+        raise ValueError(f"未知的亲和方式: {affinity} (可选 {', '.join(AFFINITIES)})")
+    units = {}
+    for s in scenarios:
+        tests = test_ids(s, mode, test_file_for(s.get("resource")))
+        if not tests:
+            continue
+        key = s.get("resource") if affinity == "resource" else s["scenario_name"]
+        unit = units.setdefault(key, {"key": key, "resource": s.get("resource"), "cost": 0.0, "sources": {},
+                                      "scenarios": [], "tests": []})
+        cost, source = scenario_cost(s, history)
+        unit["cost"] += cost
+        unit["sources"][source] = unit["sources"].get(source, 0) + 1
+        unit["scenarios"].append(s["scenario_name"])
+        unit["tests"].extend(tests)
+    for unit in units.values():
+        unit["cost"] = round(unit["cost"], 4)
+    return list(units.values())
+
+
+# ========== 调度 ==========
+
+def schedule(units, workers):
+    """LPT 调度：返回 workers 个分片 (可能有空分片)，每个分片带预计耗时"""
+    workers = max(1, workers)
+    shards = [{"index": i + 1, "cost": 0.0, "units": [], "tests": []} for i in range(workers)]
+    heap = [(0.0, i) for i in range(workers)]
+    for unit in sorted(units, key=lambda u: (-u["cost"], u["key"])):
+        load, i = heapq.heappop(heap)
+        shard = shards[i]
+        shard["cost"] = round(load + unit["cost"], 4)
+        shard["units"].append(unit["key"])
+        shard["tests"].extend(unit["tests"])
+        heapq.heappush(heap, (shard["cost"], i))
+    return shards
+
+
+def build_plan(scenarios, workers, mode, test_file_for, history=None, affinity="resource"):
+    units = build_units(scenarios, mode, test_file_for, history, affinity)
+    shards = schedule(units, workers)
+    total = round(sum(u["cost"] for u in units), 4)
+    makespan = max(s["cost"] for s in shards)
+    return {"version": SHARDS_VERSION, "mode": mode, "workers": len(shards), "affinity": affinity,
+            "total_cost": total, "makespan": makespan,
+            "speedup": round(total / makespan, 2) if makespan else 1.0, "units": units, "shards": shards}
+
+
+def reschedule(plan, workers):
+    """分片数与 shards.json 不同时，按其中的单元耗时重新调度"""
+    if workers == plan["workers"]:
+        return plan["shards"]
+    return schedule(plan["units"], workers)
+
+
+def describe(plan):
+    makespan = max(s["cost"] for s in plan["shards"])
+    speedup = plan["total_cost"] / makespan if makespan else 1.0
+    lines = [f"🧩 [Shard] {len(plan['units'])} 个单元 ({plan['affinity']}) -> {plan['workers']} 个分片，"
+             f"预计总耗时 {plan['total_cost']:.1f}s，最长分片 {makespan:.1f}s (加速 {speedup:.2f}x)"]
+    if len(plan["units"]) < plan["workers"]:
+        lines.append(f"    ⚠️ 单元数少于分片数，{plan['workers'] - len(plan['units'])} 个分片为空；"
+                     f"可尝试 --affinity scenario")
+    for s in plan["shards"]:
+        lines.append(f"    #{s['index']}: {s['cost']:.1f}s，{len(s['tests'])} 个测试 {s['units']}")
+    return "\n".join(lines)
+
+
+# ========== 执行 ==========
+
+def parse_shard(text):
+    try:
+        index, total = (int(x) for x in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"分片格式应为 i/N: {text}")
+    if not 1 <= index <= total:
+        raise argparse.ArgumentTypeError(f"分片序号应在 1~{total} 之间: {text}")
+    return index, total
+
+
+def run_shards(shards, pytest_args):
+    """每个非空分片一个 pytest 子进程并行执行，返回 [(分片, 退出码, 实际耗时)]"""
+    procs = []
+    for shard in shards:
+        if shard["tests"]:
+            cmd = [sys.executable, "-m", "pytest", *pytest_args, *shard["tests"]]
+            procs.append((shard, time.perf_counter(), subprocess.Popen(cmd)))
+    results = []
+    for shard, started, proc in procs:
+        code = proc.wait()
+        results.append((shard, code, time.perf_counter() - started))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按预期耗时把生成的测试分片到多个 worker")
+    parser.add_argument("--plan", default=SHARDS_FILE, help="generator.py --shards 写出的分片文件")
+    parser.add_argument("--shard", type=parse_shard, help="只处理第 i 个分片 (格式 i/N)，默认输出其 pytest 节点 ID")
+    parser.add_argument("--workers", "-n", type=int, help="分片数 (与 --shard 二选一)")
+    parser.add_argument("--run", action="store_true", help="直接用 pytest 子进程并行执行分片")
+    parser.add_argument("pytest_args", nargs="*", help="--run 时透传给 pytest 的参数 (写在 -- 之后)")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.plan, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+    except OSError as e:
+        print(f"❌ [Shard] 无法读取分片文件 (先运行 generator.py --shards N): {e}", file=sys.stderr)
+        return 1
+
+    workers = args.shard[1] if args.shard else (args.workers or plan["workers"])
+    shards = reschedule(plan, workers)
+    if args.shard:
+        shards = [shards[args.shard[0] - 1]]
+
+    if not args.run:
+        if args.shard:
+            print("\n".join(shards[0]["tests"]))
+        else:
+            print(describe(dict(plan, workers=workers, shards=shards)))
+        return 0
+
+    print(f"🚀 [Shard] 并行执行 {sum(1 for s in shards if s['tests'])} 个分片...", file=sys.stderr)
+    results = run_shards(shards, args.pytest_args)
+    for shard, code, seconds in results:
+        mark = "✅" if code == 0 else "❌"
+        print(f"  {mark} 分片 #{shard['index']}: 实际 {seconds:.1f}s / 预计 {shard['cost']:.1f}s，"
+              f"{len(shard['tests'])} 个测试", file=sys.stderr)
+    return max((code for _, code, _ in results), default=0)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
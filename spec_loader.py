@@ -0,0 +1,320 @@
+"""
+接口定义的流式读取：逐条产出 data.json 结构的接口，直接喂给 linker 的路由索引。
+
+支持三种输入 (按扩展名 / 首个非空字符自动识别):
+- JSON 数组 (data.json):   逐个元素 raw_decode，内存只与单条接口大小相关
+- JSON Lines (.jsonl):     逐行解析
+- OpenAPI 3 / Swagger 2:  第一遍只收集 servers / components 等元信息，第二遍惰性遍历 paths
+
+解析失败统一抛出 SpecLoadError，带文件名、行号、列号。
+"""
+import json
+import os
+import re
+
+from gui_data import apply_global_defaults_to_case, build_case_from_api_meta
+
+CHUNK_SIZE = 1 << 16
+HTTP_METHODS = ("get", "post", "put", "patch", "delete")
+REQUIRED_FIELDS = ("url", "method")
+
+_WS = re.compile(r'\s*')
+_DECODER = json.JSONDecoder()
+
+
+class SpecLoadError(ValueError):
+    """接口定义文件无法解析 / 字段缺失"""
+
+
+class JsonStream:
+    """基于缓冲区的增量 JSON 读取器：只在需要时读入更多数据，已消费部分随时丢弃"""
+
+    def __init__(self, fp, source, chunk_size=CHUNK_SIZE):
+        self.fp = fp
+        self.source = source
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.line = 1       # 已丢弃部分之后的起始行号
+        self.col_base = 0   # 已丢弃部分在当前行内的字符数
+
+    def _fill(self, size=None):
+        if self.pos:
+            dropped = self.buf[:self.pos]
+            newlines = dropped.count('\n')
+            if newlines:
+                self.line += newlines
+                self.col_base = len(dropped) - dropped.rindex('\n') - 1
+            else:
+                self.col_base += len(dropped)
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.fp.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def error(self, msg, pos=None):
+        pos = self.pos if pos is None else pos
+        head = self.buf[:pos]
+        newlines = head.count('\n')
+        if newlines:
+            line, col = self.line + newlines, pos - head.rindex('\n')
+        else:
+            line, col = self.line, self.col_base + pos + 1
+        return SpecLoadError(f"{self.source}:{line}:{col}: {msg}")
+
+    def peek(self):
+        """跳过空白，返回下一个字符 (EOF 时为 None)"""
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return None
+
+    def expect(self, ch):
+        c = self.peek()
+        if c != ch:
+            raise self.error(f"期望 '{ch}'，实际为 {'EOF' if c is None else repr(c)}")
+        self.pos += 1
+
+    def decode(self):
+        """解析下一个完整的 JSON 值；数据不足时按倍数扩大读入量后重试"""
+        if self.peek() is None:
+            raise self.error("意外的文件结尾")
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise self.error(e.msg, e.pos)
+                # 读到 EOF 后会再试一次，保证报错位置基于压缩后的缓冲区
+                self._fill(max(self.chunk_size, len(self.buf)))
+                continue
+            # 数字等标量可能恰好被截断在缓冲区末尾，补读后再确认一次
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def _separator(self, close):
+        c = self.peek()
+        if c == ',':
+            self.pos += 1
+            return True
+        if c == close:
+            self.pos += 1
+            return False
+        raise self.error(f"期望 ',' 或 '{close}'，实际为 {'EOF' if c is None else repr(c)}")
+
+    def items(self):
+        """逐个产出数组元素"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.decode()
+            if not self._separator(']'):
+                return
+
+    def members(self):
+        """逐个产出对象的 key；调用方必须在取下一个 key 之前消费掉对应的 value (decode/skip)"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.decode()
+            if not isinstance(key, str):
+                raise self.error("对象的 key 必须是字符串")
+            self.expect(':')
+            yield key
+            if not self._separator('}'):
+                return
+
+    def skip(self):
+        """跳过一个值：容器逐个成员解析后丢弃，内存只与单个成员大小相关"""
+        c = self.peek()
+        if c == '{':
+            for _ in self.members():
+                self.skip()
+        elif c == '[':
+            for _ in self.items():
+                pass
+        else:
+            self.decode()
+
+
+def _check_entry(entry, source, index):
+    if not isinstance(entry, dict):
+        raise SpecLoadError(f"{source}: 第 {index} 条接口不是 JSON 对象")
+    missing = [k for k in REQUIRED_FIELDS if not entry.get(k)]
+    if missing:
+        name = entry.get('case_name', '?')
+        raise SpecLoadError(f"{source}: 第 {index} 条接口 ({name}) 缺少字段 {missing}")
+    return entry
+
+
+def iter_json_array(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for i, entry in enumerate(JsonStream(f, path).items(), 1):
+            yield _check_entry(entry, path, i)
+
+
+def iter_json_lines(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        index = 0
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise SpecLoadError(f"{path}:{lineno}:{e.colno}: {e.msg}") from None
+            index += 1
+            yield _check_entry(entry, f"{path}:{lineno}", index)
+
+
+# ========== OpenAPI / Swagger ==========
+
+OPENAPI_META_KEYS = ("openapi", "swagger", "servers", "host", "basePath", "schemes", "components", "definitions")
+
+
+def _resolve(node, meta, depth=0):
+    """解析本地 $ref (#/components/... 或 #/definitions/...)"""
+    while isinstance(node, dict) and "$ref" in node and depth < 32:
+        ref = node["$ref"]
+        if not ref.startswith("#/"):
+            return {}
+        target = meta
+        for part in ref[2:].split('/'):
+            target = target.get(part, {}) if isinstance(target, dict) else {}
+        node, depth = target, depth + 1
+    return node
+
+
+def _base_url(meta):
+    if meta.get("servers"):
+        return meta["servers"][0].get("url", "").rstrip('/')
+    if meta.get("host"):
+        scheme = (meta.get("schemes") or ["https"])[0]
+        return f"{scheme}://{meta['host']}{meta.get('basePath', '')}".rstrip('/')
+    return ""
+
+
+def _json_content(node, meta):
+    content = _resolve(node, meta).get("content") or {}
+    for media_type, media in content.items():
+        if "json" in media_type:
+            return media
+    return {}
+
+
+def _example_of(media, schema, meta):
+    if "example" in media:
+        return media["example"]
+    for example in (media.get("examples") or {}).values():
+        return _resolve(example, meta).get("value")
+    return schema.get("example")
+
+
+def openapi_operation_meta(path, method, item, operation, meta):
+    """把一个 OpenAPI operation 转成与 gui_data.build_api_meta_from_md 相同结构的 api_meta"""
+    params = [_resolve(p, meta) for p in (item.get("parameters") or []) + (operation.get("parameters") or [])]
+    body_schema, body_example = {}, None
+
+    request_media = _json_content(operation.get("requestBody") or {}, meta)
+    if request_media:
+        body_schema = _resolve(request_media.get("schema") or {}, meta)
+        body_example = _example_of(request_media, body_schema, meta)
+    for p in params:
+        if p.get("in") == "body":   # Swagger 2
+            body_schema = _resolve(p.get("schema") or {}, meta)
+            body_example = body_schema.get("example")
+
+    responses = operation.get("responses") or {}
+    ok = next((responses[c] for c in ("200", "201", "default") if c in responses), {})
+    response_media = _json_content(ok, meta)
+    response_example = _example_of(response_media, _resolve(response_media.get("schema") or {}, meta), meta) \
+        if response_media else _resolve(ok, meta).get("examples", {}).get("application/json")
+
+    return {
+        "name": operation.get("operationId") or operation.get("summary") or "",
+        "description": operation.get("summary") or operation.get("description") or "",
+        "method": method.upper(),
+        "url": _base_url(meta) + re.sub(r'\{(\w+)\}', r':\1', path),
+        "headers_table": [{"名称": p["name"]} for p in params if p.get("in") == "header" and p.get("name")],
+        "query_params_table": [{"名称": p["name"]} for p in params if p.get("in") == "query" and p.get("name")],
+        "body_params_table": [{"名称": k} for k in (body_schema.get("properties") or {})],
+        "request_body_example_raw": "",
+        "request_body_example_json": body_example if isinstance(body_example, dict) else None,
+        "response_example_raw": "",
+        "response_example_json": response_example,
+    }
+
+
+def iter_openapi(path, cfg=None):
+    """两遍扫描：先收集元信息，再惰性遍历 paths，每个 operation 产出一条接口"""
+    # 复用 Markdown 导入的字段推断规则，保证两种来源产出的 data.json 一致
+    cfg = cfg or {}
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = JsonStream(f, path)
+        meta = {}
+        for key in stream.members():
+            if key in OPENAPI_META_KEYS:
+                meta[key] = stream.decode()
+            else:
+                stream.skip()
+
+        f.seek(0)
+        stream = JsonStream(f, path)
+        seq = 1
+        for key in stream.members():
+            if key != "paths":
+                stream.skip()
+                continue
+            for route in stream.members():
+                item = _resolve(stream.decode(), meta)
+                for method in HTTP_METHODS:
+                    if method not in item:
+                        continue
+                    api_meta = openapi_operation_meta(route, method, item, item[method], meta)
+                    case = build_case_from_api_meta(api_meta, cfg, seq)
+                    case = apply_global_defaults_to_case(case, cfg.get("default_chat_id"), cfg.get("default_user_id"))
+                    yield case
+                    seq += 1
+
+
+def _sniff(path):
+    """识别 JSON 文件的顶层结构: "array" / "openapi" / "unknown" """
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = JsonStream(f, path)
+        c = stream.peek()
+        if c == '[':
+            return "array"
+        if c == '{':
+            for key in stream.members():
+                if key in ("openapi", "swagger"):
+                    return "openapi"
+                stream.skip()
+    return "unknown"
+
+
+def iter_spec(path, cfg=None):
+    """按文件类型选择流式读取器，逐条产出接口定义"""
+    if not os.path.exists(path):
+        raise SpecLoadError(f"{path}: 文件不存在")
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jsonl", ".ndjson"):
+        return iter_json_lines(path)
+    kind = _sniff(path)
+    if kind == "array":
+        return iter_json_array(path)
+    if kind == "openapi":
+        return iter_openapi(path, cfg)
+    raise SpecLoadError(f"{path}: 无法识别的接口定义格式 (需要 JSON 数组 / JSON Lines / OpenAPI)")
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+
+import pytest
+
+import async_runner
+
+
+def step(url, **extra):
+    return dict({"method": "GET", "url": f"http://h{url}", "description": url}, **extra)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """用假的 run_step 代替真实请求：记录 (场景 / 用例名, URL)，URL 含 fail 时抛错；extract 写入变量池"""
+    recorded, lock = [], threading.Lock()
+
+    def run_step(s, ctx):
+        with lock:
+            recorded.append((ctx.scenario_name, s["url"][len("http://h"):]))
+        if "fail" in s["url"]:
+            raise AssertionError(s["url"])
+        ctx.vars_pool.update(s.get("extract") or {})
+
+    monkeypatch.setattr(async_runner.runtime, "run_step", run_step)
+    return recorded
+
+
+def run(scenarios, **kwargs):
+    return asyncio.run(async_runner.run_all(scenarios, **kwargs))
+
+
+def test_steps_run_in_order_and_results_keep_input_order(calls):
+    scenarios = [
+        {"scenario_name": "a", "description": "a", "steps": [step("/a1"), step("/a2"), step("/a3")]},
+        {"scenario_name": "b", "description": "b", "steps": [step("/b1"), step("/fail"), step("/b3")]},
+    ]
+    results = run(scenarios, concurrency=4, per_host=2)
+    assert [r["scenario_name"] for r in results] == ["a", "b"]
+    assert results[0]["ok"] and not results[1]["ok"] and "/fail" in results[1]["error"]
+    assert [u for n, u in calls if n == "a"] == ["/a1", "/a2", "/a3"]
+    # 失败的 Step 之后不再继续
+    assert [u for n, u in calls if n == "b"] == ["/b1", "/fail"]
+
+
+def test_batch_setup_and_teardown_run_once(calls):
+    batch = {
+        "scenario_name": "batch", "description": "batch",
+        "setup": [step("/produce", extract={"auto_id": "1"})],
+        "cases": [{"case_name": f"case_{i}", "description": "c", "steps": [step(f"/case/{i}")]} for i in range(3)],
+        "teardown": [step("/delete")],
+    }
+    [result] = run([batch])
+    assert result["ok"]
+    urls = [u for _, u in calls]
+    assert urls[0] == "/produce" and urls[-1] == "/delete"
+    assert sorted(urls[1:-1]) == ["/case/0", "/case/1", "/case/2"]
+    assert {n for n, u in calls if u.startswith("/case/")} == {"case_0", "case_1", "case_2"}
+
+
+def test_failed_case_fails_batch_but_still_tears_down(calls):
+    batch = {
+        "scenario_name": "batch", "description": "batch", "setup": [step("/produce")],
+        "cases": [{"case_name": "ok", "description": "c", "steps": [step("/ok")]},
+                  {"case_name": "bad", "description": "c", "steps": [step("/fail")]}],
+        "teardown": [step("/delete")],
+    }
+    [result] = run([batch])
+    assert not result["ok"] and "bad" in result["error"]
+    assert calls[-1] == ("batch", "/delete")
+
+
+def test_concurrency_limiter_shares_semaphore_per_host():
+    async def check():
+        limiter = async_runner.ConcurrencyLimiter(4, 2)
+        assert limiter.for_host("http://a:1/x") is limiter.for_host("http://a:1/y")
+        assert limiter.for_host("http://a:1/x") is not limiter.for_host("http://b/x")
+
+    asyncio.run(check())
+
+
+def provider(name, requires=None):
+    return {"scenario_name": name, "scenario_type": "provider", "description": name, "requires": requires or {},
+            "setup": [step(f"/{name}/create", extract={f"auto_{name}_id": name})],
+            "teardown": [step(f"/{name}/delete")]}
+
+
+CHATS = provider("chats")
+MEMBERS = provider("members", {"auto_chats_id": "chats"})
+
+
+def test_schedule_levels_follow_provider_depth():
+    scenarios = [
+        {"scenario_name": "plain", "steps": []},
+        MEMBERS,
+        {"scenario_name": "uses_members", "steps": [], "requires": {"auto_members_id": "members"}},
+        CHATS,
+        {"scenario_name": "uses_chats", "steps": [], "requires": {"auto_chats_id": "chats"}},
+    ]
+    assert async_runner.schedule_levels(scenarios) == [[0, 3], [1, 4], [2]]
+
+
+def test_providers_produced_before_dependants_and_deleted_in_reverse(calls):
+    user = {"scenario_name": "user", "description": "u", "requires": {"auto_members_id": "members"},
+            "steps": [step("/use")]}
+    results = run([user, MEMBERS, CHATS])
+    assert all(r["ok"] for r in results)
+    assert [u for _, u in calls] == ["/chats/create", "/members/create", "/use", "/members/delete", "/chats/delete"]
+
+
+def test_failed_provider_fails_dependants(calls):
+    broken = dict(CHATS, setup=[step("/fail")])
+    user = {"scenario_name": "user", "description": "u", "requires": {"auto_chats_id": "chats"},
+            "steps": [step("/use")]}
+    provider_result, user_result = run([broken, user])
+    assert not provider_result["ok"] and not user_result["ok"] and "chats" in user_result["error"]
+    assert "/use" not in [u for _, u in calls]
@@ -0,0 +1,34 @@
+import benchmark
+import generator
+
+
+def test_synthesize_spec_is_deterministic():
+    spec = benchmark.synthesize_spec(3, 7, 4, 1, seed=1)
+    assert spec == benchmark.synthesize_spec(3, 7, 4, 1, seed=1)
+    assert len(spec) == 21
+    assert [a["case_name"] for a in spec[5:7]] == ["res0s_action_0", "res0s_action_1"]
+    assert "nested" in spec[0]["body"]
+    assert len(benchmark.synthesize_spec(2, 3, 4, 0)) == 6
+
+
+def test_bench_case_counts_every_stage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generator.get_environment.cache_clear()
+    result = benchmark.bench_case(2, 6, 3, 1, repeat=1, memory=False)
+    assert list(result["stages"]) == list(benchmark.STAGES)
+    assert result["counts"]["apis"] == 12 and result["counts"]["resources"] == 2
+    assert result["counts"]["written_bytes"] > 0
+    assert benchmark.case_label(result["params"]) == "N2_M6_K3_D1_J1_render"
+
+
+def result(seconds, peak_kb):
+    return {"cases": {"N1": {"stages": {"render": {"seconds": seconds, "peak_kb": peak_kb}}}}}
+
+
+def test_compare_ignores_noise_and_flags_regressions():
+    base = result(0.01, 100)
+    # 相对退化大但绝对差值低于噪声下限
+    assert benchmark.compare(result(0.03, 300), base, 0.25) == []
+    regressions = benchmark.compare(result(1.0, 1000), base, 0.25)
+    assert len(regressions) == 2 and all(r.startswith("N1 render") for r in regressions)
+    assert benchmark.compare({"cases": {"N2": result(1.0, 1)["cases"]["N1"]}}, base, 0.25) == []
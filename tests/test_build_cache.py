@@ -0,0 +1,115 @@
+import json
+import os
+
+import pytest
+
+import build_cache
+import metrics
+from linker import auto_link_process
+
+SPEC = [
+    {"case_name": "msg_create", "description": "发消息", "method": "POST", "url": "http://h/im/v1/messages",
+     "headers": {}, "params": {}, "body": {"content": "hi"}},
+    {"case_name": "msg_del", "description": "删消息", "method": "DELETE", "url": "http://h/im/v1/messages/:message_id",
+     "headers": {}, "params": {}, "body": {}},
+    {"case_name": "pin_create", "description": "置顶", "method": "POST", "url": "http://h/im/v1/pins",
+     "headers": {}, "params": {}, "body": {"message_id": "om_x"}},
+]
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def write_spec(path, spec):
+    path.write_text(json.dumps(spec, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_content_hash_ignores_key_order():
+    assert build_cache.content_hash({"a": 1, "b": [1, 2]}) == build_cache.content_hash({"b": [1, 2], "a": 1})
+    assert build_cache.content_hash({"a": 1}) != build_cache.content_hash({"a": 2})
+    assert build_cache.content_hash("a", "b") != build_cache.content_hash("ab")
+
+
+def test_write_if_changed_keeps_mtime(workdir):
+    path = str(workdir / "out" / "x.txt")
+    assert build_cache.write_if_changed(path, "one")
+    os.utime(path, (1, 1))
+    assert not build_cache.write_if_changed(path, "one")
+    assert os.path.getmtime(path) == 1
+    assert build_cache.write_if_changed(path, "two")
+
+
+def test_dump_json_if_changed_streams_and_keeps_mtime(workdir):
+    path = str(workdir / "out" / "scenarios.json")
+    data = [{"name": "中文", "n": 1}]
+    written = build_cache.dump_json_if_changed(path, data, indent=4)
+    assert written == os.path.getsize(path)
+    assert (workdir / "out" / "scenarios.json").read_text(encoding="utf-8") == \
+        json.dumps(data, indent=4, ensure_ascii=False)
+    os.utime(path, (1, 1))
+    assert build_cache.dump_json_if_changed(path, data, indent=4) == 0
+    assert os.path.getmtime(path) == 1
+    assert build_cache.dump_json_if_changed(path, data + [2], indent=4) > 0
+    assert os.listdir(workdir / "out") == ["scenarios.json"]
+
+
+def test_cached_scenarios_round_trip_and_key_check(workdir):
+    cache = build_cache.BuildCache()
+    key = cache.fission_key(SPEC[:2], {"batch_mutations": False})
+    assert key != cache.fission_key(SPEC[:2], {"batch_mutations": True})
+    assert cache.cached_scenarios("messages", key) is None
+    cache.store_scenarios("messages", key, [{"scenario_name": "s"}])
+    cache.save()
+
+    reloaded = build_cache.BuildCache()
+    assert reloaded.cached_scenarios("messages", key) == [{"scenario_name": "s"}]
+    assert reloaded.cached_scenarios("messages", "other") is None
+
+
+def test_needs_render_tracks_key_and_output(workdir):
+    cache = build_cache.BuildCache()
+    (workdir / "test_suite_messages.py").write_text("", encoding="utf-8")
+    assert cache.needs_render("messages", "k1", "test_suite_messages.py")
+    cache.mark_rendered("messages", "k1", "test_suite_messages.py")
+    assert not cache.needs_render("messages", "k1", "test_suite_messages.py")
+    assert cache.needs_render("messages", "k2", "test_suite_messages.py")
+    os.remove("test_suite_messages.py")
+    assert cache.needs_render("messages", "k1", "test_suite_messages.py")
+
+
+def test_incremental_link_rebuilds_only_changed_groups(workdir):
+    spec = write_spec(workdir / "spec.json", SPEC)
+    first = auto_link_process(cache=build_cache.BuildCache(), spec_path=spec)
+
+    metrics.METRICS.reset()
+    again = auto_link_process(cache=build_cache.BuildCache(), spec_path=spec)
+    assert json.loads(json.dumps(again, default=build_cache.json_default)) == \
+        json.loads(json.dumps(first, default=build_cache.json_default))
+    assert metrics.METRICS.counters["cache_hits"] == 2
+
+    changed = [dict(SPEC[0], body={"content": "changed"})] + SPEC[1:]
+    metrics.METRICS.reset()
+    auto_link_process(cache=build_cache.BuildCache(), spec_path=write_spec(workdir / "spec.json", changed))
+    assert metrics.METRICS.counters["cache_hits"] == 1
+
+
+def test_prune_removes_outputs_of_dropped_groups(workdir):
+    spec = write_spec(workdir / "spec.json", SPEC)
+    auto_link_process(cache=build_cache.BuildCache(), spec_path=spec)
+    assert os.path.exists(os.path.join("scenarios", "pins.json"))
+    auto_link_process(cache=build_cache.BuildCache(), spec_path=write_spec(workdir / "spec.json", SPEC[:2]))
+    assert not os.path.exists(os.path.join("scenarios", "pins.json"))
+    assert os.path.exists(os.path.join("scenarios", "messages.json"))
+
+
+@pytest.mark.parametrize("source", ["linker.py", "routes.py", "dag.py", "fingerprint.py"])
+def test_fission_sources_invalidate_cached_scenarios(workdir, monkeypatch, source):
+    key = build_cache.BuildCache().fission_key(SPEC[:2], {})
+    real_hash = build_cache.file_hash
+    monkeypatch.setattr(build_cache, "file_hash",
+                        lambda path: "edited" if os.path.basename(path) == source else real_hash(path))
+    assert build_cache.BuildCache().fission_key(SPEC[:2], {}) != key
@@ -0,0 +1,61 @@
+import linker
+from dag import DependencyGraph, extract_dependencies, field_base
+from routes import RouteIndex
+
+IM = "http://h/im/v1"
+
+
+def api(method, path, body=None):
+    return {"method": method, "url": f"{IM}{path}", "body": body or {}}
+
+
+def graph(*apis):
+    index = RouteIndex()
+    for a in apis:
+        index.add(a)
+    return DependencyGraph(index.resource_groups())
+
+
+def test_field_base_strips_suffix_and_reference_prefix():
+    assert field_base("chat_id") == "chat"
+    assert field_base("parent_message_id") == "message"
+    assert field_base("user_ids") == "user"
+    assert field_base("uuid") is None
+
+
+def test_extract_dependencies_skips_generated_values():
+    body = {"chat_id": "xxx", "uuid": "GENERATE_UUID", "nested": [{"target_user_id": 1}], "name": "g"}
+    assert extract_dependencies(body) == {"chat_id", "target_user_id"}
+    # 旧的导入路径仍然可用
+    assert linker.extract_dependencies is extract_dependencies
+
+
+def test_path_and_body_dependencies_are_layered():
+    g = graph(api("POST", "/chats", {"name": "g"}),
+              api("POST", "/chats/:chat_id/members", {"name": "u"}),
+              api("DELETE", "/chats/:chat_id/members/:member_id"),
+              api("POST", "/messages", {"chat_id": "xxx", "content": "hi"}),
+              api("POST", "/pins", {"message_id": "om_x"}))
+    assert g.levels == [["chats"], ["members", "messages"], ["pins"]]
+    assert g.providers == {"chats", "messages"}
+    assert g.deps_for("messages") == {"requires": {"auto_chat_id": "provider_chats"},
+                                      "bindings": {"chat_id": "auto_chat_id"}, "provide": True}
+    assert g.deps_for("members")["bindings"] == {}
+    assert g.level_of("pins") == 2 and g.diagnostics == []
+
+
+def test_cycle_is_broken_and_reported():
+    g = graph(api("POST", "/chats", {"message_id": "om_x"}), api("POST", "/messages", {"chat_id": "xxx"}))
+    assert [kind["kind"] for kind in g.diagnostics] == ["cycle"]
+    assert g.cycles == [["chats", "messages", "chats"]]
+    assert g.levels == [["chats", "messages"]]
+    # 环上的边全部断开，相关字段保留原值
+    assert g.bindings == {"chats": {}, "messages": {}} and g.providers == set()
+
+
+def test_unresolved_and_producerless_upstreams_are_diagnosed():
+    g = graph(api("POST", "/messages", {"widget_id": "w"}),
+              api("GET", "/users/:user_id"), api("POST", "/pins", {"user_id": "ou_x"}))
+    kinds = [d["message"] for d in g.diagnostics]
+    assert any("widget_id" in m for m in kinds) and any("没有生产者" in m for m in kinds)
+    assert g.deps_for("pins")["requires"] == {}
@@ -0,0 +1,64 @@
+import pytest
+
+import extractor
+import runtime
+from extractor import MISSING, compile_path
+
+PAYLOAD = {"code": 0, "data": {
+    "message_id": "om_1",
+    "items": [{"id": "a", "tags": ["x"]}, {"id": "b", "tags": []}],
+    "members": {"u1": {"name": "A"}, "u2": {"name": "B"}},
+    "page_token": "",
+}}
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("data.message_id", "om_1"),
+    ("data.items[0].id", "a"),
+    ("data.items.1.id", "b"),
+    ("data.items[-1].id", "b"),
+    ("data.items[*].id", ["a", "b"]),
+    ("data.items.*.tags[0]", ["x"]),
+    ("data.members.*.name", ["A", "B"]),
+    ("data.missing", MISSING),
+    ("data.items[5].id", MISSING),
+    ("data.missing|\"\"", ""),
+    ("data.missing|[]", []),
+    ("data.missing|raw text", "raw text"),
+    ("data.items[*].nope|[]", []),
+])
+def test_paths(path, expected):
+    assert compile_path(path)(PAYLOAD) == expected
+
+
+def test_compile_is_cached_and_rejects_bad_paths():
+    assert compile_path("data.message_id") is compile_path("data.message_id")
+    for path in ("data..id", "data.items[x]", ""):
+        with pytest.raises(ValueError):
+            extractor.ExtractPath(path)
+
+
+def test_validate_extracts_names_scenario_and_variable():
+    bad = {"scenario_name": "test_x", "cases": [{"case_name": "c", "steps": [
+        {"extract": {"auto_id": "data[oops"}}]}]}
+    extractor.validate_extracts([{"scenario_name": "ok", "steps": [{"extract": {"auto_id": "data.id"}}]}])
+    with pytest.raises(ValueError, match=r"test_x 的变量 \$auto_id"):
+        extractor.validate_extracts([bad])
+
+
+class Response:
+    def __init__(self, content):
+        self.content = content
+
+    def json(self):
+        raise AssertionError("应复用 response_json 的解码结果")
+
+
+def test_extract_vars_decodes_once(monkeypatch):
+    monkeypatch.setattr(runtime, "VERBOSE", False)
+    response = Response(b'{"data": {"message_id": "om_1", "items": [], "page_token": ""}}')
+    pool = {}
+    runtime.extract_vars(response, {"auto_message_id": "data.message_id", "ids": "data.items[*].id",
+                                    "token": "data.page_token", "kept": "data.page_token|\"\""}, pool)
+    assert pool == {"auto_message_id": "om_1", "kept": ""}
+    assert runtime.response_json(response) is runtime.response_json(response)
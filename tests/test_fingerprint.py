@@ -0,0 +1,50 @@
+import copy
+
+import fingerprint
+
+
+def step(url, body=None, description="查询"):
+    return {"method": "GET", "url": url, "description": description, "body": body or {}}
+
+
+def scenario(name, steps, description="正向"):
+    return {"scenario_name": name, "description": description, "steps": steps}
+
+
+def test_fingerprint_ignores_descriptions_and_generated_values():
+    a = scenario("s", [step("http://h/m", {"text": "raw_data:text"}, "查 A")])
+    b = scenario("s", [step("http://h/m", {"text": "Auto_text_1"}, "查 B")], description="另一个描述")
+    assert fingerprint.scenario_fingerprint(a) == fingerprint.scenario_fingerprint(b)
+
+
+def test_fingerprint_distinguishes_expected_failure():
+    ok = scenario("s", [step("http://h/m")])
+    assert fingerprint.scenario_fingerprint(ok) != \
+        fingerprint.scenario_fingerprint(scenario("s", [step("http://h/m", description="查询 ❌")]))
+    assert fingerprint.scenario_fingerprint(ok) != fingerprint.scenario_fingerprint(scenario("iso", ok["steps"]))
+
+
+def test_dedupe_drops_duplicates_and_suffixes_colliding_names():
+    scenarios = [
+        scenario("test_a", [step("http://h/a")]),
+        scenario("test_a_copy", [step("http://h/a")]),
+        scenario("test_robust", [step("http://h/x")]),
+        scenario("test_robust", [step("http://h/y")]),
+    ]
+    before = copy.deepcopy(scenarios)
+    unique, removed = fingerprint.dedupe(scenarios)
+    assert removed == 1 and scenarios == before
+    names = [s["scenario_name"] for s in unique]
+    assert names[0] == "test_a" and len(set(names)) == 3
+    assert names[1] == "test_robust_" + fingerprint.scenario_fingerprint(scenarios[2])[:fingerprint.HASH_LEN]
+    assert unique[0] is scenarios[0]
+
+
+def test_dedupe_batch_cases():
+    case = {"case_name": "case_x", "description": "c", "steps": [step("http://h/a")]}
+    other = {"case_name": "case_x", "description": "c", "steps": [step("http://h/b")]}
+    batch = {"scenario_name": "batch", "description": "b", "setup": [], "teardown": [],
+             "cases": [case, dict(case), other]}
+    (result,), removed = fingerprint.dedupe([batch])
+    assert removed == 1 and len(batch["cases"]) == 3
+    assert [c["case_name"].startswith("case_x_") for c in result["cases"]] == [True, True]
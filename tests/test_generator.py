@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import generator
+
+BASE = "http://127.0.0.1:18081/im/v1"
+
+SPEC = [
+    {"case_name": "msg_create", "description": "发消息", "url": f"{BASE}/messages", "method": "POST",
+     "headers": {}, "params": {}, "body": {"chat_id": "xxx", "content": "hi"}},
+    {"case_name": "msg_del", "description": "删消息", "url": f"{BASE}/messages/:message_id", "method": "DELETE",
+     "headers": {}, "params": {}, "body": {}},
+    {"case_name": "chat_create", "description": "建群", "url": f"{BASE}/chats", "method": "POST",
+     "headers": {}, "params": {}, "body": {"name": "g"}},
+    {"case_name": "chat_del", "description": "解散群", "url": f"{BASE}/chats/:chat_id", "method": "DELETE",
+     "headers": {}, "params": {}, "body": {}},
+    {"case_name": "mem_add", "description": "拉人", "url": f"{BASE}/chats/:chat_id/members", "method": "POST",
+     "headers": {}, "params": {}, "body": {"name": "u"}},
+    {"case_name": "mem_del", "description": "踢人", "url": f"{BASE}/chats/:chat_id/members/:member_id",
+     "method": "DELETE", "headers": {}, "params": {}, "body": {}},
+]
+
+
+@pytest.fixture
+def spec(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # 模板字节码缓存目录是相对路径，切换目录后重新构建 Environment
+    generator.get_environment.cache_clear()
+    path = tmp_path / "spec.json"
+    path.write_text(json.dumps(SPEC, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("mode", ["render", "runtime"])
+def test_incremental_providers_rendered_once(spec, tmp_path, mode):
+    generator.generate(mode, True, 1, spec)
+    suites = sorted(tmp_path.glob("test_suite_*.py"))
+    assert [p.name for p in suites] == ["test_suite_chats.py", "test_suite_members.py", "test_suite_messages.py"]
+    plugin = (tmp_path / f"{generator.PROVIDERS_MODULE}.py").read_text(encoding="utf-8")
+    compile(plugin, "suite_providers.py", "exec")
+    if mode == "render":
+        assert plugin.count("def provider_chats(") == 1
+    else:
+        assert "def providers(" in plugin
+    for path in suites:
+        text = path.read_text(encoding="utf-8")
+        assert f'pytest_plugins = ["{generator.PROVIDERS_MODULE}"]' in text
+        assert "def provider_" not in text and "def providers(" not in text
+
+
+def test_single_file_keeps_providers_inline(spec, tmp_path):
+    generator.generate("render", False, 1, spec)
+    text = (tmp_path / "test_final_suite.py").read_text(encoding="utf-8")
+    assert "def provider_chats(" in text and "pytest_plugins" not in text
+    assert not (tmp_path / f"{generator.PROVIDERS_MODULE}.py").exists()
+
+
+def test_render_to_file_skips_unchanged_output(tmp_path):
+    template = generator.get_environment(str(tmp_path / "jinja")).from_string("{% for i in items %}{{ i }}\n{% endfor %}")
+    out = str(tmp_path / "out.py")
+    assert generator.render_to_file(template, out, items=range(500))
+    assert (tmp_path / "out.py").read_text(encoding="utf-8") == "".join(f"{i}\n" for i in range(500))
+    assert not generator.render_to_file(template, out, items=range(500))
+    assert generator.render_to_file(template, out, items=range(3))
+    assert sorted(p.name for p in tmp_path.glob("out*")) == ["out.py"]
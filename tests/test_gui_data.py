@@ -0,0 +1,96 @@
+from gui_data import build_api_meta_from_md, scan_markdown
+
+DOC = """# 发送消息
+
+给指定用户或会话发送消息。
+支持文本、富文本等。
+
+## 请求
+
+基本 | 值
+---|---
+HTTP URL | https://open.feishu.cn/open-apis/im/v1/messages
+HTTP Method | post
+
+### 请求头
+| 名称 | 类型 | 必填 | 描述 |
+| --- | --- | --- | --- |
+| Authorization | string | 是 | 令牌 |
+
+### 查询参数
+说明文字
+| 名称 | 类型 | 必填 | 描述 |
+| --- | --- | --- | --- |
+| receive_id_type | string | 是 | ID 类型 |
+
+### 请求体
+| 名称 | 类型 | 必填 | 描述 |
+| --- | --- | --- | --- |
+| content | string | 是 | 内容 |
+
+### 请求体示例
+```json
+{"content": "hi"}
+```
+
+### 响应体示例
+```json
+{"code": 0}
+```
+"""
+
+
+def test_scan_markdown_sections():
+    result = scan_markdown(DOC)
+    assert result["name"] == "发送消息"
+    assert result["description"] == "给指定用户或会话发送消息。 支持文本、富文本等。"
+    assert result["url"] == "https://open.feishu.cn/open-apis/im/v1/messages"
+    assert result["method"] == "POST"
+    assert result["headers_table"] == [{"名称": "Authorization", "类型": "string", "必填": "是", "描述": "令牌"}]
+    assert [r["名称"] for r in result["query_params_table"]] == ["receive_id_type"]
+    assert [r["名称"] for r in result["body_params_table"]] == ["content"]
+    assert result["request_body_example_raw"] == '{"content": "hi"}'
+    assert result["response_example_raw"] == '{"code": 0}'
+
+
+def test_scan_markdown_missing_sections_default_empty():
+    result = scan_markdown("# 标题\n\n## 请求\nHTTP URL |\n\n  https://x/im/v1/chats  \n")
+    assert result["url"] == "https://x/im/v1/chats"
+    assert result["method"] is None
+    assert result["headers_table"] == [] and result["request_body_example_raw"] == ""
+
+
+def test_scan_markdown_inline_block():
+    result = scan_markdown('### 请求体示例 说明 ```json {"inline": 1} ```\n')
+    assert result["request_body_example_raw"] == '{"inline": 1}'
+
+
+def test_marker_inside_open_block_is_ignored():
+    md = "\n".join([
+        "### 请求体示例",
+        "```json",
+        '{"a": 1,',
+        "### 请求体示例",
+        '"b": 2}',
+        "```",
+        "```json",
+        '{"later": true}',
+        "```",
+    ])
+    assert scan_markdown(md)["request_body_example_raw"] == '{"a": 1,\n### 请求体示例\n"b": 2}'
+
+
+def test_marker_for_filled_key_is_ignored():
+    md = "\n".join([
+        "### 响应体示例",
+        '```json {"first": 1} ```',
+        "### 响应体示例",
+        '```json {"second": 2} ```',
+    ])
+    assert scan_markdown(md)["response_example_raw"] == '{"first": 1}'
+
+
+def test_build_api_meta_parses_examples():
+    meta = build_api_meta_from_md(DOC)
+    assert meta["request_body_example_json"] == {"content": "hi"}
+    assert meta["response_example_json"] == {"code": 0}
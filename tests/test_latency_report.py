@@ -0,0 +1,63 @@
+import json
+
+import latency_report
+import runtime
+
+
+def record(endpoint, latency_ms, ts=0.0, status=200, scenario_type="lifecycle"):
+    return {"ts": ts, "latency_ms": latency_ms, "endpoint": endpoint, "status": status,
+            "scenario_type": scenario_type, "bytes": 10}
+
+
+def test_percentile_interpolates_linearly():
+    values = [10.0, 20.0, 30.0, 40.0]
+    assert latency_report.percentile(values, 50) == 25.0
+    assert latency_report.percentile(values, 99) == 39.7
+    assert latency_report.percentile([], 95) == 0.0
+
+
+def test_build_report_groups_by_endpoint_and_type():
+    records = [record("GET /m/:id", 10.0 * i, ts=i * 0.5) for i in range(1, 11)]
+    records.append(record("POST /m", 5.0, ts=1.0, status=429, scenario_type="mutation"))
+    report = latency_report.build_report(records)
+    assert report["total"]["count"] == 11 and report["total"]["throttled_429"] == 1
+    get = report["endpoints"]["GET /m/:id"]
+    assert get["p50"] == 55.0 and get["max"] == 100.0 and get["bytes"] == 100
+    assert get["throughput_rps"] == round(10 / (5.0 + 0.1 - 0.5), 3)
+    assert set(report["scenario_types"]) == {"lifecycle", "mutation"}
+
+
+def test_compare_flags_regressions_above_tolerance_and_noise():
+    base = latency_report.build_report([record("GET /m", 100.0)])
+    slower = latency_report.build_report([record("GET /m", 130.0)])
+    jitter = latency_report.build_report([record("GET /m", 104.0)])
+    assert len(latency_report.compare(slower, base, 0.2)) == 2 * len(latency_report.PERCENTILES)
+    assert latency_report.compare(jitter, base, 0.0) == []
+
+
+def test_load_records_skips_truncated_line(tmp_path):
+    path = tmp_path / "latency.jsonl"
+    path.write_text(json.dumps(record("GET /m", 1.0)) + "\n\n" + '{"ts": 1', encoding="utf-8")
+    assert len(latency_report.load_records(str(path))) == 1
+
+
+def test_send_records_each_attempt(tmp_path, monkeypatch):
+    class Response:
+        status_code, headers, content, text = 200, {}, b"{}", "{}"
+
+    class Http:
+        def request(self, method, url=None, **kwargs):
+            return Response()
+
+    monkeypatch.delenv(runtime.LATENCY_ENV, raising=False)
+    monkeypatch.setattr(runtime, "get_session", Http)
+    path = tmp_path / "logs" / "latency.jsonl"
+    runtime.configure_latency(str(path))
+    try:
+        runtime.send("GET", "http://h/messages/om_1", {}, {}, {}, resource="messages",
+                     endpoint=runtime.endpoint_key("GET", "http://h/messages/$auto_message_id"))
+    finally:
+        runtime.configure_latency(None)
+    (line,) = latency_report.load_records(str(path))
+    assert line["endpoint"] == "GET http://h/messages/:id" and line["resource"] == "messages"
+    assert line["status"] == 200 and line["attempt"] == 1
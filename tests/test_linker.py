@@ -0,0 +1,188 @@
+import json
+
+import mock_server
+import runtime
+from build_cache import json_default
+from linker import Step, build_final_suite, cluster_resources, fission_groups
+from routes import consumer_effect
+
+BASE = "https://open.example.com/open-apis/im/v1/messages"
+
+GROUP = [
+    {"case_name": "msg_01_send", "description": "send", "method": "POST", "url": BASE,
+     "body": {"content": "hi", "msg_type": "text"}},
+    {"case_name": "msg_02_get", "description": "get", "method": "GET", "url": f"{BASE}/:message_id"},
+    {"case_name": "msg_03_edit", "description": "edit", "method": "PUT", "url": f"{BASE}/:message_id",
+     "body": {"content": "x"}},
+    {"case_name": "msg_04_reply", "description": "reply", "method": "POST", "url": f"{BASE}/:message_id/reply",
+     "body": {"content": "re"}},
+    {"case_name": "msg_05_recall", "description": "recall", "method": "POST", "url": f"{BASE}/:message_id/recall",
+     "body": {"reason": "r"}},
+    {"case_name": "msg_06_delete", "description": "delete", "method": "DELETE", "url": f"{BASE}/:message_id"},
+]
+
+
+def build(**plan):
+    return build_final_suite("messages", GROUP, plan)
+
+
+def by_name(scenarios):
+    return {s["scenario_name"]: s for s in scenarios}
+
+
+def mutation_names(scenarios, api_id):
+    return [s["scenario_name"] for s in scenarios if s["scenario_name"].startswith(f"test_messages_mut_{api_id}_")]
+
+
+def test_consumer_effect():
+    effects = {api["case_name"]: consumer_effect(api) for api in GROUP[1:]}
+    assert effects == {"msg_02_get": "read", "msg_03_edit": "mutate", "msg_04_reply": "derive",
+                       "msg_05_recall": "mutate", "msg_06_delete": "delete"}
+
+
+def test_cluster_keeps_group():
+    assert list(cluster_resources(GROUP)) == ["messages"]
+
+
+def test_default_plan_gives_each_mutation_its_own_setup():
+    scenarios = build()
+    for name in mutation_names(scenarios, "msg_04_reply"):
+        steps = by_name(scenarios)[name]["steps"]
+        assert [s["method"] for s in steps] == ["POST", "POST", "DELETE"]
+    assert not any("cases" in s for s in scenarios)
+
+
+def test_batch_mutations_only_groups_state_neutral_consumers():
+    scenarios = build(batch_mutations=True)
+    named = by_name(scenarios)
+    batch = named["test_messages_mut_msg_04_reply_batch"]
+    assert [s["method"] for s in batch["setup"]] == ["POST"]
+    assert [s["method"] for s in batch["teardown"]] == ["DELETE"]
+    assert [c["case_name"] for c in batch["cases"]] == [
+        "test_messages_mut_msg_04_reply_miss_content",
+        "test_messages_mut_msg_04_reply_overflow_content",
+        "test_messages_mut_msg_04_reply_type_content",
+    ]
+    # 会改变资源状态的编辑 / 撤回接口：每个变异仍独立生产、删除
+    for api_id in ("msg_03_edit", "msg_05_recall"):
+        assert f"test_messages_mut_{api_id}_batch" not in named
+        names = mutation_names(scenarios, api_id)
+        assert len(names) == 3
+        for name in names:
+            steps = named[name]["steps"]
+            assert len(steps) == 3 and steps[0]["url"] == BASE and steps[-1]["method"] == "DELETE"
+
+
+def run_against_mock(monkeypatch, scenario):
+    """对挂载的 mock 服务执行一个共享前置的场景，返回 (app, 请求序列)"""
+    app = mock_server.MockApp(cluster_resources(GROUP))
+    requests, handle = [], app.handle
+    monkeypatch.setattr(app, "handle", lambda method, path, *args: requests.append((method, path)) or
+                        handle(method, path, *args))
+    server, base_url = mock_server.serve_in_thread(app)
+    monkeypatch.setattr(runtime, "VERBOSE", False)
+    runtime.configure_base_url(base_url)
+    try:
+        runtime.run_batch(json.loads(dump(scenario)))
+    finally:
+        runtime.configure_base_url(None)
+        runtime.close_session()
+        server.shutdown()
+        server.server_close()
+    return app, requests
+
+
+ITEM = "/open-apis/im/v1/messages/mock_message_1"
+
+
+def test_batch_setup_extracts_id_for_cases_and_teardown(monkeypatch):
+    batch = by_name(build(batch_mutations=True))["test_messages_mut_msg_04_reply_batch"]
+    assert "❌" not in batch["description"] and all("❌" in c["description"] for c in batch["cases"])
+
+    app, requests = run_against_mock(monkeypatch, batch)
+    assert requests == [("POST", "/open-apis/im/v1/messages")] + [("POST", f"{ITEM}/reply")] * 3 + [("DELETE", ITEM)]
+    # 后置删除成功，没有遗留资源
+    assert app.store["messages"] == {} and "404" not in app.stats["status"]
+
+
+def test_batch_mutations_keeps_case_count():
+    batched = build(batch_mutations=True)
+    assert sum(len(s["cases"]) if "cases" in s else 1 for s in batched) == len(build())
+
+
+def test_shared_fixture_reads_one_produced_resource(monkeypatch):
+    scenarios = build(shared_fixture=True)
+    shared = by_name(scenarios)["test_messages_01_shared"]
+    assert scenarios[1] is shared
+    assert [s["method"] for s in shared["setup"]] == ["POST"]
+    assert [s["method"] for s in shared["teardown"]] == ["DELETE"]
+    assert [(c["case_name"], c["scenario_type"]) for c in shared["cases"]] == [
+        ("test_messages_01_read_msg_02_get", "read_only")]
+    # 其余场景与默认产出一致
+    assert [s for s in scenarios if s is not shared] == build()
+
+    app, requests = run_against_mock(monkeypatch, shared)
+    assert requests == [("POST", "/open-apis/im/v1/messages"), ("GET", ITEM), ("DELETE", ITEM)]
+    assert app.store["messages"] == {} and "404" not in app.stats["status"]
+
+
+def test_shared_fixture_keeps_lifecycle_reads():
+    lifecycle = by_name(build(shared_fixture=True, batch_mutations=True))["test_messages_00_lifecycle"]
+    assert [s["url"].rsplit("/", 1)[-1] for s in lifecycle["steps"] if s["method"] == "GET"] == ["$auto_message_id"]
+
+
+def test_shared_fixture_hosts_read_only_and_batched_mutations():
+    group = GROUP + [{"case_name": "msg_07_query", "description": "query", "method": "GET",
+                      "url": f"{BASE}/:message_id/read_users", "body": {"page_token": "t"}}]
+    scenarios = build_final_suite("messages", group, {"shared_fixture": True})
+    shared = by_name(scenarios)["test_messages_01_shared"]
+    assert scenarios[1] is shared
+    assert [c["case_name"] for c in shared["cases"]] == [
+        "test_messages_01_read_msg_02_get",
+        "test_messages_01_read_msg_07_query",
+        "test_messages_mut_msg_07_query_miss_page_token",
+        "test_messages_mut_msg_07_query_overflow_page_token",
+        "test_messages_mut_msg_07_query_type_page_token",
+    ]
+    # 同时开启批量模式：派生动作 (reply) 的变异也挂在共享资源上，会改变状态的接口仍独立生产
+    both = by_name(build_final_suite("messages", group, {"shared_fixture": True, "batch_mutations": True}))
+    names = [c["case_name"] for c in both["test_messages_01_shared"]["cases"]][2:]
+    assert len(names) == 6
+    assert all("_mut_msg_04_reply_" in n or "_mut_msg_07_query_" in n for n in names)
+    assert "test_messages_mut_msg_03_edit_miss_content" in both
+    assert not any(name.endswith("_batch") for name in both)
+
+
+def dump(value):
+    return json.dumps(value, ensure_ascii=False, default=json_default)
+
+
+def test_parallel_fission_matches_serial():
+    pins = [{"case_name": "pin_01_create", "description": "pin", "method": "POST",
+             "url": "https://open.example.com/open-apis/im/v1/pins", "body": {"message_id": "om"}},
+            {"case_name": "pin_02_delete", "description": "unpin", "method": "DELETE",
+             "url": "https://open.example.com/open-apis/im/v1/pins/:pin_id"}]
+    groups = cluster_resources(GROUP + pins)
+    assert list(groups) == ["messages", "pins"]
+    plan = {"batch_mutations": True}
+    serial = fission_groups(groups, jobs=1, plan=plan)
+    parallel = fission_groups(groups, jobs=2, plan=plan)
+    assert list(parallel) == list(serial) == ["messages", "pins"]
+    assert dump(parallel) == dump(serial)
+
+
+def test_step_overrides_without_touching_base():
+    base = {"method": "GET", "url": "/m/:id", "body": {"a": 1}}
+    step = Step(base).evolve(url="/m/$auto_id", extract={"auto_id": "data.id"})
+    assert list(step) == ["method", "url", "body", "extract"]
+    assert dict(step) == {"method": "GET", "url": "/m/$auto_id", "body": {"a": 1}, "extract": {"auto_id": "data.id"}}
+    assert len(step) == 4 and step["body"] is base["body"]
+    assert base == {"method": "GET", "url": "/m/:id", "body": {"a": 1}}
+    assert dict(step.evolve(url="/other")) == dict(step, url="/other")
+
+
+def test_fission_never_mutates_the_spec():
+    snapshot = json.loads(json.dumps(GROUP))
+    build()
+    build(batch_mutations=True, shared_fixture=True)
+    assert GROUP == snapshot
@@ -0,0 +1,76 @@
+import argparse
+
+import pytest
+
+import load_runner
+import mock_server
+import runtime
+from linker import cluster_resources
+
+BASE = "http://h/im/v1"
+LIFECYCLE = {
+    "scenario_name": "test_messages_00_lifecycle", "scenario_type": "lifecycle", "description": "闭环",
+    "steps": [
+        {"method": "POST", "url": f"{BASE}/messages", "description": "发送", "body": {"content": "hi"},
+         "extract": {"auto_message_id": "data.message_id"}},
+        {"method": "GET", "url": f"{BASE}/messages/$auto_message_id", "description": "查询"},
+        {"method": "DELETE", "url": f"{BASE}/messages/$auto_message_id", "description": "删除"},
+    ],
+}
+SCENARIOS = [
+    LIFECYCLE,
+    {"scenario_name": "test_messages_mut_x", "scenario_type": "mutation", "steps": []},
+    {"scenario_name": "provider_messages", "scenario_type": "provider", "setup": [], "teardown": []},
+    {"scenario_name": "test_chats_00_lifecycle", "scenario_type": "lifecycle", "steps": []},
+]
+
+
+def names(selected):
+    return [(s["scenario_name"], w) for s, w in selected]
+
+
+def test_select_scenarios_filters_types_and_applies_weights():
+    assert names(load_runner.select_scenarios(SCENARIOS, ("lifecycle",), [])) == [
+        ("test_messages_00_lifecycle", 1.0), ("test_chats_00_lifecycle", 1.0)]
+    weights = load_runner.parse_weights(["*lifecycle=3", "test_chats_*=0"])
+    assert names(load_runner.select_scenarios(SCENARIOS, (), weights)) == [
+        ("test_messages_00_lifecycle", 3.0), ("test_messages_mut_x", 1.0)]
+    with pytest.raises(argparse.ArgumentTypeError):
+        load_runner.parse_weights(["lifecycle"])
+
+
+def test_pacer_ramps_rate_up_to_target():
+    pacer = load_runner.Pacer(100.0, 10.0, started=0.0)
+    assert pacer.rate_at(0.0) == 5.0
+    assert pacer.rate_at(5.0) == 50.0
+    assert pacer.rate_at(20.0) == 100.0
+    assert load_runner.Pacer(100.0, 0.0, started=0.0).rate_at(0.0) == 100.0
+
+
+@pytest.fixture
+def mock_url(monkeypatch):
+    monkeypatch.setattr(runtime, "VERBOSE", runtime.VERBOSE)
+    spec = [{"method": "POST", "url": f"{BASE}/messages", "body": {"content": "hi"}},
+            {"method": "GET", "url": f"{BASE}/messages/:message_id", "body": {}},
+            {"method": "DELETE", "url": f"{BASE}/messages/:message_id", "body": {}}]
+    server, base_url = mock_server.serve_in_thread(mock_server.MockApp(cluster_resources(spec)))
+    yield base_url
+    runtime.configure_base_url(None)
+    runtime.configure_throttle({})
+    server.shutdown()
+    server.server_close()
+
+
+def test_run_load_replays_lifecycle_against_mock(mock_url):
+    report = load_runner.run_load(SCENARIOS[:1], users=2, duration=0.3, base_url=mock_url)
+    counts = report["iterations"]["test_messages_00_lifecycle"]
+    assert counts["ok"] > 0 and counts["failed"] == 0 and report["errors"] == {}
+    assert report["all_requests"]["count"] == 3 * counts["ok"]
+    assert set(report["status_codes"]) == {"200"}
+    assert set(report["endpoints"]) == {"POST http://h/im/v1/messages", "GET http://h/im/v1/messages/:id",
+                                        "DELETE http://h/im/v1/messages/:id"}
+
+
+def test_run_load_rejects_empty_selection():
+    with pytest.raises(ValueError):
+        load_runner.run_load(SCENARIOS[1:3], types=("lifecycle",))
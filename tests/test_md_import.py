@@ -0,0 +1,76 @@
+import argparse
+import json
+import os
+
+import pytest
+
+import md_import
+
+DOC = """# {title}
+
+## 请求
+
+基本 | 值
+---|---
+HTTP URL | https://open.feishu.cn/open-apis/im/v1/{path}
+HTTP Method | post
+
+### 请求体
+| 名称 | 类型 | 必填 | 描述 |
+| --- | --- | --- | --- |
+| receive_id | string | 是 | 接收者 |
+
+### 请求体示例
+```json
+{{"receive_id": "ou_x", "content": "hi"}}
+```
+"""
+
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / "docs"
+    (root / "im").mkdir(parents=True)
+    (root / "im" / "b_reply.md").write_text(DOC.format(title="回复消息", path="messages/:message_id/reply"),
+                                            encoding="utf-8")
+    (root / "a_send.md").write_text(DOC.format(title="发送消息", path="messages"), encoding="utf-8")
+    (root / "index.md").write_text("# 目录\n\n没有接口。\n", encoding="utf-8")
+    (root / "notes.txt").write_text("ignored", encoding="utf-8")
+    return root
+
+
+def test_collect_docs_recurses_dedupes_and_sorts(docs):
+    paths = md_import.collect_docs([str(docs), str(docs / "a_send.md")])
+    assert [os.path.relpath(p, docs) for p in paths] == ["a_send.md", "im/b_reply.md".replace("/", os.sep),
+                                                         "index.md"]
+
+
+def test_convert_docs_numbers_cases_and_skips_non_api_pages(docs):
+    cfg = {"default_chat_id": "oc_default", "default_user_id": "ou_default", "advanced_map": {}}
+    cases, skipped = md_import.convert_docs(md_import.collect_docs([str(docs)]), cfg, start_seq=5)
+    assert [c["url"].rsplit("/v1/", 1)[1] for c in cases] == ["messages", "messages/:message_id/reply"]
+    assert [c["method"] for c in cases] == ["POST", "POST"]
+    assert [reason for _, reason in skipped] == ["未识别到 HTTP URL"]
+    parallel, _ = md_import.convert_docs(md_import.collect_docs([str(docs)]), cfg, jobs=2, start_seq=5)
+    assert parallel == cases
+
+
+def test_dump_cases_picks_format_and_skips_unchanged(tmp_path):
+    cases = [{"case_name": "a"}, {"case_name": "b"}]
+    lines = tmp_path / "data.jsonl"
+    assert md_import.dump_cases(cases, str(lines))
+    assert [json.loads(line) for line in lines.read_text(encoding="utf-8").splitlines()] == cases
+    assert not md_import.dump_cases(cases, str(lines))
+    array = tmp_path / "data.json"
+    md_import.dump_cases(cases, str(array))
+    assert json.loads(array.read_text(encoding="utf-8")) == cases
+
+
+def test_parse_mapping():
+    assert md_import.parse_mapping([" receive_id_type = chat_id", "a=b=c"]) == {"receive_id_type": "chat_id", "a": "b=c"}
+    with pytest.raises(argparse.ArgumentTypeError):
+        md_import.parse_mapping(["oops"])
+
+
+def test_main_reports_missing_inputs(tmp_path):
+    assert md_import.main([str(tmp_path / "empty"), "--output", str(tmp_path / "out.json")]) == 1
@@ -0,0 +1,67 @@
+import pytest
+
+import metrics
+
+
+def spans_by_id(m):
+    return {s["id"]: s for s in m.to_dict()["spans"]}
+
+
+def test_self_seconds_only_subtracts_own_children():
+    m = metrics.Metrics()
+    with m.span("total"):
+        for seconds in (0.5, 2.0):
+            with m.span("render") as render:
+                m.add_span("write", seconds / 2)
+            render["seconds"] = seconds    # 固定耗时，避免依赖真实计时
+    spans = spans_by_id(m)
+    renders = [s for s in spans.values() if s["name"] == "render"]
+    assert [r["self_seconds"] for r in renders] == [0.25, 1.0]
+    writes = [s for s in spans.values() if s["name"] == "write"]
+    assert [spans[w["parent_id"]]["seconds"] for w in writes] == [0.5, 2.0]
+
+
+def test_leaf_span_has_no_self_seconds():
+    m = metrics.Metrics()
+    m.add_span("fission_resource", 1.0, resource="chats")
+    (record,) = m.to_dict()["spans"]
+    assert record["parent_id"] is None
+    assert "self_seconds" not in record
+    assert record["attrs"] == {"resource": "chats"}
+
+
+def test_counters_per_resource():
+    m = metrics.Metrics()
+    m.incr("scenarios", 3, resource="chats")
+    m.incr("scenarios", 2, resource="messages")
+    m.incr("bytes_written", 10)
+    data = m.to_dict()
+    assert data["counters"] == {"scenarios": 5, "bytes_written": 10}
+    assert data["resources"] == {"chats": {"scenarios": 3}, "messages": {"scenarios": 2}}
+
+
+def test_step_count_and_case_types():
+    batch = {"scenario_type": "mutation", "setup": [{}], "teardown": [{}],
+             "cases": [{"steps": [{}, {}]}, {"steps": [{}], "scenario_type": "res_not_found"}]}
+    provider = {"scenario_type": "provider", "setup": [{}], "teardown": [{}]}
+    assert metrics.step_count(batch) == 5
+    assert metrics.step_count(provider) == 2
+    assert metrics.step_count({"steps": [{}, {}, {}]}) == 3
+    assert metrics.case_types(batch) == ["mutation", "res_not_found"]
+    assert metrics.case_types(provider) == []
+
+
+def test_timed_iter_records_one_span_under_parent():
+    m = metrics.Metrics()
+    with m.span("load"):
+        assert list(m.timed_iter("read", iter([1, 2, 3]), file="x")) == [1, 2, 3]
+    load, read = m.to_dict()["spans"]
+    assert read["name"] == "read" and read["parent_id"] == load["id"] and read["attrs"] == {"file": "x"}
+
+
+def test_profiled_rejects_unknown_kind():
+    with metrics.profiled(None):
+        pass
+    with pytest.raises(ValueError, match="perf"):
+        with metrics.profiled("perf"):
+            pass
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+import mock_server
+import runtime
+from linker import cluster_resources
+
+BASE = "http://h/im/v1"
+SPEC = [
+    {"case_name": "msg_create", "method": "POST", "url": f"{BASE}/messages", "body": {"content": "hi", "n": 1},
+     "response_example_json": {"code": 0, "data": {"sender": {"id": "ou_x"}}}},
+    {"case_name": "msg_list", "method": "GET", "url": f"{BASE}/messages", "body": {}},
+    {"case_name": "msg_get", "method": "GET", "url": f"{BASE}/messages/:message_id", "body": {}},
+    {"case_name": "msg_edit", "method": "PUT", "url": f"{BASE}/messages/:message_id", "body": {"content": "x"}},
+    {"case_name": "msg_reply", "method": "POST", "url": f"{BASE}/messages/:message_id/reply",
+     "body": {"content": "r"}},
+    {"case_name": "msg_del", "method": "DELETE", "url": f"{BASE}/messages/:message_id", "body": {}},
+]
+
+
+def app(**options):
+    return mock_server.MockApp(cluster_resources(SPEC), **options)
+
+
+def call(mock, method, path, body=None, query=None):
+    return mock.handle(method, "/im/v1" + path, query or {}, body or {})
+
+
+def test_resource_lifecycle_against_in_memory_store():
+    mock = app()
+    status, _, created = call(mock, "POST", "/messages", {"content": "hi", "n": 1})
+    message_id = created["data"]["message_id"]
+    assert status == 200 and created["data"]["sender"] == {"id": "ou_x"}
+    assert call(mock, "PUT", f"/messages/{message_id}", {"content": "edited"})[0] == 200
+    assert call(mock, "GET", f"/messages/{message_id}")[2]["data"]["content"] == "edited"
+    # 动作接口不改写资源本身
+    call(mock, "POST", f"/messages/{message_id}/reply", {"content": "r"})
+    assert call(mock, "GET", f"/messages/{message_id}")[2]["data"]["content"] == "edited"
+    assert call(mock, "GET", "/messages", query={"page_size": ["1"]})[2]["data"]["has_more"] is False
+    assert call(mock, "DELETE", f"/messages/{message_id}")[0] == 200
+    assert call(mock, "GET", f"/messages/{message_id}")[0] == 404
+    assert call(mock, "GET", "/unknown")[0] == 404
+    stats = mock.handle("GET", mock_server.STATS_PATH, {}, {})[2]
+    assert stats["total"] == 9 and stats["status"] == {"200": 7, "404": 2}
+    assert stats["routes"]["unmatched"] == 1
+
+
+def test_producer_is_idempotent_per_uuid():
+    mock = app(validate=False)
+    first = call(mock, "POST", "/messages", {"uuid": "u1"})[2]["data"]["message_id"]
+    assert call(mock, "POST", "/messages", {"uuid": "u1"})[2]["data"]["message_id"] == first
+    assert call(mock, "POST", "/messages", {"uuid": "u2"})[2]["data"]["message_id"] != first
+
+
+@pytest.mark.parametrize("body, problem", [
+    ({"content": "hi"}, "缺少字段 n"),
+    ({"content": "hi", "n": "1"}, "n 类型应为 number"),
+    ({"content": "A" * 2048, "n": 1}, "content 超过最大长度"),
+])
+def test_body_validation(body, problem):
+    status, _, payload = call(app(), "POST", "/messages", body)
+    assert status == 400 and problem in payload["msg"]
+
+
+def test_placeholders_skip_type_check():
+    assert mock_server.MockApp.check_body({"content": "raw_data:text"}, {"content": 3}) is None
+
+
+def test_fault_injection_is_seeded():
+    mock = app(rate_429=1.0, retry_after=2)
+    status, headers, _ = call(mock, "POST", "/messages", {"content": "hi", "n": 1})
+    assert status == 429 and headers == {"Retry-After": "2"}
+    assert call(app(error_rate=1.0, error_status=503), "GET", "/messages")[0] == 503
+
+
+def test_scenario_runs_against_served_mock(monkeypatch):
+    server, base_url = mock_server.serve_in_thread(app())
+    monkeypatch.setattr(runtime, "VERBOSE", False)
+    runtime.configure_base_url(base_url)
+    try:
+        ctx = runtime.run_scenario({
+            "scenario_name": "test_messages_00_lifecycle", "description": "闭环", "steps": [
+                {"method": "POST", "url": f"{BASE}/messages", "description": "发送", "body": {"content": "hi", "n": 1},
+                 "extract": {"auto_message_id": "data.message_id"}},
+                {"method": "GET", "url": f"{BASE}/messages/$auto_message_id", "description": "查询"},
+                {"method": "DELETE", "url": f"{BASE}/messages/$auto_message_id", "description": "删除"},
+            ]})
+        assert ctx.vars_pool["auto_message_id"].startswith("mock_message_")
+    finally:
+        runtime.configure_base_url(None)
+        runtime.close_session()
+        server.shutdown()
+        server.server_close()
+
+
+def test_rewrite_spec_keeps_paths(tmp_path):
+    spec = tmp_path / "data.json"
+    spec.write_text(json.dumps(SPEC[:2]), encoding="utf-8")
+    out = tmp_path / "data_mock.json"
+    assert mock_server.rewrite_spec(str(spec), "http://127.0.0.1:9/", str(out)) == 2
+    assert [a["url"] for a in json.loads(out.read_text(encoding="utf-8"))] == [
+        "http://127.0.0.1:9/im/v1/messages"] * 2
@@ -0,0 +1,51 @@
+from routes import (RouteIndex, bind_path_params, classify_group, fill_path_params, group_collection_index,
+                    parse_route)
+
+IM = "https://open.feishu.cn/open-apis/im/v1"
+
+
+def api(method, path):
+    return {"method": method, "url": f"{IM}{path}"}
+
+
+def test_parse_route_ignores_port_and_finds_params():
+    route = parse_route("http://127.0.0.1:8080/im/v1/messages/:message_id/reply?x=1")
+    assert route.origin == "http://127.0.0.1:8080"
+    assert route.segments == ("im", "v1", "messages", ":message_id", "reply")
+    assert route.param_positions == (3,)
+    assert route.query == "x=1" and route.resource_hint == "messages"
+
+
+def test_resource_groups_split_nested_collections():
+    index = RouteIndex()
+    for a in [api("POST", "/chats"), api("GET", "/chats/:chat_id"),
+              api("POST", "/chats/:chat_id/members"), api("DELETE", "/chats/:chat_id/members/:member_id"),
+              api("POST", "/messages"), api("GET", "/messages/:message_id/read_users")]:
+        index.add(a)
+    groups = index.resource_groups()
+    assert {name: len(g) for name, g in groups.items()} == {"chats": 2, "members": 2, "messages": 2}
+    assert index.parents == {"members": "chats"}
+
+
+def test_nested_name_clashing_with_top_level_is_prefixed():
+    index = RouteIndex()
+    for a in [api("POST", "/members"), api("POST", "/chats/:chat_id/members"),
+              api("DELETE", "/chats/:chat_id/members/:member_id")]:
+        index.add(a)
+    assert list(index.resource_groups()) == ["members", "chats_members"]
+    assert index.parents == {"chats_members": "chats"}
+
+
+def test_classify_group_roles():
+    group = [api("POST", "/messages"), api("GET", "/messages"), api("PATCH", "/messages"),
+             api("GET", "/messages/:message_id"), api("DELETE", "/messages/:message_id")]
+    assert [role for _, role in classify_group(group)] == ["producer", "list", None, "consumer", "consumer"]
+
+
+def test_bind_path_params_for_nested_group():
+    group = [api("POST", "/chats/:chat_id/members"), api("DELETE", "/chats/:chat_id/members/:member_id")]
+    index = group_collection_index(group)
+    assert bind_path_params(group[1]["url"], index, "auto_member_id") == \
+        f"{IM}/chats/$auto_chat_id/members/$auto_member_id"
+    assert bind_path_params(group[1]["url"], index) == f"{IM}/chats/$auto_chat_id/members/:member_id"
+    assert fill_path_params(group[1]["url"], "x") == f"{IM}/chats/x/members/x"
@@ -0,0 +1,82 @@
+import copy
+
+import pytest
+
+import run_history
+
+
+def step(method, url, **extra):
+    return dict({"method": method, "url": url, "description": f"{method} {url}"}, **extra)
+
+
+PROVIDER = {
+    "scenario_name": "provider_chats", "scenario_type": "provider", "resource": "chats",
+    "description": "chats", "provides": "auto_chat_id",
+    "setup": [step("POST", "/chats", body={"name": "g"}, extract={"auto_chat_id": "data.chat_id"})],
+    "teardown": [step("DELETE", "/chats/$auto_chat_id")],
+}
+DOWNSTREAM = {
+    "scenario_name": "test_members_00_lifecycle", "scenario_type": "lifecycle", "resource": "members",
+    "description": "members", "requires": {"auto_chat_id": "provider_chats"},
+    "steps": [step("POST", "/chats/$auto_chat_id/members", body={"name": "u"})],
+}
+STANDALONE = {
+    "scenario_name": "test_messages_00_lifecycle", "scenario_type": "lifecycle", "resource": "messages",
+    "description": "messages", "steps": [step("POST", "/messages", body={"content": "hi"})],
+}
+
+
+@pytest.fixture
+def history(tmp_path):
+    h = run_history.RunHistory(str(tmp_path / "history.sqlite"))
+    yield h
+    h.close()
+
+
+def results(scenarios, ok=True):
+    return [{"ok": ok, "duration": 0.1, "error": None} for _ in scenarios]
+
+
+def test_skip_passed_and_keep_needed_providers(history):
+    scenarios = [PROVIDER, DOWNSTREAM, STANDALONE]
+    run_history.record_results(history, scenarios, results(scenarios))
+    planned, skipped = run_history.plan_scenarios(history, scenarios, skip_seconds=3600)
+    assert planned == [] and sorted(skipped) == ["test_members_00_lifecycle", "test_messages_00_lifecycle"]
+
+
+def test_provider_change_invalidates_dependants(history):
+    scenarios = [PROVIDER, DOWNSTREAM, STANDALONE]
+    run_history.record_results(history, scenarios, results(scenarios))
+
+    provider = copy.deepcopy(PROVIDER)
+    provider["setup"][0]["body"]["name"] = "changed"
+    planned, skipped = run_history.plan_scenarios(history, [provider, DOWNSTREAM, STANDALONE], skip_seconds=3600)
+    assert [s["scenario_name"] for s in planned] == ["provider_chats", "test_members_00_lifecycle"]
+    assert skipped == ["test_messages_00_lifecycle"]
+
+
+def test_failed_run_is_not_skipped(history):
+    scenarios = [STANDALONE]
+    run_history.record_results(history, scenarios, results(scenarios))
+    run_history.record_results(history, scenarios, results(scenarios, ok=False))
+    planned, skipped = run_history.plan_scenarios(history, scenarios, skip_seconds=3600)
+    assert planned == [STANDALONE] and skipped == []
+
+
+def test_test_fingerprints_fold_providers():
+    base = run_history.test_fingerprints([PROVIDER, DOWNSTREAM, STANDALONE])
+    provider = copy.deepcopy(PROVIDER)
+    provider["teardown"][0]["url"] = "/v2/chats/$auto_chat_id"
+    changed = run_history.test_fingerprints([provider, DOWNSTREAM, STANDALONE])
+    assert set(base) == {"test_members_00_lifecycle", "test_messages_00_lifecycle"}
+    assert base["test_members_00_lifecycle"] != changed["test_members_00_lifecycle"]
+    assert base["test_messages_00_lifecycle"] == changed["test_messages_00_lifecycle"]
+
+
+def test_order_puts_recent_failures_first(history):
+    scenarios = [STANDALONE, DOWNSTREAM, PROVIDER]
+    run_history.record_results(history, [STANDALONE], results([STANDALONE], ok=False))
+    run_history.record_results(history, [PROVIDER, DOWNSTREAM], results([PROVIDER, DOWNSTREAM]))
+    planned, _ = run_history.plan_scenarios(history, scenarios, order=True)
+    assert [s["scenario_name"] for s in planned] == ["provider_chats", "test_messages_00_lifecycle",
+                                                     "test_members_00_lifecycle"]
@@ -0,0 +1,264 @@
+import json
+
+import pytest
+
+import runtime
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self.headers = {}
+        self.content = json.dumps(payload).encode()
+        self.text = self.content.decode()
+
+
+class FakeServer:
+    """按 (method, path) 返回 (状态码, JSON)；记录每次请求"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+
+    def request(self, method, url=None, json=None, params=None, **kwargs):
+        path = url.split("://", 1)[-1].split("/", 1)[-1]
+        self.requests.append((method, "/" + path, json, params))
+        status, payload = self.routes.get((method, "/" + path), (404, {"code": 404, "msg": "not found"}))
+        return FakeResponse(status, payload)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    def install(routes):
+        fake = FakeServer(routes)
+        monkeypatch.setattr(runtime, "get_session", lambda: fake)
+        return fake
+
+    monkeypatch.setattr(runtime, "VERBOSE", False)
+    runtime.configure_throttle({"default": {"rate": None, "max_attempts": 1}})
+    yield install
+    runtime.configure_throttle({})
+
+
+@pytest.fixture
+def http_config():
+    yield
+    runtime.configure_http(**runtime.DEFAULT_HTTP_CONFIG)
+
+
+def test_build_session_mounts_pooled_adapter():
+    session = runtime.build_session({"pool_maxsize": 7, "max_retries": 4})
+    adapter = session.get_adapter("https://open.feishu.cn/open-apis")
+    assert adapter is session.get_adapter("http://127.0.0.1:8080")
+    assert adapter._pool_maxsize == 7 and adapter.max_retries.total == 4
+    session.close()
+
+
+def test_session_is_shared_until_reconfigured(http_config):
+    first = runtime.get_session()
+    assert runtime.get_session() is first
+    runtime.configure_http(pool_maxsize=3)
+    second = runtime.get_session()
+    assert second is not first
+    assert second.get_adapter("http://x")._pool_maxsize == 3
+
+
+def test_configure_http_rejects_unknown_keys(http_config):
+    with pytest.raises(ValueError):
+        runtime.configure_http(pool_size=3)
+
+
+LIFECYCLE = {
+    "scenario_name": "test_messages_00_lifecycle", "scenario_type": "lifecycle", "resource": "messages",
+    "description": "业务闭环",
+    "steps": [
+        {"method": "POST", "url": "http://h/messages", "description": "发送", "body": {"content": "hi"},
+         "extract": {"auto_message_id": "data.message_id"}},
+        {"method": "GET", "url": "http://h/messages/$auto_message_id", "description": "查询"},
+        {"method": "DELETE", "url": "http://h/messages/$auto_message_id", "description": "删除"},
+    ],
+}
+ROUTES = {
+    ("POST", "/messages"): (200, {"code": 0, "data": {"message_id": "om_1", "content": "hi"}}),
+    ("GET", "/messages/om_1"): (200, {"code": 0, "data": {"message_id": "om_1"}}),
+    ("DELETE", "/messages/om_1"): (200, {"code": 0}),
+}
+
+
+def test_run_scenario_chains_extracted_vars(server):
+    fake = server(ROUTES)
+    ctx = runtime.run_scenario(LIFECYCLE)
+    assert ctx.vars_pool["auto_message_id"] == "om_1"
+    assert [(m, p) for m, p, _, _ in fake.requests] == [
+        ("POST", "/messages"), ("GET", "/messages/om_1"), ("DELETE", "/messages/om_1")]
+
+
+def test_run_scenario_raises_on_unexpected_error(server):
+    server({("POST", "/messages"): (500, {"code": 500, "msg": "boom"})})
+    with pytest.raises(AssertionError, match="HTTP 500"):
+        runtime.run_scenario(LIFECYCLE)
+
+
+def test_expected_failure_only_warns(server):
+    server({})
+    scenario = {"scenario_name": "test_messages_res_not_found", "description": "❌ 资源不存在测试",
+                "steps": [{"method": "DELETE", "url": "http://h/messages/invalid_id_999", "description": "删除 ❌"}]}
+    runtime.run_scenario(scenario)
+
+
+BATCH = {
+    "scenario_name": "test_messages_mut_reply_batch", "scenario_type": "mutation", "resource": "messages",
+    "description": "批次",
+    "setup": [LIFECYCLE["steps"][0]],
+    "cases": [
+        {"case_name": "case_ok", "description": "❌ 变异", "steps": [
+            {"method": "POST", "url": "http://h/messages/$auto_message_id/reply", "description": "回复 ❌"}]},
+        {"case_name": "case_bad", "description": "正向", "steps": [
+            {"method": "GET", "url": "http://h/missing", "description": "查询"}]},
+    ],
+    "teardown": [LIFECYCLE["steps"][2]],
+}
+
+
+def test_run_batch_tears_down_and_reports_failed_cases(server):
+    fake = server(ROUTES)
+    with pytest.raises(AssertionError, match="case_bad") as e:
+        runtime.run_batch(BATCH)
+    assert "case_ok" not in str(e.value)
+    paths = [p for _, p, _, _ in fake.requests]
+    assert paths == ["/messages", "/messages/om_1/reply", "/missing", "/messages/om_1"]
+
+
+def test_batch_pool_sets_up_once_and_tears_down_after_last_case(server):
+    fake = server(ROUTES)
+    pool = runtime.BatchPool()
+    for case in BATCH["cases"][:1] * 2:
+        ctx = pool.acquire(BATCH)
+        runtime.run_case(case, ctx)
+        assert [m for m, _, _, _ in fake.requests].count("DELETE") == 0
+        pool.release(BATCH)
+    assert [m for m, _, _, _ in fake.requests] == ["POST", "POST", "POST", "DELETE"]
+    pool.close()
+    assert len(fake.requests) == 4
+
+
+def ctx_for(name="test_inject"):
+    runtime.configure_data_seed(7)
+    return runtime.ScenarioContext(name, "注入", "messages", "lifecycle")
+
+
+def test_smart_inject_markers_and_placeholders(monkeypatch):
+    monkeypatch.setattr(runtime, "VERBOSE", False)
+    ctx = ctx_for()
+    body = runtime.smart_inject({
+        "email": "raw_data:email", "receive_id": "Auto_id", "priority": "raw_data:int",
+        "content": "raw_data:text", "text": "__OVERFLOW__", "count": "__WRONG_TYPE__",
+        "uuid": "GENERATE_UUID", "nested": {"user_name": "raw_data:name"}, "keep": "literal", "n": 3,
+    }, ctx)
+    assert "@" in body["email"]
+    assert body["receive_id"].startswith("Auto_receive_id_")
+    assert 2 <= body["priority"] <= 100
+    assert json.loads(body["content"])["text"].startswith("Auto_Content_")
+    assert body["text"] == "A" * 2048 and body["count"] == 123456
+    assert body["uuid"] == ctx.temp_uuid
+    assert body["nested"]["user_name"].startswith("Auto_")
+    assert body["keep"] == "literal" and body["n"] == 3
+
+    again = runtime.smart_inject({"uuid": "reuse_uuid_from_step_1"}, ctx)
+    assert again["uuid"] == ctx.temp_uuid
+
+
+def test_smart_inject_drops_optional_raw_params():
+    params = runtime.smart_inject({"page_size": "raw_data:int", "page_token": "Auto_x", "receive_id_type": "chat_id"},
+                                  ctx_for(), is_params=True)
+    assert "page_size" not in params
+    assert params["page_token"].startswith("Auto_page_token_") and params["receive_id_type"] == "chat_id"
+
+
+def test_substitute_vars(monkeypatch):
+    monkeypatch.setattr(runtime, "VERBOSE", False)
+    pool = {"auto_chat_id": "oc_1", "auto_user_ids": ["ou_1", "ou_2"]}
+    url, body = runtime.substitute_vars("http://h/chats/$auto_chat_id/members",
+                                        {"chat_id": "$auto_chat_id", "ids": ["$auto_user_ids", "ou_3"],
+                                         "other": "$unknown"}, pool)
+    assert url == "http://h/chats/oc_1/members"
+    assert body == {"chat_id": "oc_1", "ids": ["ou_1", "ou_2", "ou_3"], "other": "$unknown"}
+
+
+def test_verify_response_ignores_environment_codes(monkeypatch):
+    monkeypatch.setattr(runtime, "VERBOSE", False)
+    assert runtime.verify_response(FakeResponse(200, {"code": 0}), expected_fail=False) is True
+    assert runtime.verify_response(FakeResponse(400, {"code": 99991663, "msg": "x"}), expected_fail=False) is False
+    assert runtime.verify_response(FakeResponse(200, {"code": 0}), expected_fail=True) is False
+    with pytest.raises(AssertionError, match="HTTP 400"):
+        runtime.verify_response(FakeResponse(400, {"code": 1, "msg": "bad"}), expected_fail=False)
+
+
+def test_provider_pool_produces_once_and_deletes_in_reverse(server):
+    fake = server({
+        ("POST", "/chats"): (200, {"code": 0, "data": {"chat_id": "oc_1"}}),
+        ("POST", "/chats/oc_1/members"): (200, {"code": 0, "data": {"member_id": "ou_1"}}),
+        ("DELETE", "/chats/oc_1"): (200, {"code": 0}),
+        ("DELETE", "/chats/oc_1/members/ou_1"): (200, {"code": 0}),
+    })
+    providers = [
+        {"scenario_name": "provider_chats", "scenario_type": "provider", "description": "chats",
+         "setup": [{"method": "POST", "url": "http://h/chats", "description": "建群",
+                    "extract": {"auto_chat_id": "data.chat_id"}}],
+         "teardown": [{"method": "DELETE", "url": "http://h/chats/$auto_chat_id", "description": "解散"}]},
+        {"scenario_name": "provider_members", "scenario_type": "provider", "description": "members",
+         "requires": {"auto_chat_id": "provider_chats"},
+         "setup": [{"method": "POST", "url": "http://h/chats/$auto_chat_id/members", "description": "拉人",
+                    "extract": {"auto_member_id": "data.member_id"}}],
+         "teardown": [{"method": "DELETE", "url": "http://h/chats/$auto_chat_id/members/$auto_member_id",
+                       "description": "踢人"}]},
+    ]
+    pool = runtime.ProviderPool(providers)
+    downstream = {"requires": {"auto_member_id": "provider_members", "auto_chat_id": "provider_chats"}}
+    assert pool.seed_for(downstream) == {"auto_chat_id": "oc_1", "auto_member_id": "ou_1"}
+    assert pool.seed_for(downstream) == {"auto_chat_id": "oc_1", "auto_member_id": "ou_1"}
+    pool.close()
+    assert [(m, p) for m, p, _, _ in fake.requests] == [
+        ("POST", "/chats"), ("POST", "/chats/oc_1/members"),
+        ("DELETE", "/chats/oc_1/members/ou_1"), ("DELETE", "/chats/oc_1")]
+
+
+def inject_emails(seed, names):
+    runtime.configure_data_seed(seed)
+    return [runtime.smart_inject({"email": "raw_data:email", "name": "raw_data:name"},
+                                 runtime.ScenarioContext(n, "注入")) for n in names]
+
+
+def test_same_seed_reproduces_values_regardless_of_order(monkeypatch):
+    monkeypatch.setattr(runtime, "VERBOSE", False)
+    monkeypatch.delenv(runtime.SEED_ENV, raising=False)
+    forward = inject_emails(42, ["test_a", "test_b"])
+    backward = inject_emails(42, ["test_b", "test_a"])
+    assert forward == backward[::-1]
+    assert inject_emails(43, ["test_a", "test_b"]) != forward
+
+
+def test_scenario_rng_advances_per_run_of_the_same_name(monkeypatch):
+    monkeypatch.delenv(runtime.SEED_ENV, raising=False)
+    runtime.configure_data_seed(1)
+    first, second = runtime.scenario_rng("test_a").random(), runtime.scenario_rng("test_a").random()
+    assert first != second
+    runtime.configure_data_seed(1)
+    assert runtime.scenario_rng("test_a").random() == first
+
+
+def test_seed_env_overrides_configured_seed(monkeypatch):
+    monkeypatch.setenv(runtime.SEED_ENV, "7")
+    assert runtime.configure_data_seed(99) == 7
+    assert "SAAP_SEED=7" in runtime.seed_banner()
+    monkeypatch.delenv(runtime.SEED_ENV)
+    assert runtime.configure_data_seed(99) == 99
+
+
+def test_pools_are_built_lazily_once_per_category(monkeypatch):
+    monkeypatch.delenv(runtime.SEED_ENV, raising=False)
+    runtime.configure_data_seed(5)
+    assert runtime._pools == {}
+    pool = runtime._pool("email")
+    assert len(pool) == runtime.POOL_SIZE and runtime._pool("email") is pool
+    assert list(runtime._pools) == ["email"]
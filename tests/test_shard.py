@@ -0,0 +1,77 @@
+import argparse
+import json
+
+import pytest
+
+import shard
+
+
+def scenario(name, resource, steps=1, **extra):
+    return dict({"scenario_name": name, "resource": resource, "steps": [{}] * steps}, **extra)
+
+
+SCENARIOS = [
+    scenario("test_chats_00_lifecycle", "chats", 4),
+    scenario("test_chats_01_mut", "chats", 2),
+    scenario("test_messages_00_lifecycle", "messages", 3),
+    scenario("test_pins_00_lifecycle", "pins", 1),
+    {"scenario_name": "provider_chats", "resource": "chats", "scenario_type": "provider",
+     "setup": [{}], "teardown": [{}]},
+    {"scenario_name": "test_messages_mut_batch", "resource": "messages", "setup": [{}], "teardown": [{}],
+     "cases": [{"case_name": "case_a", "steps": [{}]}, {"case_name": "case_b", "steps": [{}]}]},
+]
+
+
+def file_for(resource):
+    return f"test_suite_{resource}.py"
+
+
+def test_scenario_cost_prefers_history_then_average():
+    history = {"scenarios": {"test_pins_00_lifecycle": [900.0, 3], "case_a": [100.0, 1]}, "request_ms": 50.0}
+    assert shard.scenario_cost(SCENARIOS[3], history) == (0.3, "history")
+    assert shard.scenario_cost(SCENARIOS[5], history) == (0.4, "history")
+    assert shard.scenario_cost(SCENARIOS[2], history) == (0.15, "average")
+    assert shard.scenario_cost(SCENARIOS[2]) == (3 * shard.DEFAULT_STEP_SECONDS, "estimate")
+
+
+def test_load_history_counts_only_first_attempts(tmp_path):
+    path = tmp_path / "latency.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in [
+        {"scenario": "s", "latency_ms": 10.0, "attempt": 1},
+        {"scenario": "s", "latency_ms": 30.0, "attempt": 2},
+    ]), encoding="utf-8")
+    history = shard.load_history([str(path), str(tmp_path / "missing.jsonl")])
+    assert history == {"scenarios": {"s": [40.0, 1]}, "request_ms": 40.0}
+
+
+def test_build_plan_keeps_resources_together_and_balances():
+    plan = shard.build_plan(SCENARIOS, 2, "render", file_for)
+    assert [u["key"] for u in plan["units"]] == ["chats", "messages", "pins"]
+    chats = plan["units"][0]
+    assert chats["tests"] == ["test_suite_chats.py::test_chats_00_lifecycle", "test_suite_chats.py::test_chats_01_mut"]
+    assert plan["units"][1]["tests"][-1] == "test_suite_messages.py::Test_messages_mut_batch"
+    # 批次场景 = setup + 全部用例 + teardown 共 4 步，messages 组最重，先分配
+    assert [s["units"] for s in plan["shards"]] == [["messages"], ["chats", "pins"]]
+    assert plan["total_cost"] == 2.8 and plan["makespan"] == 1.4 and plan["speedup"] == 2.0
+
+
+def test_scenario_affinity_and_runtime_ids():
+    plan = shard.build_plan(SCENARIOS, 3, "runtime", file_for, affinity="scenario")
+    assert len(plan["units"]) == 5
+    batch = next(u for u in plan["units"] if u["key"] == "test_messages_mut_batch")
+    assert batch["tests"] == ["test_suite_messages.py::test_scenario[case_a]",
+                              "test_suite_messages.py::test_scenario[case_b]"]
+    assert sorted(s["cost"] for s in plan["shards"]) == [0.8, 1.0, 1.0]
+    with pytest.raises(ValueError):
+        shard.build_plan(SCENARIOS, 2, "render", file_for, affinity="file")
+
+
+def test_reschedule_and_parse_shard():
+    plan = shard.build_plan(SCENARIOS, 2, "render", file_for)
+    assert shard.reschedule(plan, 2) is plan["shards"]
+    assert len(shard.reschedule(plan, 4)) == 4
+    assert "2 个分片为空" in shard.describe(dict(plan, workers=5, shards=shard.reschedule(plan, 5)))
+    assert shard.parse_shard("2/4") == (2, 4)
+    for text in ("5/4", "a/b"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            shard.parse_shard(text)
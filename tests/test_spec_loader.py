@@ -0,0 +1,104 @@
+import io
+import json
+
+import pytest
+
+import spec_loader
+from spec_loader import JsonStream, SpecLoadError, iter_spec
+
+ENTRIES = [
+    {"case_name": "msg_create", "method": "POST", "url": "http://h/im/v1/messages", "body": {"n": 12345678}},
+    {"case_name": "msg_get", "method": "GET", "url": "http://h/im/v1/messages/:message_id", "body": {}},
+]
+
+
+def test_json_array_streams_with_tiny_chunks(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(ENTRIES, indent=2), encoding="utf-8")
+    with open(path, encoding="utf-8") as f:
+        assert list(JsonStream(f, str(path), chunk_size=3).items()) == ENTRIES
+    assert list(iter_spec(str(path))) == ENTRIES
+
+
+def test_skip_discards_nested_values():
+    stream = JsonStream(io.StringIO('{"a": {"b": [1, {"c": 2}]}, "keep": 3}'), "mem", chunk_size=4)
+    seen = {}
+    for key in stream.members():
+        if key == "keep":
+            seen[key] = stream.decode()
+        else:
+            stream.skip()
+    assert seen == {"keep": 3}
+
+
+def test_json_lines_skip_blank_lines(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_text("\n".join(json.dumps(e) for e in ENTRIES) + "\n\n", encoding="utf-8")
+    assert list(iter_spec(str(path))) == ENTRIES
+
+
+def test_errors_carry_line_and_column(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('[\n  {"method": "GET", "url": "http://h/x"},\n  {"method": }\n]', encoding="utf-8")
+    with pytest.raises(SpecLoadError, match=r"data\.json:3:14"):
+        list(iter_spec(str(path)))
+
+    path = tmp_path / "data.jsonl"
+    path.write_text('{"method": "GET", "url": "http://h/x"}\n{oops}\n', encoding="utf-8")
+    with pytest.raises(SpecLoadError, match=r"data\.jsonl:2:2"):
+        list(iter_spec(str(path)))
+
+
+def test_missing_fields_and_unknown_format(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps([{"case_name": "x", "method": "GET"}]), encoding="utf-8")
+    with pytest.raises(SpecLoadError, match=r"\(x\) 缺少字段 \['url'\]"):
+        list(iter_spec(str(path)))
+
+    path.write_text('{"hello": 1}', encoding="utf-8")
+    with pytest.raises(SpecLoadError, match="无法识别"):
+        iter_spec(str(path))
+    with pytest.raises(SpecLoadError, match="文件不存在"):
+        iter_spec(str(tmp_path / "missing.json"))
+
+
+OPENAPI = {
+    "info": {"title": "demo"},
+    "paths": {
+        "/messages": {
+            "post": {
+                "operationId": "send_message", "summary": "发送消息",
+                "parameters": [{"$ref": "#/components/parameters/ReceiveIdType"}],
+                "requestBody": {"content": {"application/json": {
+                    "schema": {"$ref": "#/components/schemas/Message"}}}},
+                "responses": {"200": {"content": {"application/json": {"example": {"code": 0}}}}},
+            },
+        },
+        "/messages/{message_id}": {"delete": {"summary": "撤回消息", "responses": {}}},
+    },
+    "openapi": "3.0.0",
+    "servers": [{"url": "http://h/im/v1/"}],
+    "components": {
+        "parameters": {"ReceiveIdType": {"name": "receive_id_type", "in": "query"}},
+        "schemas": {"Message": {"properties": {"content": {}}, "example": {"content": "hi"}}},
+    },
+}
+
+
+def test_openapi_collects_meta_after_paths(tmp_path):
+    path = tmp_path / "openapi.json"
+    path.write_text(json.dumps(OPENAPI), encoding="utf-8")
+    cases = list(iter_spec(str(path)))
+    assert [(c["method"], c["url"]) for c in cases] == [
+        ("POST", "http://h/im/v1/messages"), ("DELETE", "http://h/im/v1/messages/:message_id")]
+    assert "receive_id_type" in cases[0]["params"]
+
+
+def test_operation_meta_resolves_refs():
+    meta = {k: OPENAPI[k] for k in ("openapi", "servers", "components")}
+    item = OPENAPI["paths"]["/messages"]
+    api_meta = spec_loader.openapi_operation_meta("/messages", "post", item, item["post"], meta)
+    assert api_meta["request_body_example_json"] == {"content": "hi"}
+    assert api_meta["response_example_json"] == {"code": 0}
+    assert api_meta["query_params_table"] == [{"名称": "receive_id_type"}]
+    assert api_meta["body_params_table"] == [{"名称": "content"}]
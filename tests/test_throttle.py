@@ -0,0 +1,143 @@
+import pytest
+
+import mock_server
+import runtime
+import throttle
+from linker import cluster_resources
+
+FAST = {"default": {"rate": None, "max_attempts": 3, "base_delay": 0.0, "max_delay": 0.0, "deadline": 5.0}}
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = b"{}"
+        self.text = "{}"
+
+
+class FakeHTTP:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def request(self, method, url=None, **kwargs):
+        self.calls += 1
+        return FakeResponse(self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0])
+
+
+@pytest.fixture
+def fake_http(monkeypatch):
+    def install(*statuses):
+        http = FakeHTTP(statuses)
+        monkeypatch.setattr(runtime, "get_session", lambda: http)
+        return http
+
+    runtime.configure_throttle(FAST)
+    yield install
+    runtime.configure_throttle({})
+
+
+def test_endpoint_key_normalises_params_but_not_port():
+    assert throttle.endpoint_key("GET", "http://127.0.0.1:8080/im/v1/messages/$auto_message_id") == \
+        "GET http://127.0.0.1:8080/im/v1/messages/:id"
+    assert throttle.endpoint_key("GET", "/chats/:chat_id/members") == "GET /chats/:id/members"
+
+
+def test_parse_retry_after():
+    assert throttle.parse_retry_after({"Retry-After": "3"}) == 3.0
+    assert throttle.parse_retry_after({"X-RateLimit-Reset": "1000000010"}, now=1000000000) == 10.0
+    assert throttle.parse_retry_after({"x-ogw-ratelimit-reset": "2"}) == 2.0
+    assert throttle.parse_retry_after({}) is None
+
+
+def test_token_bucket_waits_only_when_over_rate():
+    bucket = throttle.TokenBucket(rate=10.0, burst=2)
+    assert bucket.acquire() == 0.0 and bucket.acquire() == 0.0
+    assert 0.0 < bucket.acquire() <= 0.1
+
+
+def test_call_retries_listed_statuses_up_to_max_attempts():
+    t = throttle.Throttle(FAST)
+    http = FakeHTTP([429])
+    retries = []
+    response = t.call(lambda: http.request("GET"), "default", "GET /x", on_retry=lambda r, a, d: retries.append(a))
+    assert response.status_code == 429 and http.calls == 3 and retries == [1, 2]
+
+    http = FakeHTTP([404])
+    assert t.call(lambda: http.request("GET"), "default", "GET /x").status_code == 404
+    assert http.calls == 1
+
+
+def test_get_404_is_polled_for_positive_steps(fake_http):
+    http = fake_http(404, 404, 200)
+    assert runtime.send("GET", "http://h/messages/1", {}, {}, {}).status_code == 200
+    assert http.calls == 3
+
+
+def test_get_404_is_not_retried_when_failure_is_expected(fake_http):
+    http = fake_http(404)
+    assert runtime.send("GET", "http://h/messages/1", {}, {}, {}, expected_fail=True).status_code == 404
+    assert http.calls == 1
+
+
+def test_run_step_passes_expected_fail(fake_http):
+    http = fake_http(404)
+    ctx = runtime.ScenarioContext("test_messages_res_not_found", "❌ 资源不存在测试", "messages", "res_not_found")
+    runtime.run_step({"method": "GET", "url": "http://h/messages/invalid_id_999", "description": "查询 ❌"}, ctx)
+    assert http.calls == 1
+
+
+def test_configure_overrides_per_resource():
+    t = throttle.Throttle({"default": {"rate": 5.0}, "messages": {"burst": 1}})
+    assert t.policy("messages")["rate"] == 5.0 and t.policy("messages")["burst"] == 1
+    assert t.policy("chats") is t.policy("default")
+    assert t.bucket("messages", "GET /m") is t.bucket("messages", "GET /m")
+    assert t.bucket("messages", "GET /m") is not t.bucket("chats", "GET /m")
+
+
+def test_429_follows_retry_after(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(throttle.time, "sleep", sleeps.append)
+    t = throttle.Throttle(FAST)
+    responses = [FakeResponse(429, {"Retry-After": "2"}), FakeResponse(200)]
+    assert t.call(lambda: responses.pop(0), "default", "POST /x").status_code == 200
+    assert sleeps[0] == 2.0
+
+
+def test_retry_stops_at_deadline(monkeypatch):
+    monkeypatch.setattr(throttle.time, "sleep", lambda s: None)
+    t = throttle.Throttle({"default": dict(FAST["default"], max_attempts=10, deadline=1.0)})
+    calls = []
+    limited = FakeResponse(429, {"Retry-After": "5"})
+    assert t.call(lambda: calls.append(1) or limited, "default", "POST /x") is limited
+    assert len(calls) == 1
+
+
+def test_backoff_delay_is_capped():
+    class Rng:
+        @staticmethod
+        def uniform(low, high):
+            return high
+
+    assert throttle.backoff_delay(0, 0.2, 8.0, Rng) == 0.2
+    assert throttle.backoff_delay(10, 0.2, 8.0, Rng) == 8.0
+
+
+def test_only_throttle_retries_rate_limits_over_real_session(monkeypatch):
+    spec = [{"method": "GET", "url": "http://h/im/v1/messages", "body": {}}]
+    app = mock_server.MockApp(cluster_resources(spec), rate_429=1.0, retry_after=0)
+    server, base_url = mock_server.serve_in_thread(app)
+    monkeypatch.setattr(runtime, "VERBOSE", False)
+    runtime.configure_base_url(base_url)
+    runtime.configure_throttle({"default": dict(FAST["default"], max_attempts=2)})
+    try:
+        assert runtime.send("GET", "http://h/im/v1/messages", {}, {}, {}).status_code == 429
+    finally:
+        runtime.configure_throttle({})
+        runtime.configure_base_url(None)
+        runtime.close_session()
+        server.shutdown()
+        server.server_close()
+    # 适配器不再按 Retry-After 自行重试：请求数 == throttle 的 max_attempts
+    assert app.stats["total"] == 2
@@ -0,0 +1,166 @@
+"""
+限流感知的节流层：按接口令牌桶 + Retry-After / 限流头 + 带抖动的指数退避。
+
+- 令牌桶按 (资源, 接口模板) 划分，只在真正超速时才等待，且只等到下一个令牌可用
+- 429 优先遵循服务端给出的 Retry-After / 限流重置头，没有时再按指数退避 (full jitter)
+- 所有重试都受单次请求的总截止时间 (deadline) 约束
+- 配置按资源覆盖，未配置的资源使用 "default"
+"""
+import email.utils
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+# --- 默认节流策略 (generator.py 中的 RATE_LIMIT_CONFIG 会覆盖) ---
+DEFAULT_POLICY = {
+    "rate": 50.0,         # 每秒令牌数；None 表示不限速
+    "burst": 10,          # 桶容量 (允许的瞬时突发)
+    "max_attempts": 5,    # 单次请求最多尝试次数 (含首次)
+    "base_delay": 0.2,    # 退避基数 (秒)
+    "max_delay": 8.0,     # 单次退避上限 (秒)
+    "deadline": 30.0,     # 单次请求 (含全部重试) 的总截止时间 (秒)
+}
+
+RETRY_AFTER_HEADERS = ("Retry-After",)
+RESET_HEADERS = ("X-RateLimit-Reset", "x-ogw-ratelimit-reset", "RateLimit-Reset")
+REMAINING_HEADERS = ("X-RateLimit-Remaining", "RateLimit-Remaining")
+
+
+class TokenBucket:
+    """线程安全的预约式令牌桶：acquire() 返回调用方需要等待的秒数"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            wait = max(0.0, self.blocked_until - now)
+            if self.rate:
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                self.tokens -= 1
+                if self.tokens < 0:
+                    wait = max(wait, -self.tokens / self.rate)
+            return wait
+
+    def block_for(self, seconds):
+        """服务端要求暂停时，整个桶在 seconds 内不再放行"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def parse_retry_after(headers, now=None):
+    """从响应头解析服务端要求的等待秒数，无法解析时返回 None"""
+    now = time.time() if now is None else now
+    for name in RETRY_AFTER_HEADERS:
+        value = headers.get(name)
+        if not value:
+            continue
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - now)
+        except (TypeError, ValueError):
+            pass
+
+    for name in RESET_HEADERS:
+        value = headers.get(name)
+        if not value:
+            continue
+        try:
+            reset = float(value)
+        except ValueError:
+            continue
+        # 大数值视为 epoch 秒，否则视为剩余秒数
+        return max(0.0, reset - now) if reset > 1e9 else reset
+    return None
+
+
+def backoff_delay(attempt, base, cap, rng=random):
+    """指数退避 + full jitter"""
+    return rng.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def endpoint_key(method, url):
+    """把 $var / :param 归一成同一个接口模板，保证同接口共用一个令牌桶 (只处理 path，host 上的端口保持原样)"""
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}" if parts.scheme else parts.netloc
+    path = re.sub(r'[$:]\w+', ':id', parts.path)
+    return f"{method} {origin}{path}"
+
+
+class Throttle:
+    def __init__(self, config=None):
+        self.policies = {"default": dict(DEFAULT_POLICY)}
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.configure(config or {})
+
+    def configure(self, config):
+        default = dict(DEFAULT_POLICY)
+        default.update(config.get("default", {}))
+        self.policies = {"default": default}
+        for resource, overrides in config.items():
+            if resource == "default":
+                continue
+            policy = dict(default)
+            policy.update(overrides)
+            self.policies[resource] = policy
+        with self.lock:
+            self.buckets = {}
+
+    def policy(self, resource):
+        return self.policies.get(resource) or self.policies["default"]
+
+    def bucket(self, resource, endpoint):
+        key = (resource, endpoint)
+        with self.lock:
+            if key not in self.buckets:
+                policy = self.policy(resource)
+                self.buckets[key] = TokenBucket(policy["rate"], policy["burst"])
+            return self.buckets[key]
+
+    def call(self, send_fn, resource, endpoint, retry_statuses=(429,), on_retry=None):
+        """
+        在节流与截止时间约束下执行 send_fn()：
+        - retry_statuses 中的状态码触发重试 (429 之外调用方可追加，如 GET 的 404)
+        - 最后一次的响应原样返回，由调用方做断言
+        """
+        policy = self.policy(resource)
+        bucket = self.bucket(resource, endpoint)
+        deadline = time.monotonic() + policy["deadline"]
+        attempt = 0
+        while True:
+            wait = bucket.acquire()
+            if wait:
+                time.sleep(wait)
+            response = send_fn()
+
+            remaining = next((response.headers.get(h) for h in REMAINING_HEADERS if response.headers.get(h)), None)
+            server_wait = parse_retry_after(response.headers)
+            if remaining == "0" and server_wait:
+                bucket.block_for(server_wait)
+
+            attempt += 1
+            if response.status_code not in retry_statuses or attempt >= policy["max_attempts"]:
+                return response
+
+            if response.status_code == 429 and server_wait is not None:
+                delay = server_wait
+                bucket.block_for(delay)
+            else:
+                delay = backoff_delay(attempt - 1, policy["base_delay"], policy["max_delay"])
+            if time.monotonic() + delay > deadline:
+                return response
+            if on_retry:
+                on_retry(response, attempt, delay)
+            time.sleep(delay)